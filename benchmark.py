@@ -0,0 +1,253 @@
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import contextlib
+import multiprocessing
+import cv2
+import numpy as np
+from eigenface_engine import EigenfaceEngine
+from utils import list_image_files, create_folder_if_not_exists
+from memory_cache import image_memory_cache
+
+# Tahap yang dilaporkan benchmark (urutan kolom pada output)
+BENCH_STAGES = ('decode', 'vectorize', 'mean', 'eigensolve', 'projection', 'query')
+
+# Metrics memori yang ikut dicek regresi oleh compare_benchmarks
+BENCH_MEMORY_METRICS = ('peak_rss_mb', 'train_rss_ratio')
+
+def generate_synthetic_dataset(folder_path, n_images, n_people=10, image_size=(96, 96), seed=0):
+    """
+    Buat dataset wajah sintetis (pola dasar per orang + noise) sebagai file PNG
+    dengan struktur folder yang sama seperti dataset asli
+    
+    Args:
+        folder_path (str): Folder output
+        n_images (int): Jumlah total gambar
+        n_people (int): Jumlah orang (subfolder)
+        image_size (tuple): Ukuran gambar yang ditulis (width, height)
+        seed (int): Seed random agar dataset reproducible
+    """
+    rng = np.random.default_rng(seed)
+    width, height = image_size
+    
+    # Pola dasar halus per orang: noise resolusi rendah yang di-upscale
+    bases = [cv2.resize(rng.uniform(0, 255, (8, 8)).astype(np.float32), (width, height),
+                        interpolation=cv2.INTER_CUBIC) for _ in range(n_people)]
+    
+    for i in range(n_images):
+        person = i % n_people
+        person_folder = os.path.join(folder_path, f"person_{person:03d}")
+        create_folder_if_not_exists(person_folder)
+        
+        img = bases[person] + rng.normal(0, 20, (height, width))
+        img = np.clip(img, 0, 255).astype(np.uint8)
+        cv2.imwrite(os.path.join(person_folder, f"img_{i:06d}.png"), img)
+
+def benchmark_case(dataset_folder, n_components, target_size=(64, 64), n_queries=100, repeat=1,
+                   engine_kwargs=None):
+    """
+    Jalankan training + recognition pada satu dataset dan catat durasi per tahap
+    
+    Returns:
+        dict: Durasi terbaik (minimum dari repeat) per tahap dalam detik
+    """
+    engine_kwargs = engine_kwargs or {}
+    query_paths = list_image_files(dataset_folder)[:n_queries]
+    best = {}
+    
+    for _ in range(repeat):
+        # Decode harus diukur dari disk, bukan dari cache in-memory run sebelumnya
+        image_memory_cache.clear()
+        engine = EigenfaceEngine(target_size=target_size, n_components=n_components, **engine_kwargs)
+        
+        # Output training engine tidak dicetak agar JSON tetap bersih
+        with contextlib.redirect_stdout(io.StringIO()):
+            if not engine.train(dataset_folder):
+                raise RuntimeError(f"Training gagal untuk dataset {dataset_folder}")
+            batch = engine.recognize_many(query_paths)
+        
+        timings = {stage: engine.stage_timings.get(stage, 0.0) for stage in BENCH_STAGES[:-1]}
+        timings['train_total'] = engine.stage_timings['total']
+        timings['query'] = batch['timing']['projection'] + batch['timing']['search']
+        timings['query_per_image_ms'] = timings['query'] * 1000 / max(len(query_paths), 1)
+        
+        for stage, value in timings.items():
+            best[stage] = min(best.get(stage, value), value)
+    
+    return best
+
+def _peak_rss_bytes():
+    """
+    Peak resident set size proses ini
+    
+    Di Linux dibaca dari VmHWM (/proc/self/status) karena ru_maxrss ikut
+    mewarisi peak proses induk setelah fork + exec.
+    """
+    try:
+        with open("/proc/self/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def _train_peak_rss(result_queue, dataset_folder, n_components, target_size, engine_kwargs):
+    engine = EigenfaceEngine(target_size=target_size, n_components=n_components, **engine_kwargs)
+    n_images = 0
+    if dataset_folder is not None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            if engine.train(dataset_folder):
+                n_images = len(engine.face_labels)
+    result_queue.put((_peak_rss_bytes(), n_images))
+
+def benchmark_memory(dataset_folder, n_components, target_size=(64, 64), engine_kwargs=None):
+    """
+    Ukur peak RSS training dalam proses terpisah (ru_maxrss tidak bisa di-reset)
+    
+    Peak proses kosong (hanya import engine) dikurangkan sehingga hasilnya
+    adalah memori yang dipakai training, dibandingkan dengan ukuran dataset
+    mentah (M x N float32).
+    
+    Returns:
+        dict: 'peak_rss_mb', 'baseline_rss_mb', 'dataset_mb', 'train_rss_ratio'
+    """
+    engine_kwargs = engine_kwargs or {}
+    context = multiprocessing.get_context('spawn')
+    
+    def run(folder):
+        result_queue = context.Queue()
+        process = context.Process(target=_train_peak_rss,
+                                  args=(result_queue, folder, n_components, target_size, engine_kwargs))
+        process.start()
+        result = result_queue.get()
+        process.join()
+        return result
+    
+    baseline_rss, _ = run(None)
+    peak_rss, n_images = run(dataset_folder)
+    dataset_bytes = n_images * target_size[0] * target_size[1] * 4
+    
+    return {
+        'peak_rss_mb': peak_rss / 2**20,
+        'baseline_rss_mb': baseline_rss / 2**20,
+        'dataset_mb': dataset_bytes / 2**20,
+        'train_rss_ratio': (peak_rss - baseline_rss) / dataset_bytes if dataset_bytes else 0.0
+    }
+
+def run_benchmark(gallery_sizes, components_list, n_people=10, target_size=(64, 64), n_queries=100,
+                  repeat=1, seed=0, engine_kwargs=None, work_dir=None, memory=False):
+    """
+    Benchmark semua kombinasi ukuran gallery sintetis x n_components
+    
+    Jika memory=True, peak RSS training setiap kombinasi juga diukur (lihat
+    benchmark_memory) dan disimpan di 'memory'.
+    
+    Returns:
+        dict: Metadata environment dan list hasil per kombinasi
+    """
+    work_dir = work_dir or tempfile.mkdtemp(prefix="eigenface_bench_")
+    results = []
+    
+    try:
+        for n_images in gallery_sizes:
+            dataset_folder = os.path.join(work_dir, f"gallery_{n_images}")
+            if not os.path.exists(dataset_folder):
+                generate_synthetic_dataset(dataset_folder, n_images, n_people, seed=seed)
+            
+            for n_components in components_list:
+                timings = benchmark_case(dataset_folder, n_components, target_size, n_queries, repeat,
+                                         engine_kwargs)
+                result = {
+                    'gallery_size': n_images,
+                    'n_components': n_components,
+                    'timings': timings
+                }
+                summary = (f"gallery={n_images} components={n_components} "
+                           f"train={timings['train_total']:.3f}s query={timings['query_per_image_ms']:.3f}ms/img")
+                if memory:
+                    result['memory'] = benchmark_memory(dataset_folder, n_components, target_size, engine_kwargs)
+                    summary += (f" peak_rss={result['memory']['peak_rss_mb']:.1f}MB "
+                                f"({result['memory']['train_rss_ratio']:.2f}x dataset)")
+                results.append(result)
+                print(summary, file=sys.stderr)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__,
+            'cpu_count': os.cpu_count(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        'config': {
+            'n_people': n_people,
+            'target_size': list(target_size),
+            'n_queries': n_queries,
+            'repeat': repeat,
+            'seed': seed,
+            'engine_kwargs': {k: str(v) for k, v in (engine_kwargs or {}).items()}
+        },
+        'results': results
+    }
+
+def compare_benchmarks(baseline, current, tolerance=0.2):
+    """
+    Bandingkan dua hasil benchmark dan cari tahap yang melambat
+    
+    Args:
+        baseline (dict): Hasil run_benchmark sebelumnya
+        current (dict): Hasil run_benchmark sekarang
+        tolerance (float): Batas perlambatan relatif (0.2 = 20%)
+    
+    Returns:
+        list: Regresi berupa dict (gallery_size, n_components, stage, baseline, current, ratio)
+    """
+    def measured(result):
+        memory = result.get('memory', {})
+        return dict(result['timings'], **{name: memory[name] for name in BENCH_MEMORY_METRICS if name in memory})
+    
+    baseline_cases = {(r['gallery_size'], r['n_components']): measured(r) for r in baseline['results']}
+    regressions = []
+    
+    for result in current['results']:
+        key = (result['gallery_size'], result['n_components'])
+        if key not in baseline_cases:
+            continue
+        
+        # Peak memory dibandingkan dengan aturan yang sama seperti durasi
+        for stage, value in measured(result).items():
+            old_value = baseline_cases[key].get(stage)
+            if not old_value:
+                continue
+            ratio = value / old_value
+            if ratio > 1 + tolerance:
+                regressions.append({
+                    'gallery_size': key[0],
+                    'n_components': key[1],
+                    'stage': stage,
+                    'baseline': old_value,
+                    'current': value,
+                    'ratio': ratio
+                })
+    
+    return regressions
+
+def save_benchmark(result, output_path):
+    with open(output_path, 'w') as f:
+        json.dump(result, f, indent=2)
+
+def load_benchmark(path):
+    with open(path, 'r') as f:
+        return json.load(f)
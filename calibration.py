@@ -0,0 +1,177 @@
+import numpy as np
+from utils import squared_euclidean_distances
+
+# Target false accept rate untuk tabel operating point
+DEFAULT_TARGET_FARS = (0.1, 0.05, 0.01, 0.001, 0.0001)
+
+# Batas elemen matriks jarak per blok probe (float32 -> ~256 MB)
+MAX_BLOCK_ELEMENTS = 2**26
+
+def _shuffled_rank(labels, rng):
+    """Posisi acak setiap wajah di antara wajah orang yang sama (0, 1, 2, ...) dan jumlah wajah per orang"""
+    permutation = rng.permutation(len(labels))
+    order = permutation[np.argsort(labels[permutation], kind='stable')]
+    counts = np.bincount(labels)
+    starts = np.cumsum(counts) - counts
+    rank = np.empty(len(labels), dtype=np.int64)
+    rank[order] = np.arange(len(labels)) - np.repeat(starts, counts)
+    return rank, counts
+
+def holdout_split(labels, holdout_fraction=0.2, seed=0):
+    """
+    Split stratified per orang: sebagian wajah setiap orang dijadikan probe held-out
+    
+    Orang dengan satu wajah tidak punya probe, dan setiap orang selalu
+    menyisakan minimal satu wajah di gallery.
+    
+    Args:
+        labels (np.array): Label per wajah
+        holdout_fraction (float): Fraksi wajah per orang yang dijadikan probe
+        seed (int): Seed random
+    
+    Returns:
+        np.array: Mask boolean wajah held-out
+    """
+    labels = np.asarray(labels)
+    rank, counts = _shuffled_rank(labels, np.random.default_rng(seed))
+    
+    n_holdout = np.maximum(1, np.round(holdout_fraction * counts)).astype(np.int64)
+    n_holdout = np.minimum(n_holdout, counts - 1)
+    return rank < n_holdout[labels]
+
+def stratified_folds(labels, n_folds=5, seed=0):
+    """
+    Bagi wajah ke n_folds fold secara stratified (wajah setiap orang tersebar rata)
+    
+    Orang dengan satu wajah tidak pernah menjadi data test (fold -1) karena
+    tidak akan ada wajahnya di data training.
+    
+    Args:
+        labels (np.array): Label per wajah
+        n_folds (int): Jumlah fold
+        seed (int): Seed random
+    
+    Returns:
+        np.array: Nomor fold (0..n_folds-1) per wajah, -1 = selalu training
+    """
+    labels = np.asarray(labels)
+    rank, counts = _shuffled_rank(labels, np.random.default_rng(seed))
+    folds = rank % n_folds
+    folds[counts[labels] < 2] = -1
+    return folds
+
+def identity_min_distances(probes, gallery, gallery_labels, n_labels):
+    """
+    Jarak euclidean terdekat dari setiap probe ke setiap orang di gallery
+    
+    Jarak dihitung per blok probe dengan satu GEMM, lalu diminimumkan per
+    orang dengan np.minimum.reduceat di atas kolom yang diurutkan per label.
+    
+    Args:
+        probes (np.array): Proyeksi probe (Q x k)
+        gallery (np.array): Proyeksi gallery (M x k)
+        gallery_labels (np.array): Label per baris gallery
+        n_labels (int): Jumlah orang
+    
+    Returns:
+        np.array: Jarak (Q x n_labels); inf untuk orang tanpa wajah di gallery
+    """
+    order = np.argsort(gallery_labels, kind='stable')
+    gallery = np.ascontiguousarray(gallery[order])
+    gallery_sq_norms = np.einsum('ij,ij->i', gallery, gallery)
+    counts = np.bincount(gallery_labels, minlength=n_labels)
+    present = counts > 0
+    starts = (np.cumsum(counts) - counts)[present]
+    
+    distances = np.full((len(probes), n_labels), np.inf, dtype=gallery.dtype)
+    block = max(1, MAX_BLOCK_ELEMENTS // max(len(gallery), 1))
+    for b in range(0, len(probes), block):
+        sq_distances = squared_euclidean_distances(probes[b:b + block], gallery, gallery_sq_norms)
+        distances[b:b + block, present] = np.sqrt(np.minimum.reduceat(sq_distances, starts, axis=1))
+    return distances
+
+def genuine_impostor_scores(identity_distances, probe_labels):
+    """
+    Pisahkan jarak probe-orang menjadi genuine (orang yang sama) dan impostor (orang lain)
+    
+    Returns:
+        genuine (np.array): Satu jarak per probe
+        impostor (np.array): Satu jarak per pasangan (probe, orang lain)
+    """
+    rows = np.arange(len(probe_labels))
+    genuine = identity_distances[rows, probe_labels]
+    
+    mask = np.isfinite(identity_distances)
+    mask[rows, probe_labels] = False
+    impostor = identity_distances[mask]
+    return genuine[np.isfinite(genuine)], impostor
+
+def compute_roc(genuine, impostor, n_points=200):
+    """
+    ROC (FAR dan TAR per threshold): wajah diterima jika distance < threshold
+    
+    Threshold diambil dari kuantil distribusi impostor (rapat di FAR kecil,
+    skala log) dan genuine, sehingga kurva tetap akurat di daerah FAR rendah.
+    
+    Returns:
+        dict: 'thresholds', 'far', 'tar' (list, threshold naik)
+    """
+    genuine = np.sort(genuine)
+    impostor = np.sort(impostor)
+    
+    far_grid = np.concatenate([[0.0], np.logspace(-6, 0, n_points // 2)])
+    impostor_points = impostor[np.minimum((far_grid * len(impostor)).astype(np.int64), len(impostor) - 1)]
+    genuine_points = np.quantile(genuine, np.linspace(0, 1, n_points // 2))
+    thresholds = np.unique(np.concatenate([impostor_points, genuine_points, [impostor[-1] + 1e-6]]))
+    
+    far = np.searchsorted(impostor, thresholds, side='left') / len(impostor)
+    tar = np.searchsorted(genuine, thresholds, side='left') / len(genuine)
+    return {'thresholds': thresholds.tolist(), 'far': far.tolist(), 'tar': tar.tolist()}
+
+def threshold_for_far(roc, target_far):
+    """
+    Threshold terbesar di ROC dengan FAR <= target_far
+    
+    Args:
+        roc (dict): Hasil compute_roc
+        target_far (float): Target false accept rate (0-1)
+    
+    Returns:
+        float: Threshold distance
+    """
+    far = np.asarray(roc['far'])
+    index = int(np.searchsorted(far, target_far, side='right')) - 1
+    return float(roc['thresholds'][max(index, 0)])
+
+def calibrate_distances(probes, probe_labels, gallery, gallery_labels, n_labels, target_fars=DEFAULT_TARGET_FARS):
+    """
+    Hitung distribusi genuine/impostor, ROC dan tabel operating point
+    
+    Returns:
+        dict: 'roc', 'operating_points' (list dict 'far', 'threshold', 'tar'), 'eer',
+              'n_genuine', 'n_impostor'
+    """
+    identity_distances = identity_min_distances(probes, gallery, gallery_labels, n_labels)
+    genuine, impostor = genuine_impostor_scores(identity_distances, np.asarray(probe_labels))
+    if len(genuine) == 0 or len(impostor) == 0:
+        raise ValueError("Kalibrasi butuh minimal 2 orang dengan lebih dari satu wajah")
+    
+    roc = compute_roc(genuine, impostor)
+    far, tar = np.asarray(roc['far']), np.asarray(roc['tar'])
+    
+    operating_points = []
+    for target_far in target_fars:
+        threshold = threshold_for_far(roc, target_far)
+        index = roc['thresholds'].index(threshold)
+        operating_points.append({'far': target_far, 'threshold': threshold, 'tar': float(tar[index])})
+    
+    # Equal error rate: titik FAR = FRR (1 - TAR)
+    eer_index = int(np.argmin(np.abs(far - (1.0 - tar))))
+    return {
+        'roc': roc,
+        'operating_points': operating_points,
+        'eer': float((far[eer_index] + 1.0 - tar[eer_index]) / 2),
+        'eer_threshold': float(roc['thresholds'][eer_index]),
+        'n_genuine': int(len(genuine)),
+        'n_impostor': int(len(impostor))
+    }
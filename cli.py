@@ -0,0 +1,291 @@
+import io
+import sys
+import json
+import argparse
+import contextlib
+import numpy as np
+from eigenface_engine import EigenfaceEngine
+from benchmark import run_benchmark, compare_benchmarks, save_benchmark, load_benchmark
+from server import serve, to_json
+from search_index import SEARCH_INDEXES, ShardedIndex
+from loadtest import run_load_test, sweep_batch_windows, sweep_workers
+from utils import list_image_files
+from face_detection import FaceDetector
+from video_pipeline import VideoRecognitionPipeline
+from sweep import run_sweep, best_setting
+
+def parse_int_list(value):
+    return [int(v) for v in value.split(',') if v]
+
+def parse_size(value):
+    return (int(value), int(value))
+
+def engine_options(args):
+    """Opsi EigenfaceEngine yang sama untuk semua subcommand"""
+    return {
+        'eigen_solver': args.solver,
+        'num_workers': args.workers,
+        'dtype': np.dtype(args.dtype),
+        'index_type': args.index,
+        'index_params': {'n_shards': args.shards, 'partition': args.shard_by} if args.index == 'sharded' else None,
+        'match_mode': args.match_mode or 'samples',
+        'variance_target': args.variance_target,
+        'adaptive_iterations': args.adaptive_iterations,
+        'align_faces': args.align_faces
+    }
+
+def quiet_if(enabled):
+    return contextlib.redirect_stdout(io.StringIO()) if enabled else contextlib.nullcontext()
+
+def cmd_train(args):
+    engine = EigenfaceEngine(target_size=args.size, n_components=args.components,
+                             cache_dir=args.cache_dir, calibration_holdout=args.calibrate, **engine_options(args))
+    
+    with quiet_if(args.quiet):
+        if args.stream_batch:
+            trained = engine.train_streaming(args.dataset, batch_size=args.stream_batch)
+        else:
+            trained = engine.train(args.dataset)
+        if not trained or not engine.save_model(args.output):
+            return 1
+    
+    if args.metrics_file:
+        engine.metrics.write_prometheus(args.metrics_file)
+    calibration = engine.get_model_info()['calibration']
+    print(json.dumps({'model': args.output, 'calibration': calibration, 'metrics': engine.metrics.snapshot()},
+                     indent=2))
+    return 0
+
+def cmd_recognize(args):
+    engine = EigenfaceEngine()
+    
+    with quiet_if(args.quiet):
+        if not engine.load_model(args.model, shards=args.load_shards):
+            return 1
+        if args.match_mode is not None:
+            engine.set_match_mode(args.match_mode)
+    
+    paths = args.images[0] if len(args.images) == 1 else args.images
+    batch = engine.recognize_many(paths, threshold=args.threshold, k=args.k, exact=args.exact,
+                                  target_far=args.target_far)
+    
+    if args.metrics_file:
+        engine.metrics.write_prometheus(args.metrics_file)
+    
+    # Nilai numpy (label) tidak bisa langsung di-serialize JSON
+    print(json.dumps(batch, indent=2, default=lambda v: v.item() if hasattr(v, 'item') else str(v)))
+    return 0
+
+def cmd_bench(args):
+    result = run_benchmark(args.sizes, args.components, n_people=args.people, target_size=args.size,
+                           n_queries=args.queries, repeat=args.repeat, seed=args.seed,
+                           engine_kwargs=engine_options(args), memory=args.memory)
+    
+    if args.output:
+        save_benchmark(result, args.output)
+    else:
+        print(json.dumps(result, indent=2))
+    
+    if args.compare:
+        regressions = compare_benchmarks(load_benchmark(args.compare), result, args.tolerance)
+        for r in regressions:
+            print(f"REGRESI gallery={r['gallery_size']} components={r['n_components']} {r['stage']}: "
+                  f"{r['baseline']:.4f} -> {r['current']:.4f} ({r['ratio']:.2f}x)", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+def cmd_serve(args):
+    if not serve(args.model, args.host, args.port, args.window_ms, args.max_batch, verbose=args.verbose,
+                 workers=args.workers, shards=args.load_shards):
+        return 1
+    return 0
+
+def cmd_loadtest(args):
+    image_paths = list_image_files(args.images)[:args.max_images]
+    if not image_paths:
+        print(f"Tidak ada gambar di {args.images}", file=sys.stderr)
+        return 1
+    
+    if args.model and args.sweep_workers:
+        result = sweep_workers(args.model, image_paths, args.sweep_workers, args.windows[0], args.requests,
+                               args.concurrency, args.max_batch)
+    elif args.model:
+        result = sweep_batch_windows(args.model, image_paths, args.windows, args.requests, args.concurrency,
+                                     args.max_batch)
+    else:
+        result = run_load_test(args.url, image_paths, args.requests, args.concurrency, args.threshold)
+    print(json.dumps(result, indent=2))
+    return 0
+
+def cmd_video(args):
+    engine = EigenfaceEngine()
+    with quiet_if(args.quiet):
+        if not engine.load_model(args.model):
+            return 1
+    
+    detector = None if args.no_detect else FaceDetector(args.cascade)
+    pipeline = VideoRecognitionPipeline(engine, detector, frame_stride=args.stride, threshold=args.threshold,
+                                        batch_size=args.batch_size, queue_size=args.queue_size,
+                                        smoothing_window=args.smoothing, rematch_interval=args.rematch)
+    
+    # Hasil per frame ditulis langsung (JSON Lines) selama video diproses
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        for frame in pipeline.process(args.video):
+            output.write(to_json(frame) + "\n")
+    finally:
+        if args.output:
+            output.close()
+    
+    print(json.dumps(pipeline.stats, indent=2), file=sys.stderr)
+    return 0
+
+def cmd_sweep(args):
+    result = run_sweep(args.dataset, [(size, size) for size in args.sizes], args.components, n_folds=args.folds,
+                       seed=args.seed, n_jobs=args.jobs, engine_kwargs=engine_options(args),
+                       num_workers=args.workers)
+    result['best'] = best_setting(result, args.max_accuracy_drop)
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+    
+    best = result['best']
+    if best is not None:
+        print(f"Terbaik: size={best['target_size'][0]} components={best['n_components']} "
+              f"accuracy={best['accuracy_mean']:.3f} query={best['query_ms_per_image']:.4f}ms/img", file=sys.stderr)
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Face recognition Eigenfaces tanpa GUI")
+    
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--solver', choices=EigenfaceEngine.EIGEN_SOLVERS, default='block',
+                        help="'randomized' tidak membentuk matriks Gram/kovarians (hemat memori)")
+    common.add_argument('--workers', type=int, default=None, help="Jumlah thread decode")
+    common.add_argument('--dtype', choices=('float32', 'float64'), default='float32')
+    common.add_argument('--index', choices=tuple(SEARCH_INDEXES), default=None,
+                        help="'ivf' = approximate, 'sharded' = gallery dipecah per shard, dicari paralel")
+    common.add_argument('--shards', type=int, default=None, help="Jumlah shard index 'sharded' (default: jumlah CPU)")
+    common.add_argument('--shard-by', choices=ShardedIndex.PARTITIONS, default='identity',
+                        help="Pembagian shard: per orang atau per rentang baris")
+    common.add_argument('--match-mode', choices=EigenfaceEngine.MATCH_MODES, default=None,
+                        help="Default: 'samples' saat training, mode yang tersimpan di model saat recognize")
+    common.add_argument('--variance-target', type=float, default=None,
+                        help="Berhenti menambah eigenfaces setelah explained variance ini (mis. 0.95)")
+    common.add_argument('--adaptive-iterations', action='store_true',
+                        help="Batas iterasi solver per komponen berdasarkan eigengap")
+    common.add_argument('--align-faces', action='store_true',
+                        help="Deteksi wajah (cascade Haar) dan luruskan berdasarkan mata sebelum resize")
+    common.add_argument('--quiet', action='store_true', help="Sembunyikan log engine")
+    common.add_argument('--metrics-file', default=None, help="Tulis metrics (format Prometheus) ke file")
+    
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    train = subparsers.add_parser('train', parents=[common], help="Training model dari folder dataset")
+    train.add_argument('dataset', help="Folder dataset (subfolder per orang)")
+    train.add_argument('--output', '-o', default="face_recognition_model", help="Folder model output")
+    train.add_argument('--components', '-k', type=int, default=50)
+    train.add_argument('--size', type=parse_size, default=(64, 64), help="Ukuran gambar (persegi)")
+    train.add_argument('--cache-dir', default=None, help="Folder cache preprocess")
+    train.add_argument('--calibrate', type=float, nargs='?', const=0.2, default=None, metavar='HOLDOUT',
+                       help="Kalibrasi threshold (ROC, operating point per FAR) dari fraksi wajah held-out (default 0.2)")
+    train.add_argument('--stream-batch', type=int, default=None,
+                       help="Training streaming per batch gambar ini (dataset lebih besar dari RAM)")
+    train.set_defaults(func=cmd_train)
+    
+    recognize = subparsers.add_parser('recognize', parents=[common], help="Recognition gambar atau folder")
+    recognize.add_argument('model', help="Folder model (atau file .pkl lama)")
+    recognize.add_argument('images', nargs='+', help="Path gambar atau satu folder")
+    recognize.add_argument('--threshold', '-t', type=float, default=0.8)
+    recognize.add_argument('--target-far', type=float, default=None,
+                           help="Pakai threshold kalibrasi untuk false accept rate ini (mis. 0.01) alih-alih --threshold")
+    recognize.add_argument('--k', type=int, default=5)
+    recognize.add_argument('--exact', action='store_true', help="Abaikan search index")
+    recognize.add_argument('--load-shards', type=parse_int_list, default=None,
+                           help="Index 'sharded': hanya load shard ini, mis. 0,2")
+    recognize.set_defaults(func=cmd_recognize)
+    
+    bench = subparsers.add_parser('bench', parents=[common], help="Benchmark per tahap pada gallery sintetis")
+    bench.add_argument('--sizes', type=parse_int_list, default=[200, 1000], help="Ukuran gallery, mis. 200,1000")
+    bench.add_argument('--components', type=parse_int_list, default=[10, 50], help="n_components, mis. 10,50")
+    bench.add_argument('--people', type=int, default=10)
+    bench.add_argument('--size', type=parse_size, default=(64, 64))
+    bench.add_argument('--queries', type=int, default=100)
+    bench.add_argument('--repeat', type=int, default=1)
+    bench.add_argument('--seed', type=int, default=0)
+    bench.add_argument('--memory', action='store_true', help="Ukur juga peak RSS training (proses terpisah)")
+    bench.add_argument('--output', '-o', default=None, help="File JSON hasil (default: stdout)")
+    bench.add_argument('--compare', default=None, help="File JSON baseline untuk cek regresi")
+    bench.add_argument('--tolerance', type=float, default=0.2, help="Batas perlambatan relatif")
+    bench.set_defaults(func=cmd_bench)
+    
+    server = subparsers.add_parser('serve', help="Layani recognition lewat HTTP/JSON di localhost")
+    server.add_argument('model', help="Folder model (atau file .pkl lama)")
+    server.add_argument('--host', default="127.0.0.1")
+    server.add_argument('--port', type=int, default=8000)
+    server.add_argument('--window-ms', type=float, default=5.0, help="Batch window micro-batching (0 = tanpa batch)")
+    server.add_argument('--max-batch', type=int, default=64)
+    server.add_argument('--workers', type=int, default=1,
+                        help="Jumlah proses worker pre-fork yang berbagi model memory-map (POSIX)")
+    server.add_argument('--load-shards', type=parse_int_list, default=None,
+                        help="Index 'sharded': hanya load shard ini, mis. 0,2")
+    server.add_argument('--verbose', action='store_true', help="Log setiap request")
+    server.set_defaults(func=cmd_serve)
+    
+    loadtest = subparsers.add_parser('loadtest', help="Load test server recognition")
+    loadtest.add_argument('images', help="Folder gambar yang dikirim bergiliran")
+    loadtest.add_argument('--url', default="http://127.0.0.1:8000", help="Server yang sudah berjalan")
+    loadtest.add_argument('--model', default=None,
+                          help="Jika diberikan, jalankan server sendiri untuk setiap --windows (sweep)")
+    loadtest.add_argument('--windows', type=parse_int_list, default=[0, 1, 2, 5, 10], help="Batch window (ms)")
+    loadtest.add_argument('--sweep-workers', type=parse_int_list, default=None,
+                          help="Dengan --model: bandingkan jumlah worker, mis. 1,2,4 (window = --windows pertama)")
+    loadtest.add_argument('--max-batch', type=int, default=64)
+    loadtest.add_argument('--requests', type=int, default=500)
+    loadtest.add_argument('--concurrency', type=int, default=16)
+    loadtest.add_argument('--threshold', '-t', type=float, default=0.8)
+    loadtest.add_argument('--max-images', type=int, default=100)
+    loadtest.set_defaults(func=cmd_loadtest)
+    
+    sweep = subparsers.add_parser('sweep', parents=[common],
+                                  help="Cross-validation target_size x n_components (satu dekomposisi per fold)")
+    sweep.add_argument('dataset', help="Folder dataset (subfolder per orang)")
+    sweep.add_argument('--sizes', type=parse_int_list, default=[32, 48, 64], help="Ukuran gambar persegi")
+    sweep.add_argument('--components', type=parse_int_list, default=[10, 20, 50, 100])
+    sweep.add_argument('--folds', type=int, default=5)
+    sweep.add_argument('--jobs', type=int, default=None, help="Jumlah fold paralel (default: jumlah CPU)")
+    sweep.add_argument('--seed', type=int, default=0)
+    sweep.add_argument('--max-accuracy-drop', type=float, default=0.01,
+                       help="Pilih setting tercepat dengan akurasi maksimal sekian di bawah yang terbaik")
+    sweep.add_argument('--output', '-o', default=None, help="File JSON hasil")
+    sweep.set_defaults(func=cmd_sweep)
+    
+    video = subparsers.add_parser('video', help="Recognition wajah pada file video (JSON Lines per frame)")
+    video.add_argument('model', help="Folder model (atau file .pkl lama)")
+    video.add_argument('video', help="File video lokal")
+    video.add_argument('--stride', type=int, default=5, help="Proses 1 dari setiap N frame")
+    video.add_argument('--threshold', '-t', type=float, default=0.8)
+    video.add_argument('--cascade', default="haarcascade_frontalface_default.xml",
+                       help="File cascade OpenCV untuk deteksi wajah")
+    video.add_argument('--no-detect', action='store_true',
+                       help="Tanpa deteksi: seluruh frame dianggap satu wajah (video sudah di-crop)")
+    video.add_argument('--batch-size', type=int, default=64, help="Jumlah crop maksimal per batch proyeksi")
+    video.add_argument('--queue-size', type=int, default=32, help="Ukuran queue antar tahap")
+    video.add_argument('--smoothing', type=int, default=5, help="Jumlah hasil match terakhir untuk voting")
+    video.add_argument('--rematch', type=int, default=3, help="Match ulang wajah yang diikuti setiap N frame")
+    video.add_argument('--output', '-o', default=None, help="File output JSON Lines (default stdout)")
+    video.add_argument('--quiet', action='store_true', help="Sembunyikan log engine")
+    video.set_defaults(func=cmd_video)
+    
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,69 @@
 import numpy as np
 import joblib
 import os
+import json
+import time
 from utils import *
+from image_cache import PreprocessedFaceCache
+from search_index import create_search_index, load_search_index
+from metrics import EngineMetrics
+from calibration import holdout_split, calibrate_distances, threshold_for_far, DEFAULT_TARGET_FARS
+
+# Format model di disk (folder berisi header JSON + array .npy)
+MODEL_FORMAT_VERSION = 1
+MODEL_HEADER_FILE = "model.json"
+MODEL_INDEX_FOLDER = "index"
+
+# Jumlah baris gallery per blok saat upcast projected_faces presisi rendah
+SEARCH_BLOCK_ROWS = 65536
+
+# Komponen tambahan yang disimpan state training streaming agar komponen ke-k tetap akurat
+STREAM_EXTRA_COMPONENTS = 10
 
 class EigenfaceEngine:
-    def __init__(self, target_size=(64, 64), n_components=50):
+    # Solver eigen yang tersedia:
+    # 'block' -> subspace (simultaneous) iteration + Rayleigh-Ritz, semua komponen sekaligus
+    # 'power' -> power iteration + deflasi, satu komponen per putaran
+    # 'randomized' -> randomized SVD langsung pada data, tanpa matriks Gram/kovarians
+    EIGEN_SOLVERS = ('block', 'power', 'randomized')
+    
+    # Mode matching saat recognition:
+    # 'samples'    -> bandingkan dengan setiap wajah training (default)
+    # 'centroid'   -> bandingkan dengan rata-rata proyeksi per orang
+    # 'prototypes' -> bandingkan dengan n_prototypes centroid k-means per orang
+    MATCH_MODES = ('samples', 'centroid', 'prototypes')
+    
+    def __init__(self, target_size=(64, 64), n_components=50, eigen_solver='block', num_workers=None,
+                 cache_dir=None, dtype=np.float32, projected_dtype=None, index_type=None, index_params=None,
+                 match_mode='samples', n_prototypes=4, variance_target=None, adaptive_iterations=False,
+                 align_faces=False, calibration_holdout=None):
+        if eigen_solver not in self.EIGEN_SOLVERS:
+            raise ValueError(f"eigen_solver harus salah satu dari {self.EIGEN_SOLVERS}")
+        if match_mode not in self.MATCH_MODES:
+            raise ValueError(f"match_mode harus salah satu dari {self.MATCH_MODES}")
+        
         self.target_size = target_size
         self.n_components = n_components
+        self.eigen_solver = eigen_solver
+        self.num_workers = num_workers
+        
+        # Deteksi + alignment wajah sebelum resize (disimpan di model agar query
+        # dipreprocess sama persis dengan gambar training)
+        self.align_faces = align_faces
+        
+        # Early stopping solver: berhenti menambah komponen setelah explained variance
+        # kumulatif mencapai variance_target (n_components menjadi batas atas), dan
+        # batas iterasi per komponen yang menyesuaikan eigengap
+        self.variance_target = variance_target
+        self.adaptive_iterations = adaptive_iterations
+        
+        # Presisi numerik training & recognition (float32 atau float64), dan
+        # presisi penyimpanan projected_faces (mis. float16 untuk hemat RAM)
+        self.dtype = np.dtype(dtype)
+        self.projected_dtype = np.dtype(projected_dtype) if projected_dtype is not None else self.dtype
+        
+        # Cache preprocess di disk (opsional) agar retraining tidak decode ulang
+        self.cache_dir = cache_dir
         self.is_trained = False
         
         # Model components
@@ -17,27 +74,79 @@ class EigenfaceEngine:
         self.face_labels = None
         self.label_names = None
         
+        # Jumlah piksel per orang (float64, satu vektor N per label) agar mean_face
+        # bisa dihitung ulang secara exact saat unenroll
+        self.label_pixel_sums = None
+        
+        # Himpunan pencarian (projected_faces atau prototype per orang) dan cache
+        # ||vektor||^2 per baris
+        self.match_mode = match_mode
+        self.n_prototypes = n_prototypes
+        self._search_vectors = None
+        self._search_labels = None
+        self._gallery_sq_norms = None
+        
+        # Search index (opsional): 'ivf' (approximate) atau 'sharded' (exact, paralel per shard),
+        # dibangun di akhir train
+        self.index_type = index_type
+        self.index_params = index_params or {}
+        self.search_index = None
+        
+        # Kalibrasi threshold (ROC + operating point) dari split held-out, dihitung
+        # otomatis setelah training jika calibration_holdout (fraksi probe) di-set
+        self.calibration_holdout = calibration_holdout
+        self.calibration = None
+        
+        # Instrumentasi: durasi per tahap, counter, iterasi/residual solver
+        self.metrics = EngineMetrics()
+        
+        # Pembatalan kooperatif: callable tanpa argumen yang dipanggil di antara
+        # tahap/iterasi panjang dan boleh melempar exception (mis. Job.check_cancelled)
+        self.cancel_check = None
+        
+    @property
+    def stage_timings(self):
+        """Durasi (detik) setiap tahap training/recognition terakhir"""
+        return self.metrics.timings
+    
+    def _check_cancelled(self):
+        if self.cancel_check is not None:
+            self.cancel_check()
+    
     def _manual_eigenvalue_decomposition(self, cov_matrix):
         print("Menghitung eigenvalues dan eigenvectors secara manual...")
         n = cov_matrix.shape[0]
         
         eigenvalues = []
         eigenvectors = []
+        iterations = []
+        residuals = []
+        
+        total_variance = float(np.trace(cov_matrix))
+        eigen_tol = max(1e-10, 10 * np.finfo(cov_matrix.dtype).eps)
         
         # Implementasi manual power iteration untuk mendapatkan eigenvalue/eigenvector
         for i in range(min(self.n_components, n)):
+            self._check_cancelled()
+            
             # Power iteration untuk eigenvalue terbesar
-            v = np.random.rand(n)
+            v = np.random.rand(n).astype(cov_matrix.dtype)
             v = v / np.linalg.norm(v)
             
-            # Deflasi untuk eigenvalue sebelumnya
-            A_deflated = cov_matrix.copy()
-            for j in range(len(eigenvalues)):
-                A_deflated = A_deflated - eigenvalues[j] * np.outer(eigenvectors[j], eigenvectors[j])
+            # Deflasi implisit untuk eigenvalue sebelumnya:
+            # (A - V diag(lambda) V^T) v dihitung tanpa menyalin matriks A
+            found_vectors = np.array(eigenvectors, dtype=cov_matrix.dtype).reshape(len(eigenvectors), n).T
+            found_values = np.array(eigenvalues, dtype=cov_matrix.dtype)
+            
+            def apply_deflated(x):
+                return cov_matrix @ x - found_vectors @ (found_values * (found_vectors.T @ x))
+            
+            max_iter = self._power_iteration_budget(eigenvalues)
             
             # Power iteration
-            for iteration in range(100):  # Max 100 iterasi
-                v_new = A_deflated @ v
+            eigenvalue_prev = None
+            for iteration in range(max_iter):
+                v_new = apply_deflated(v)
                 eigenvalue = np.dot(v, v_new)
                 
                 if np.linalg.norm(v_new) < 1e-10:
@@ -48,16 +157,276 @@ class EigenfaceEngine:
                 # Check konvergensi
                 if np.linalg.norm(v_new - v) < 1e-6:
                     break
+                
+                # Eigengap kecil: vektor konvergen lambat tapi eigenvalue sudah stabil
+                if (self.adaptive_iterations and eigenvalue_prev is not None
+                        and abs(eigenvalue - eigenvalue_prev) <= eigen_tol * abs(eigenvalue)):
+                    break
                     
                 v = v_new
+                eigenvalue_prev = eigenvalue
             
             eigenvalues.append(eigenvalue)
             eigenvectors.append(v)
+            iterations.append(iteration + 1)
+            residuals.append(float(np.linalg.norm(apply_deflated(v) - eigenvalue * v)))
             
             print(f"Eigenvalue {i+1}: {eigenvalue:.6f}")
+            
+            # Early stopping berdasarkan explained variance
+            if self.variance_target is not None and total_variance > 0:
+                if sum(eigenvalues) / total_variance >= self.variance_target:
+                    print(f"Explained variance {self.variance_target:.2%} tercapai dengan {i+1} komponen")
+                    break
         
+        if total_variance > 0:
+            self.metrics.set_value('explained_variance', (np.cumsum(eigenvalues) / total_variance).tolist())
+        self.metrics.set_value('eigen_iterations', iterations)
+        # Residual ||A v - lambda v|| relatif terhadap eigenvalue terbesar (sama dengan solver block)
+        scale = max(abs(eigenvalues[0]), 1e-12) if eigenvalues else 1.0
+        self.metrics.set_value('eigen_residuals', [r / scale for r in residuals])
         return np.array(eigenvalues), np.array(eigenvectors).T
     
+    def _power_iteration_budget(self, eigenvalues, max_iter=100, min_iter=10, tol=1e-6):
+        """
+        Batas iterasi power iteration untuk komponen berikutnya.
+        
+        Kesalahan vektor turun ~ (lambda_{i+1} / lambda_i)^t; rasio untuk komponen
+        berikutnya diestimasi dari dua eigenvalue terakhir sehingga gap besar
+        mendapat budget kecil, gap kecil dibatasi max_iter.
+        """
+        if not self.adaptive_iterations or len(eigenvalues) < 2 or eigenvalues[-2] == 0:
+            return max_iter
+        
+        ratio = abs(eigenvalues[-1] / eigenvalues[-2])
+        if not 0 < ratio < 1:
+            return max_iter
+        
+        needed = 2 * np.ceil(np.log(tol) / np.log(ratio))
+        return int(np.clip(needed, min_iter, max_iter))
+    
+    def _jacobi_eigendecomposition(self, sym_matrix, max_sweeps=50, tol=1e-12):
+        """
+        Eigendecomposition manual matriks simetris kecil dengan metode Jacobi.
+        
+        Rotasi dilakukan paralel: setiap ronde round-robin memutar p/2 pasangan
+        (p, q) yang saling lepas sekaligus, sehingga satu sweep cukup p-1 ronde
+        operasi vektor.
+        
+        Args:
+            sym_matrix (np.array): Matriks simetris (p x p)
+            max_sweeps (int): Maksimal jumlah sweep
+            tol (float): Batas relatif norm elemen off-diagonal
+        
+        Returns:
+            eigenvalues (np.array): Eigenvalues (descending)
+            eigenvectors (np.array): Eigenvectors sebagai kolom
+        """
+        H = np.array(sym_matrix, dtype=np.float64)
+        p = H.shape[0]
+        V = np.eye(p)
+        
+        if p < 2:
+            return np.diag(H).copy(), V
+        
+        # Urutan turnamen round-robin (tambah indeks dummy jika p ganjil)
+        players = list(range(p)) + ([-1] if p % 2 else [])
+        m = len(players)
+        rounds = []
+        for _ in range(m - 1):
+            pairs = [(players[i], players[m - 1 - i]) for i in range(m // 2)]
+            pairs = [(a, b) for a, b in pairs if a >= 0 and b >= 0]
+            rounds.append((np.array([a for a, _ in pairs]), np.array([b for _, b in pairs])))
+            players = [players[0]] + [players[-1]] + players[1:-1]
+        
+        scale = np.linalg.norm(H)
+        if scale == 0:
+            return np.zeros(p), V
+        
+        for sweep in range(max_sweeps):
+            off_diag = np.sqrt(max(np.sum(H * H) - np.sum(np.diag(H) ** 2), 0.0))
+            if off_diag <= tol * scale:
+                break
+            
+            for P, Q in rounds:
+                a_pq = H[P, Q]
+                active = np.abs(a_pq) > tol * scale * 1e-3
+                if not np.any(active):
+                    continue
+                P, Q, a_pq = P[active], Q[active], a_pq[active]
+                
+                # Sudut rotasi yang meng-nol-kan H[p, q]
+                tau = (H[Q, Q] - H[P, P]) / (2.0 * a_pq)
+                t = np.where(tau >= 0, 1.0, -1.0) / (np.abs(tau) + np.sqrt(1.0 + tau * tau))
+                c = 1.0 / np.sqrt(1.0 + t * t)
+                s = t * c
+                
+                # H = J^T H J, V = V J
+                H_p, H_q = H[P, :].copy(), H[Q, :].copy()
+                H[P, :] = c[:, None] * H_p - s[:, None] * H_q
+                H[Q, :] = s[:, None] * H_p + c[:, None] * H_q
+                
+                H_p, H_q = H[:, P].copy(), H[:, Q].copy()
+                H[:, P] = H_p * c - H_q * s
+                H[:, Q] = H_p * s + H_q * c
+                
+                V_p, V_q = V[:, P].copy(), V[:, Q].copy()
+                V[:, P] = V_p * c - V_q * s
+                V[:, Q] = V_p * s + V_q * c
+        
+        eigenvalues = np.diag(H).copy()
+        sorted_indices = np.argsort(eigenvalues)[::-1]
+        return eigenvalues[sorted_indices], V[:, sorted_indices]
+    
+    def _block_eigenvalue_decomposition(self, matrix, max_iter=100, tol=1e-6, n_components=None, verbose=True):
+        """
+        Subspace (block) iteration dengan Rayleigh-Ritz untuk top-k eigenpair.
+        
+        Semua komponen dicari bersamaan: setiap iterasi hanya satu perkalian
+        matriks-matriks (A @ Q), ortogonalisasi QR, lalu Rayleigh-Ritz pada
+        matriks proyeksi kecil (p x p) yang didekomposisi dengan Jacobi.
+        Tidak ada matriks deflasi yang dibentuk ulang.
+        
+        Args:
+            matrix (np.array): Matriks simetris (n x n)
+            max_iter (int): Maksimal jumlah iterasi
+            tol (float): Batas relatif residual ||A q - lambda q||
+            n_components (int): Jumlah komponen (default self.n_components); jika
+                diberikan, variance_target dan metrics solver tidak dipakai
+            verbose (bool): Cetak log progress
+        
+        Returns:
+            eigenvalues (np.array): Top-k eigenvalues (descending)
+            eigenvectors (np.array): Eigenvectors sebagai kolom (n x k)
+        """
+        if verbose:
+            print("Menghitung eigenvalues dan eigenvectors (block subspace iteration)...")
+        n = matrix.shape[0]
+        internal = n_components is not None
+        k = min(n_components if internal else self.n_components, n)
+        
+        # Vektor tambahan (guard vectors) mempercepat konvergensi komponen ke-k
+        p = min(n, k + max(10, k // 5))
+        
+        # Toleransi tidak boleh di bawah presisi dtype matriks (mis. float32)
+        dtype = matrix.dtype
+        tol = max(tol, 100 * np.finfo(dtype).eps)
+        
+        total_variance = float(np.trace(matrix))
+        eigen_tol = max(1e-10, 10 * np.finfo(dtype).eps)
+        
+        Q, _ = np.linalg.qr((np.random.rand(n, p) - 0.5).astype(dtype))
+        W = matrix @ Q
+        
+        theta_prev = None
+        converged_at = np.zeros(k, dtype=int)
+        for iteration in range(max_iter):
+            self._check_cancelled()
+            
+            # Rayleigh-Ritz: H = Q^T A Q
+            H = Q.T @ W
+            H = (H + H.T) / 2
+            theta, S = self._jacobi_eigendecomposition(H)
+            S = S.astype(dtype)
+            Q = Q @ S
+            W = W @ S
+            
+            # Early stopping: cukup komponen yang dibutuhkan untuk variance_target
+            if not internal and self.variance_target is not None and total_variance > 0:
+                cumulative = np.cumsum(theta[:k]) / total_variance
+                k = min(k, int(np.searchsorted(cumulative, self.variance_target)) + 1)
+            
+            # Residual untuk k komponen teratas
+            residual = np.linalg.norm(W[:, :k] - Q[:, :k] * theta[:k], axis=0)
+            scale = max(abs(theta[0]), 1e-12)
+            converged = residual <= tol * scale
+            
+            # Eigengap kecil: komponen dianggap selesai jika eigenvalue sudah stabil
+            if self.adaptive_iterations and theta_prev is not None:
+                converged |= np.abs(theta[:k] - theta_prev[:k]) <= eigen_tol * scale
+            theta_prev = theta
+            
+            newly_converged = converged & (converged_at[:k] == 0)
+            converged_at[:k][newly_converged] = iteration + 1
+            if np.all(converged):
+                break
+            
+            # Iterasi subspace: Q <- orth(A Q)
+            Q, _ = np.linalg.qr(W)
+            W = matrix @ Q
+        
+        converged_at = converged_at[:k]
+        converged_at[converged_at == 0] = iteration + 1
+        
+        if not internal:
+            self.metrics.set_value('eigen_iterations', converged_at.tolist())
+            self.metrics.set_value('eigen_residuals', (residual / scale).tolist())
+            if total_variance > 0:
+                self.metrics.set_value('explained_variance', (np.cumsum(theta[:k]) / total_variance).tolist())
+        if verbose:
+            print(f"Block iteration selesai dalam {iteration + 1} iterasi")
+            for i in range(k):
+                print(f"Eigenvalue {i+1}: {theta[i]:.6f}")
+        
+        return theta[:k].astype(dtype), Q[:, :k]
+    
+    def _randomized_eigendecomposition(self, X, oversample=10, n_power_iter=4):
+        """
+        Randomized SVD (range finder + power iteration) langsung pada data.
+        
+        Matriks Gram (M x M) maupun kovarians (N x N) tidak pernah dibentuk:
+        hanya perkalian X @ (N x l) dan X^T @ (M x l) dengan l = k + oversample,
+        ortogonalisasi QR, lalu SVD matriks kecil B = Q^T X lewat Jacobi pada B B^T.
+        
+        Args:
+            X (np.array): Data mean-centered (M x N)
+            oversample (int): Kolom tambahan untuk range finder
+            n_power_iter (int): Jumlah power iteration (mempertajam spektrum)
+        
+        Returns:
+            eigenvalues (np.array): Top-k eigenvalues scatter X^T X (descending)
+            eigenvectors (np.array): Eigenfaces sebagai kolom (N x k)
+        """
+        print("Menghitung eigenfaces dengan randomized SVD...")
+        M, N = X.shape
+        k = min(self.n_components, M, N)
+        l = min(k + oversample, M, N)
+        dtype = X.dtype
+        
+        # Range finder: Y = X Omega, dipertajam dengan (X X^T)^q
+        omega = (np.random.rand(N, l) - 0.5).astype(dtype)
+        Q, _ = np.linalg.qr(X @ omega)
+        for _ in range(n_power_iter):
+            Z, _ = np.linalg.qr(X.T @ Q)
+            Q, _ = np.linalg.qr(X @ Z)
+        
+        # B = Q^T X (l x N); B B^T = U diag(s^2) U^T -> V = B^T U / s
+        B = Q.T @ X
+        sigma_sq, U = self._jacobi_eigendecomposition(B @ B.T)
+        sigma_sq = np.maximum(sigma_sq, 0)
+        
+        total_variance = float(np.einsum('ij,ij->', X, X, dtype=np.float64))
+        if self.variance_target is not None and total_variance > 0:
+            cumulative = np.cumsum(sigma_sq[:k]) / total_variance
+            k = min(k, int(np.searchsorted(cumulative, self.variance_target)) + 1)
+        if total_variance > 0:
+            self.metrics.set_value('explained_variance', (np.cumsum(sigma_sq[:k]) / total_variance).tolist())
+        
+        sigma = np.sqrt(sigma_sq[:k])
+        eigenvectors = B.T @ U[:, :k].astype(dtype)
+        eigenvectors /= np.where(sigma > 0, sigma, 1).astype(dtype)
+        
+        for i in range(k):
+            print(f"Eigenvalue {i+1}: {sigma_sq[i]:.6f}")
+        
+        return sigma_sq[:k].astype(dtype), eigenvectors
+    
+    def _eigendecomposition(self, matrix):
+        # Solver 'randomized' bekerja pada data; untuk matriks simetris pakai block
+        if self.eigen_solver == 'power':
+            return self._manual_eigenvalue_decomposition(matrix)
+        return self._block_eigenvalue_decomposition(matrix)
+    
     def _alternative_eigendecomposition(self, A):
         print("Menggunakan trick Turk & Pentland untuk efisiensi...")
         
@@ -65,7 +434,7 @@ class EigenfaceEngine:
         L = A.T @ A
         
         # Manual eigendecomposition untuk matriks L yang lebih kecil
-        eigenvals_L, eigenvecs_L = self._manual_eigenvalue_decomposition(L)
+        eigenvals_L, eigenvecs_L = self._eigendecomposition(L)
         
         # Mapping kembali ke ruang asli: eigenvectors_original = A * eigenvecs_L
         eigenvectors_original = A @ eigenvecs_L
@@ -83,6 +452,227 @@ class EigenfaceEngine:
         
         return eigenvalues, eigenvectors
     
+    def _build_prototypes(self, projected_faces=None, face_labels=None):
+        """
+        Hitung prototype per orang dari projected_faces: satu centroid ('centroid')
+        atau hingga n_prototypes centroid k-means ('prototypes')
+        
+        Args:
+            projected_faces (np.array): Proyeksi sumber (default: self.projected_faces)
+            face_labels (np.array): Label sumber (default: self.face_labels)
+        
+        Returns:
+            prototypes (np.array): Matriks prototype (P' x n_components)
+            prototype_labels (np.array): Label untuk setiap prototype
+        """
+        n_clusters = 1 if self.match_mode == 'centroid' else self.n_prototypes
+        if projected_faces is None:
+            projected_faces, face_labels = self.projected_faces, self.face_labels
+        
+        # Kelompokkan baris per label sekali saja
+        order = np.argsort(face_labels, kind='stable')
+        counts = np.bincount(face_labels, minlength=len(self.label_names))
+        groups = np.split(order, np.cumsum(counts)[:-1])
+        
+        prototypes = []
+        prototype_labels = []
+        for label, rows in enumerate(groups):
+            if len(rows) == 0:
+                continue
+            faces = projected_faces[rows].astype(self.dtype)
+            if n_clusters == 1 or len(rows) <= n_clusters:
+                centers = faces.mean(axis=0, keepdims=True) if n_clusters == 1 else faces
+            else:
+                centers = kmeans(faces, n_clusters)
+            prototypes.append(centers)
+            prototype_labels.append(np.full(len(centers), label))
+        
+        return np.vstack(prototypes), np.concatenate(prototype_labels)
+    
+    def _sum_per_label(self, vectors, labels, n_labels):
+        """Jumlah vektor (float64) per label, baris dikelompokkan dengan satu sort"""
+        labels = np.asarray(labels)
+        order = np.argsort(labels, kind='stable')
+        counts = np.bincount(labels, minlength=n_labels)
+        sums = np.zeros((n_labels, vectors.shape[1]), dtype=np.float64)
+        for label, rows in enumerate(np.split(order, np.cumsum(counts)[:-1])):
+            if len(rows):
+                sums[label] = vectors[rows].sum(axis=0, dtype=np.float64)
+        return sums
+    
+    def _build_search_cache(self):
+        """Hitung ulang himpunan pencarian dan cache squared norm untuk pencarian vektorisasi"""
+        if self.match_mode == 'samples':
+            self._search_vectors = self.projected_faces
+            self._search_labels = self.face_labels
+        else:
+            self._search_vectors, self._search_labels = self._build_prototypes()
+        
+        self._gallery_sq_norms = np.einsum('ij,ij->i', self._search_vectors, self._search_vectors,
+                                           dtype=self.dtype)
+    
+    def _build_search_index(self):
+        """Bangun ulang search index jika index_type di-set"""
+        if self.index_type is None:
+            self.search_index = None
+            return
+        
+        print(f"Membangun search index '{self.index_type}'...")
+        self.search_index = create_search_index(self.index_type, **self.index_params)
+        self.search_index.build(self._search_vectors, self._search_labels)
+    
+    def rebuild_search_index(self):
+        """Bangun ulang search index penuh (mis. setelah banyak enroll/unenroll incremental)"""
+        if not self.is_trained:
+            raise ValueError("Model belum di-training")
+        self._check_full_index()
+        if self._search_vectors is None:
+            self._build_search_cache()
+        self._build_search_index()
+    
+    def _update_search_index(self, shift, removed=None, n_added=0, rebuild=False):
+        """
+        Sesuaikan himpunan pencarian dan search index setelah enroll/unenroll
+        
+        Pada mode 'samples' index di-update incremental: baris yang dihapus
+        dibuang dari list/shard, semua vektor digeser sebesar pergeseran
+        proyeksi akibat perubahan mean, dan baris baru dimasukkan ke list
+        centroid terdekat / shard orangnya. Index dibangun ulang jika rebuild
+        (basis eigenfaces berubah), pada mode prototype (himpunan pencarian
+        kecil dan dihitung ulang), atau jika perubahan sejak build terakhir
+        melewati REBUILD_CHANGE_RATIO.
+        
+        Args:
+            shift (np.array): Pergeseran proyeksi semua baris lama (n_components,)
+            removed (np.array): Mask boolean baris lama yang dihapus
+            n_added (int): Jumlah baris baru di akhir projected_faces
+            rebuild (bool): Paksa build ulang index
+        """
+        self._build_search_cache()
+        if self.search_index is None:
+            return
+        if rebuild or self.match_mode != 'samples':
+            self._build_search_index()
+            return
+        
+        if removed is not None:
+            self.search_index.remove(removed, self._search_labels)
+        self.search_index.translate(shift.astype(self.dtype, copy=False))
+        if n_added:
+            self.search_index.add(self._search_vectors[-n_added:], self._search_labels[-n_added:])
+        
+        if self.search_index.needs_rebuild():
+            self._build_search_index()
+    
+    def _check_full_index(self):
+        """Tolak operasi yang membangun ulang himpunan pencarian jika hanya sebagian shard di-load"""
+        if getattr(self.search_index, 'is_partial', False):
+            raise ValueError("Hanya sebagian shard yang di-load; load ulang model tanpa shards untuk operasi ini")
+    
+    def set_match_mode(self, match_mode, n_prototypes=None):
+        """
+        Ganti mode matching model yang sudah di-training/di-load
+        
+        Himpunan pencarian, search index dan kalibrasi (jika ada) dibangun ulang
+        karena semuanya bergantung pada mode matching.
+        
+        Args:
+            match_mode (str): 'samples', 'centroid' atau 'prototypes'
+            n_prototypes (int): Jumlah prototype per orang (default: tidak berubah)
+        """
+        if match_mode not in self.MATCH_MODES:
+            raise ValueError(f"match_mode harus salah satu dari {self.MATCH_MODES}")
+        n_prototypes = n_prototypes or self.n_prototypes
+        if match_mode == self.match_mode and n_prototypes == self.n_prototypes:
+            return
+        self._check_full_index()
+        
+        self.match_mode = match_mode
+        self.n_prototypes = n_prototypes
+        if not self.is_trained:
+            return
+        self._build_search_cache()
+        self._build_search_index()
+        if self.calibration is not None:
+            self._auto_calibrate()
+    
+    def _nearest_neighbors(self, query_projections, k=5, exact=False):
+        """
+        Cari k wajah training terdekat untuk setiap proyeksi query
+        
+        Args:
+            query_projections (np.array): Proyeksi query (Q x n_components)
+            k (int): Jumlah tetangga terdekat
+            exact (bool): Abaikan search index approximate dan lakukan pencarian brute-force
+                (index exact seperti 'sharded' tetap dipakai)
+        
+        Returns:
+            indices (np.array): Indeks himpunan pencarian (Q x k), terdekat dulu
+            distances (np.array): Euclidean distance (Q x k)
+        """
+        if self._search_labels is None:
+            self._build_search_cache()
+        
+        query_projections = query_projections.astype(self.dtype, copy=False)
+        k = min(k, len(self._search_labels))
+        
+        if self.search_index is not None and (not exact or self.search_index.EXACT):
+            indices, sq_distances = self.search_index.search(query_projections, k)
+            
+            # Query yang kandidatnya kurang dari k jatuh ke pencarian exact
+            incomplete = np.any(indices < 0, axis=1)
+            if incomplete.any() and not self.search_index.EXACT:
+                indices[incomplete], sq_distances[incomplete] = self._nearest_neighbors(
+                    query_projections[incomplete], k, exact=True)
+                sq_distances[incomplete] **= 2
+            return indices, np.sqrt(sq_distances)
+        
+        gallery = self._search_vectors
+        if gallery.dtype == self.dtype:
+            sq_distances = squared_euclidean_distances(query_projections, gallery, self._gallery_sq_norms)
+        else:
+            # Gallery disimpan dengan presisi lebih rendah (mis. float16): upcast per blok
+            # agar perkalian matriks tetap memakai BLAS
+            sq_distances = np.empty((len(query_projections), len(gallery)), dtype=self.dtype)
+            for b in range(0, len(gallery), SEARCH_BLOCK_ROWS):
+                block = gallery[b:b + SEARCH_BLOCK_ROWS].astype(self.dtype)
+                sq_distances[:, b:b + SEARCH_BLOCK_ROWS] = squared_euclidean_distances(
+                    query_projections, block, self._gallery_sq_norms[b:b + SEARCH_BLOCK_ROWS])
+        indices = top_k_smallest(sq_distances, k)
+        distances = np.sqrt(np.take_along_axis(sq_distances, indices, axis=1))
+        return indices, distances
+    
+    def _build_result(self, indices, distances, threshold):
+        """Susun dict hasil recognition dari indeks dan jarak tetangga terdekat"""
+        matches = []
+        for idx, distance in zip(indices, distances):
+            label = self._search_labels[idx]
+            matches.append({
+                'distance': float(distance),
+                'label': label,
+                'name': self.label_names[label]
+            })
+        
+        # Ambil hasil terdekat
+        best_match = matches[0]
+        
+        # Cek threshold
+        if best_match['distance'] < threshold:
+            recognized = True
+            message = f"Wajah dikenali sebagai: {best_match['name']}"
+        else:
+            recognized = False
+            message = "Wajah tidak dikenali dalam database"
+        
+        return {
+            "recognized": recognized,
+            "person": best_match['name'] if recognized else "Unknown",
+            "distance": best_match['distance'],
+            "message": message,
+            "all_distances": matches,  # Top-k hasil
+            "threshold_used": threshold
+        }
+    
     def train(self, dataset_folder):
         try:
             print("Memulai training Eigenface model...")
@@ -95,12 +685,54 @@ class EigenfaceEngine:
             
             # Load images dari dataset
             print("Loading dataset...")
-            images, labels, label_names = load_images_from_folder(dataset_folder, self.target_size)
+            t0 = time.perf_counter()
+            cache = (PreprocessedFaceCache(self.cache_dir, self.target_size, self.align_faces)
+                     if self.cache_dir else None)
+            load_stats = {}
+            images, labels, label_names = load_images_from_folder(dataset_folder, self.target_size,
+                                                                 num_workers=self.num_workers,
+                                                                 cache=cache, stats=load_stats,
+                                                                 align_faces=self.align_faces)
+            decode_time = time.perf_counter() - t0
+            
+            self.metrics.increment('images_loaded', load_stats['loaded'])
+            self.metrics.increment('decode_failures', load_stats['failed'])
+            if cache is not None:
+                self.metrics.increment('cache_hits', cache.hits)
+                self.metrics.increment('cache_misses', cache.misses)
             
             if len(images) == 0:
                 print("Error: Tidak ada gambar yang berhasil di-load")
                 return False
             
+            # Buffer images milik train, jadi boleh di-mean-center langsung
+            success = self.fit(images, labels, label_names, overwrite_input=True)
+            self.metrics.record_timing('decode', decode_time)
+            self.metrics.record_timing('total', self.stage_timings.get('total', 0.0) + decode_time)
+            return success
+            
+        except Exception as e:
+            print(f"Error during training: {str(e)}")
+            return False
+    
+    def fit(self, images, labels, label_names, overwrite_input=False):
+        """
+        Training dari gambar yang sudah di-load (tanpa membaca folder)
+        
+        Args:
+            images (np.array): Array gambar (M, h, w) hasil preprocess
+            labels (np.array): Label untuk setiap gambar
+            label_names (list): List nama unik labels
+            overwrite_input (bool): Boleh mean-centering langsung di buffer images
+                (tanpa copy) jika dtype sudah sama; isi images akan berubah
+        
+        Returns:
+            bool: True jika berhasil
+        """
+        try:
+            self.metrics.reset_timings()
+            start = time.perf_counter()
+            
             self.label_names = label_names
             self.face_labels = labels
             
@@ -109,49 +741,69 @@ class EigenfaceEngine:
             
             # Langkah 1: Konversi gambar ke vektor dan normalize
             print("Langkah 1: Konversi gambar ke vektor...")
-            face_vectors = []
-            for img in images:
-                face_vectors.append(img.flatten())
-            face_vectors = np.array(face_vectors)
+            with self.metrics.timer('vectorize'):
+                # (M, h, w) contiguous -> (M, N) berupa view; copy hanya jika dtype
+                # berbeda, buffer read-only (mis. memory-map cache) atau milik pemanggil
+                face_vectors = np.asarray(images).reshape(len(images), -1)
+                owned = overwrite_input or not np.may_share_memory(face_vectors, images)
+                if face_vectors.dtype != self.dtype or not owned or not face_vectors.flags.writeable:
+                    face_vectors = face_vectors.astype(self.dtype)
             
             print(f"Shape face vectors: {face_vectors.shape}")
             
-            # Langkah 2: Hitung rata-rata wajah (mean face)
-            print("Langkah 2: Menghitung mean face...")
-            self.mean_face = np.mean(face_vectors, axis=0)
+            with self.metrics.timer('mean'):
+                # Langkah 2: Hitung rata-rata wajah (mean face)
+                print("Langkah 2: Menghitung mean face...")
+                self.mean_face = np.mean(face_vectors, axis=0, dtype=self.dtype)
+                self.label_pixel_sums = self._sum_per_label(face_vectors, labels, len(label_names))
+                
+                # Langkah 3: Kurangi mean face dari setiap gambar (in-place)
+                print("Langkah 3: Mean centering...")
+                face_vectors -= self.mean_face
+                mean_centered_faces = face_vectors
             
-            # Langkah 3: Kurangi mean face dari setiap gambar
-            print("Langkah 3: Mean centering...")
-            mean_centered_faces = face_vectors - self.mean_face
+            self._check_cancelled()
             
             # Langkah 4: Hitung eigenvalue dan eigenvector secara manual
             print("Langkah 4: Menghitung eigenvalues dan eigenvectors...")
-            
-            # Pilih metode berdasarkan ukuran data
-            M, N = mean_centered_faces.shape  # M = jumlah gambar, N = dimensi pixel
-            
-            if M < N:
-                # Gunakan trick Turk & Pentland
-                eigenvalues, eigenvectors = self._alternative_eigendecomposition(mean_centered_faces.T)
-            else:
-                # Metode konvensional
-                cov_matrix = np.cov(mean_centered_faces.T)
-                eigenvalues, eigenvectors = self._manual_eigenvalue_decomposition(cov_matrix)
-            
-            # Ambil top-k eigenfaces
-            self.eigenvalues = eigenvalues[:self.n_components]
-            self.eigenfaces = eigenvectors[:, :self.n_components]
+            with self.metrics.timer('eigensolve'):
+                # Pilih metode berdasarkan ukuran data
+                M, N = mean_centered_faces.shape  # M = jumlah gambar, N = dimensi pixel
+                
+                if self.eigen_solver == 'randomized':
+                    # Randomized SVD langsung pada data, tanpa matriks Gram/kovarians
+                    eigenvalues, eigenvectors = self._randomized_eigendecomposition(mean_centered_faces)
+                elif M < N:
+                    # Gunakan trick Turk & Pentland
+                    eigenvalues, eigenvectors = self._alternative_eigendecomposition(mean_centered_faces.T)
+                else:
+                    # Metode konvensional (np.cov selalu float64, jadi dihitung manual)
+                    cov_matrix = mean_centered_faces.T @ mean_centered_faces
+                    cov_matrix /= max(M - 1, 1)
+                    eigenvalues, eigenvectors = self._eigendecomposition(cov_matrix)
+                
+                # Ambil top-k eigenfaces
+                self.eigenvalues = eigenvalues[:self.n_components]
+                self.eigenfaces = eigenvectors[:, :self.n_components]
             
             print(f"Eigenfaces shape: {self.eigenfaces.shape}")
             
+            self._check_cancelled()
+            
             # Langkah 5: Proyeksikan semua wajah training ke eigenface space
             print("Langkah 5: Proyeksi wajah ke eigenspace...")
-            self.projected_faces = mean_centered_faces @ self.eigenfaces
+            with self.metrics.timer('projection'):
+                self.projected_faces = (mean_centered_faces @ self.eigenfaces).astype(self.projected_dtype, copy=False)
             
             print(f"Projected faces shape: {self.projected_faces.shape}")
+            with self.metrics.timer('search_index'):
+                self._build_search_cache()
+                self._build_search_index()
+            self.metrics.record_timing('total', time.perf_counter() - start)
             
             # Set flag training selesai
             self.is_trained = True
+            self._auto_calibrate()
             
             print("Training selesai!")
             return True
@@ -160,78 +812,646 @@ class EigenfaceEngine:
             print(f"Error during training: {str(e)}")
             return False
     
-    def recognize(self, test_image_path, threshold=0.8):
+    def train_streaming(self, dataset_folder, batch_size=512):
+        """
+        Training out-of-core: gambar dibaca per batch sehingga memori puncak
+        dibatasi batch_size, bukan jumlah gambar di dataset
+        
+        Args:
+            dataset_folder (str): Path ke folder dataset
+            batch_size (int): Jumlah gambar per batch
+        
+        Returns:
+            bool: True jika berhasil
+        """
+        try:
+            print("Memulai training Eigenface model (streaming)...")
+            
+            is_valid, error_msg = validate_dataset_folder(dataset_folder)
+            if not is_valid:
+                print(f"Error: {error_msg}")
+                return False
+            
+            # Cache preprocess tidak dipakai: setiap batch akan menulis ulang file cache
+            image_paths, labels, label_names = list_dataset_images(dataset_folder)
+            
+            def make_batches():
+                return iter_image_batches(image_paths, labels, batch_size, self.target_size, self.num_workers,
+                                          self.align_faces)
+            
+            return self.fit_stream(make_batches, label_names)
+            
+        except Exception as e:
+            print(f"Error during training: {str(e)}")
+            return False
+    
+    def _merge_stream_state(self, factor, n_seen, mean, batch):
+        """
+        Gabungkan satu batch ke state incremental PCA (sequential Karhunen-Loeve)
+        
+        State berupa faktor low-rank scatter S ~ F F^T (N x r, r = n_components
+        + STREAM_EXTRA_COMPONENTS) dan mean. Faktor gabungan Z = [F, batch
+        mean-centered, koreksi mean] didekomposisi lewat matriks Gram kecil Z^T Z.
+        
+        Returns:
+            factor (np.array), n_seen (int), mean (np.array float64), batch_energy (float)
+        """
+        n_new = batch.shape[0]
+        batch_mean = batch.mean(axis=0, dtype=np.float64)
+        centered = batch - batch_mean.astype(self.dtype)
+        batch_energy = float(np.einsum('ij,ij->', centered, centered, dtype=np.float64))
+        
+        if factor is None:
+            Z = centered.T
+        else:
+            mean_factor = np.sqrt(n_seen * n_new / (n_seen + n_new)) * (mean - batch_mean)
+            batch_energy += float(mean_factor @ mean_factor)
+            Z = np.hstack([factor, centered.T, mean_factor[:, None].astype(self.dtype)])
+        
+        mean = (n_seen * mean + n_new * batch_mean) / (n_seen + n_new) if factor is not None else batch_mean
+        
+        # Z Z^T = E diag(s^2) E^T, dengan Z^T Z = V diag(s^2) V^T -> E s = Z V
+        rank = min(self.n_components + STREAM_EXTRA_COMPONENTS, *Z.shape)
+        sigma_sq, V = self._block_eigenvalue_decomposition(Z.T @ Z, n_components=rank, verbose=False)
+        factor = Z @ V
+        return factor, n_seen + n_new, mean, batch_energy
+    
+    def fit_stream(self, make_batches, label_names):
+        """
+        Training streaming dari generator batch gambar (dua kali baca data)
+        
+        Pass 1 menghitung mean dan eigenfaces incremental per batch, pass 2
+        memproyeksikan setiap batch ke eigenspace. Hanya satu batch, state
+        (N x r) dan projected_faces (M x k) yang ada di memori.
+        
+        Args:
+            make_batches (callable): Fungsi tanpa argumen yang mengembalikan
+                iterator baru berisi (images (b, h, w), labels) untuk setiap pass
+            label_names (list): List nama unik labels
+        
+        Returns:
+            bool: True jika berhasil
+        """
+        try:
+            self.metrics.reset_timings()
+            start = time.perf_counter()
+            
+            # Pass 1: mean + state incremental PCA
+            print("Pass 1: Menghitung mean face dan eigenfaces per batch...")
+            factor, n_seen, mean, total_variance = None, 0, None, 0.0
+            with self.metrics.timer('stream_basis'):
+                for images, _ in make_batches():
+                    self._check_cancelled()
+                    if len(images) == 0:
+                        continue
+                    batch = images.reshape(len(images), -1).astype(self.dtype, copy=False)
+                    factor, n_seen, mean, batch_energy = self._merge_stream_state(factor, n_seen, mean, batch)
+                    total_variance += batch_energy
+                    print(f"  {n_seen} gambar diproses")
+            
+            if n_seen == 0:
+                print("Error: Tidak ada gambar yang berhasil di-load")
+                return False
+            self.metrics.increment('images_loaded', n_seen)
+            print_training_info(n_seen, len(label_names), self.target_size, self.n_components)
+            
+            sigma = np.linalg.norm(factor, axis=0)
+            eigenvalues = (sigma.astype(np.float64) ** 2)
+            k = min(self.n_components, len(sigma))
+            if self.variance_target is not None and total_variance > 0:
+                cumulative = np.cumsum(eigenvalues[:k]) / total_variance
+                k = min(k, int(np.searchsorted(cumulative, self.variance_target)) + 1)
+            if total_variance > 0:
+                self.metrics.set_value('explained_variance', (np.cumsum(eigenvalues[:k]) / total_variance).tolist())
+            
+            self.mean_face = mean.astype(self.dtype)
+            self.eigenvalues = eigenvalues[:k].astype(self.dtype)
+            self.eigenfaces = (factor[:, :k] / np.where(sigma[:k] > 0, sigma[:k], 1)).astype(self.dtype, copy=False)
+            print(f"Eigenfaces shape: {self.eigenfaces.shape}")
+            
+            # Pass 2: proyeksi per batch
+            print("Pass 2: Proyeksi wajah ke eigenspace...")
+            projected, face_labels = [], []
+            label_pixel_sums = np.zeros((len(label_names), self.mean_face.shape[0]), dtype=np.float64)
+            with self.metrics.timer('projection'):
+                for images, labels in make_batches():
+                    self._check_cancelled()
+                    batch = images.reshape(len(images), -1).astype(self.dtype, copy=False)
+                    label_pixel_sums += self._sum_per_label(batch, labels, len(label_names))
+                    projected.append(((batch - self.mean_face) @ self.eigenfaces).astype(self.projected_dtype, copy=False))
+                    face_labels.append(labels)
+            
+            self.label_names = label_names
+            self.face_labels = np.concatenate(face_labels)
+            self.projected_faces = np.concatenate(projected)
+            self.label_pixel_sums = label_pixel_sums
+            
+            print(f"Projected faces shape: {self.projected_faces.shape}")
+            with self.metrics.timer('search_index'):
+                self._build_search_cache()
+                self._build_search_index()
+            self.metrics.record_timing('total', time.perf_counter() - start)
+            
+            self.is_trained = True
+            self._auto_calibrate()
+            print("Training selesai!")
+            return True
+            
+        except Exception as e:
+            print(f"Error during training: {str(e)}")
+            return False
+    
+    def calibrate(self, holdout_fraction=0.2, seed=0, max_probes=2000, target_fars=DEFAULT_TARGET_FARS):
+        """
+        Kalibrasi threshold dari split held-out tanpa training ulang
+        
+        Sebagian wajah setiap orang (holdout_fraction) dijadikan probe dan
+        dikeluarkan dari gallery; jarak setiap probe ke wajah terdekat setiap
+        orang dihitung per blok (GEMM), menghasilkan distribusi genuine (orang
+        yang sama) dan impostor (orang lain). Basis eigenfaces tidak dilatih
+        ulang (PCA tidak memakai label), sehingga biayanya hanya pencarian jarak.
+        Hasil (ROC, tabel operating point, EER) disimpan di self.calibration
+        dan ikut disimpan di model.
+        
+        Args:
+            holdout_fraction (float): Fraksi wajah per orang yang dijadikan probe
+            seed (int): Seed split
+            max_probes (int): Batas jumlah probe (sampel acak) agar tetap murah di gallery besar
+            target_fars (tuple): Target false accept rate untuk tabel operating point
+        
+        Returns:
+            dict: self.calibration
+        """
+        if not self.is_trained:
+            raise ValueError("Model belum di-training")
+        
+        labels = np.asarray(self.face_labels, dtype=np.int64)
+        holdout = holdout_split(labels, holdout_fraction, seed)
+        probe_rows = np.flatnonzero(holdout)
+        if max_probes and len(probe_rows) > max_probes:
+            probe_rows = np.sort(np.random.default_rng(seed).choice(probe_rows, max_probes, replace=False))
+        
+        # Gallery kalibrasi memakai mode matching yang sama dengan recognition
+        gallery, gallery_labels = self.projected_faces[~holdout], labels[~holdout]
+        if self.match_mode != 'samples':
+            gallery, gallery_labels = self._build_prototypes(gallery, gallery_labels)
+        
+        calibration = calibrate_distances(self.projected_faces[probe_rows].astype(self.dtype),
+                                          labels[probe_rows], np.asarray(gallery, dtype=self.dtype),
+                                          np.asarray(gallery_labels, dtype=np.int64), len(self.label_names),
+                                          target_fars)
+        calibration.update({'holdout_fraction': holdout_fraction, 'seed': seed, 'max_probes': max_probes,
+                            'match_mode': self.match_mode, 'n_prototypes': self.n_prototypes})
+        self.calibration = calibration
+        
+        print(f"Kalibrasi: {calibration['n_genuine']} genuine, {calibration['n_impostor']} impostor, "
+              f"EER {calibration['eer']:.2%} (threshold {calibration['eer_threshold']:.4f})")
+        for point in calibration['operating_points']:
+            print(f"   FAR {point['far']:g}: threshold {point['threshold']:.4f}, TAR {point['tar']:.2%}")
+        return calibration
+    
+    def _auto_calibrate(self):
+        """Kalibrasi setelah training / perubahan gallery jika diminta; gagal kalibrasi tidak menggagalkan training"""
+        previous = self.calibration
+        self.calibration = None
+        if previous is not None:
+            params = {name: previous[name] for name in ('holdout_fraction', 'seed', 'max_probes')}
+        elif self.calibration_holdout:
+            params = {'holdout_fraction': self.calibration_holdout}
+        else:
+            return
+        
+        try:
+            with self.metrics.timer('calibration'):
+                self.calibrate(**params)
+        except ValueError as e:
+            print(f"Kalibrasi dilewati: {e}")
+    
+    def threshold_for_far(self, target_far):
+        """
+        Threshold distance untuk target false accept rate dari ROC hasil kalibrasi
+        
+        Args:
+            target_far (float): Target FAR (0-1), mis. 0.01
+        
+        Returns:
+            float: Threshold terbesar dengan FAR <= target_far
+        """
+        if self.calibration is None:
+            raise ValueError("Model belum dikalibrasi (train dengan calibration_holdout atau panggil calibrate)")
+        # Distribusi jarak (dan threshold) hanya berlaku untuk mode matching saat kalibrasi
+        calibrated_mode = self.calibration.get('match_mode')
+        calibrated_prototypes = self.calibration.get('n_prototypes', self.n_prototypes)
+        if calibrated_mode != self.match_mode or (self.match_mode == 'prototypes'
+                                                 and calibrated_prototypes != self.n_prototypes):
+            raise ValueError(f"Kalibrasi dibuat untuk match_mode '{calibrated_mode}', bukan '{self.match_mode}' "
+                             f"(panggil calibrate ulang)")
+        return threshold_for_far(self.calibration['roc'], target_far)
+    
+    def recognize(self, test_image_path, threshold=0.8, exact=False, target_far=None):
+        """
+        Recognition satu gambar
+        
+        Args:
+            threshold (float): Batas distance untuk dikenali
+            target_far (float): Jika diberikan, threshold diambil dari kalibrasi untuk FAR ini
+        """
         if not self.is_trained:
             return {"status": "error", "message": "Model belum di-training"}
         
         try:
+            if target_far is not None:
+                threshold = self.threshold_for_far(target_far)
+            self.metrics.increment('queries')
+            
             # Preprocess gambar test
-            test_face = preprocess_single_image(test_image_path, self.target_size)
+            with self.metrics.timer('query_preprocess'):
+                test_face = preprocess_single_image(test_image_path, self.target_size, self.align_faces)
             if test_face is None:
+                self.metrics.increment('query_failures')
                 return {"status": "error", "message": "Gagal memproses gambar test"}
             
-            # Mean centering
-            test_face_centered = test_face - self.mean_face
+            with self.metrics.timer('query_projection'):
+                # Mean centering
+                test_face_centered = test_face.astype(self.dtype, copy=False) - self.mean_face
+                
+                # Proyeksi ke eigenspace
+                test_projection = test_face_centered @ self.eigenfaces
+            
+            # Hitung jarak euclidean ke semua wajah training sekaligus, ambil top 5
+            with self.metrics.timer('query_search'):
+                indices, distances = self._nearest_neighbors(test_projection[None, :], k=5, exact=exact)
+            
+            return self._build_result(indices[0], distances[0], threshold)
             
-            # Proyeksi ke eigenspace
-            test_projection = test_face_centered @ self.eigenfaces
+        except Exception as e:
+            return {"status": "error", "message": f"Error during recognition: {str(e)}"}
+    
+    def recognize_many(self, paths, threshold=0.8, k=5, batch_size=256, exact=False, target_far=None):
+        """
+        Recognition banyak gambar sekaligus: semua probe dipreprocess ke satu
+        matriks, diproyeksikan dengan satu perkalian matriks, lalu dicari top-k
+        per batch.
+        
+        Args:
+            paths (list/str): List path gambar atau path folder berisi gambar
+            threshold (float): Batas distance untuk dikenali
+            k (int): Jumlah hasil terdekat per gambar
+            batch_size (int): Jumlah probe per batch pencarian jarak
+            exact (bool): Abaikan search index dan lakukan pencarian brute-force
+            target_far (float): Jika diberikan, threshold diambil dari kalibrasi untuk FAR ini
+        
+        Returns:
+            dict: 'results' (list hasil per gambar, skema sama dengan recognize
+                  ditambah 'image_path'), 'num_images', 'num_failed', 'timing'
+        """
+        if not self.is_trained:
+            return {"status": "error", "message": "Model belum di-training"}
+        
+        if target_far is not None:
+            # Model belum dikalibrasi / mode matching berbeda: error dict seperti recognize
+            try:
+                threshold = self.threshold_for_far(target_far)
+            except ValueError as e:
+                return {"status": "error", "message": f"Error during recognition: {str(e)}"}
+        
+        if isinstance(paths, str):
+            paths = list_image_files(paths) if os.path.isdir(paths) else [paths]
+        if len(paths) == 0:
+            # Folder kosong / list kosong: tidak ada yang dipreprocess
+            return {"results": [], "num_images": 0, "num_failed": 0,
+                    "timing": {'preprocess': 0.0, 'projection': 0.0, 'search': 0.0, 'total': 0.0,
+                               'per_image_ms': 0.0}}
+        
+        timing = {}
+        start = time.perf_counter()
+        
+        # Preprocess semua probe (paralel) ke satu matriks
+        images, valid = load_images_parallel(paths, self.target_size, self.num_workers, self.align_faces)
+        probes = images.reshape(len(paths), -1)[valid].astype(self.dtype, copy=False)
+        timing['preprocess'] = time.perf_counter() - start
+        self._check_cancelled()
+        
+        # Mean centering dan proyeksi dalam satu GEMM
+        t0 = time.perf_counter()
+        probes -= self.mean_face
+        projections = probes @ self.eigenfaces
+        timing['projection'] = time.perf_counter() - t0
+        
+        # Pencarian jarak per batch agar matriks jarak tidak terlalu besar
+        t0 = time.perf_counter()
+        valid_results = self._search_results(projections, threshold, k, batch_size, exact)
+        timing['search'] = time.perf_counter() - t0
+        
+        results = []
+        valid_iter = iter(valid_results)
+        for path, ok in zip(paths, valid):
+            if ok:
+                result = next(valid_iter)
+            else:
+                result = {"status": "error", "message": "Gagal memproses gambar test"}
+            result['image_path'] = path
+            results.append(result)
+        
+        timing['total'] = time.perf_counter() - start
+        timing['per_image_ms'] = timing['total'] * 1000 / max(len(paths), 1)
+        
+        self.metrics.increment('queries', len(paths))
+        self.metrics.increment('query_failures', int(len(paths) - valid.sum()))
+        for stage in ('preprocess', 'projection', 'search'):
+            self.metrics.record_timing('batch_' + stage, timing[stage])
+        
+        return {
+            "results": results,
+            "num_images": len(paths),
+            "num_failed": int(len(paths) - valid.sum()),
+            "timing": timing
+        }
+    
+    def _search_results(self, projections, threshold, k=5, batch_size=256, exact=False):
+        """Top-k per baris projections (per batch) dan susun dict hasilnya"""
+        thresholds = np.broadcast_to(np.asarray(threshold, dtype=float), (len(projections),))
+        results = []
+        for b in range(0, len(projections), batch_size):
+            self._check_cancelled()
+            indices, distances = self._nearest_neighbors(projections[b:b + batch_size], k=k, exact=exact)
+            for idx_row, dist_row, row_threshold in zip(indices, distances, thresholds[b:b + batch_size]):
+                results.append(self._build_result(idx_row, dist_row, float(row_threshold)))
+        return results
+    
+    def recognize_vectors(self, faces, threshold=0.8, k=5, exact=False, target_far=None):
+        """
+        Recognition wajah yang sudah dipreprocess (mis. dari upload) dalam satu batch:
+        satu GEMM proyeksi dan satu pencarian jarak untuk semua baris
+        
+        Args:
+            faces (np.array): Wajah hasil preprocess, flattened (Q x N)
+            threshold (float/list): Threshold untuk semua wajah atau per wajah
+            k (int): Jumlah hasil terdekat per wajah
+            exact (bool): Abaikan search index
+            target_far (float): Jika diberikan, threshold diambil dari kalibrasi untuk FAR ini
+        
+        Returns:
+            list: Dict hasil per wajah, skema sama dengan recognize
+        """
+        if not self.is_trained:
+            return [{"status": "error", "message": "Model belum di-training"} for _ in range(len(faces))]
+        if len(faces) == 0:
+            return []
+        if target_far is not None:
+            try:
+                threshold = self.threshold_for_far(target_far)
+            except ValueError as e:
+                error = {"status": "error", "message": f"Error during recognition: {str(e)}"}
+                return [dict(error) for _ in range(len(faces))]
+        
+        probes = np.array(faces, dtype=self.dtype).reshape(len(faces), -1)
+        probes -= self.mean_face
+        projections = probes @ self.eigenfaces
+        
+        self.metrics.increment('queries', len(faces))
+        return self._search_results(projections, threshold, k, batch_size=max(len(faces), 1), exact=exact)
+    
+    def _basis_drift(self, centered_faces):
+        """Rasio energi wajah (sudah mean-centered) yang tidak tertangkap eigenfaces saat ini"""
+        total_energy = np.sum(centered_faces ** 2)
+        if total_energy == 0:
+            return 0.0
+        captured = centered_faces @ self.eigenfaces
+        residual_energy = total_energy - np.sum(captured ** 2)
+        return float(max(residual_energy, 0.0) / total_energy)
+    
+    def _incremental_basis_update(self, new_faces, new_mean):
+        """
+        Update eigenfaces secara incremental (sequential Karhunen-Loeve) tanpa data lama.
+        
+        Scatter data lama didekati di dalam subspace eigenfaces dari projected_faces
+        (S_a ~ E (P^T P) E^T), lalu digabung dengan scatter data baru dan koreksi
+        pergeseran mean. Faktor low-rank Z (S ~ Z Z^T) didekomposisi dengan trick
+        Turk & Pentland sehingga tidak ada matriks N x N yang dibentuk.
+        
+        Returns:
+            eigenvalues (np.array), eigenvectors (np.array): Basis baru
+        """
+        n_old = len(self.face_labels)
+        n_new = new_faces.shape[0]
+        old_mean = self.mean_face
+        batch_mean = new_faces.mean(axis=0)
+        
+        # Faktor scatter data lama: G = P^T P = U diag(g) U^T -> E U sqrt(g)
+        G = self.projected_faces.T @ self.projected_faces
+        g, U = self._jacobi_eigendecomposition(G)
+        old_factor = self.eigenfaces @ (U * np.sqrt(np.maximum(g, 0))).astype(self.dtype)
+        
+        # Faktor scatter data baru dan koreksi pergeseran mean
+        new_factor = (new_faces - batch_mean).T
+        mean_factor = np.sqrt(n_old * n_new / (n_old + n_new)) * (old_mean - batch_mean)
+        
+        Z = np.hstack([old_factor, new_factor, mean_factor[:, None]])
+        return self._alternative_eigendecomposition(Z)
+    
+    def enroll(self, person_name, image_paths, update_basis=None, drift_threshold=0.2):
+        """
+        Tambah wajah (orang baru atau foto tambahan) tanpa training ulang penuh
+        
+        mean_face dan projected_faces di-update secara incremental. Eigenfaces
+        di-update dengan incremental PCA jika update_basis=True, atau otomatis
+        (update_basis=None) jika drift (energi wajah baru di luar subspace)
+        melebihi drift_threshold; selain itu basis dipertahankan dan search index
+        di-update incremental (tanpa k-means ulang).
+        
+        Args:
+            person_name (str): Nama orang
+            image_paths (list): List path gambar orang tersebut
+            update_basis (bool): Paksa update/tidak update basis, None = otomatis
+            drift_threshold (float): Batas drift untuk update basis otomatis
+        
+        Returns:
+            bool: True jika berhasil
+        """
+        if not self.is_trained:
+            print("Model belum di-training")
+            return False
+        
+        try:
+            self._check_full_index()
+            images, loaded = load_images_parallel(image_paths, self.target_size, self.num_workers, self.align_faces)
+            new_faces = images.reshape(len(image_paths), -1)[loaded].astype(self.dtype, copy=False)
+            if len(new_faces) == 0:
+                print("Error: Tidak ada gambar yang berhasil di-load")
+                return False
             
-            # Hitung jarak euclidean dengan semua wajah training
-            distances = []
-            for i, projected_face in enumerate(self.projected_faces):
-                distance = euclidean_distance(test_projection, projected_face)
-                distances.append({
-                    'distance': distance,
-                    'label': self.face_labels[i],
-                    'name': self.label_names[self.face_labels[i]]
-                })
+            n_old = len(self.face_labels)
+            n_new = len(new_faces)
+            new_mean = (n_old * self.mean_face + new_faces.sum(axis=0)) / (n_old + n_new)
             
-            # Sort berdasarkan jarak terdekat
-            distances.sort(key=lambda x: x['distance'])
+            drift = self._basis_drift(new_faces - new_mean)
+            if update_basis is None:
+                update_basis = drift > drift_threshold
+            print(f"Enroll {person_name}: {n_new} gambar, drift basis {drift:.4f}")
             
-            # Ambil hasil terdekat
-            best_match = distances[0]
+            if update_basis:
+                print("Update eigenfaces secara incremental...")
+                eigenvalues, eigenvectors = self._incremental_basis_update(new_faces, new_mean)
+                # Re-proyeksi data lama: p' = p (E^T E') + (mean_lama - mean_baru) E'
+                old_projected = (self.projected_faces @ (self.eigenfaces.T @ eigenvectors)
+                                 + (self.mean_face - new_mean) @ eigenvectors)
+                self.eigenvalues = eigenvalues.astype(self.dtype, copy=False)
+                self.eigenfaces = eigenvectors.astype(self.dtype, copy=False)
+                shift = None
+            else:
+                shift = (self.mean_face - new_mean) @ self.eigenfaces
+                old_projected = self.projected_faces + shift
             
-            # Cek threshold
-            if best_match['distance'] < threshold:
-                recognized = True
-                message = f"Wajah dikenali sebagai: {best_match['name']}"
+            # Label: tambah nama baru atau gabung ke orang yang sudah ada
+            if person_name in self.label_names:
+                label = self.label_names.index(person_name)
             else:
-                recognized = False
-                message = "Wajah tidak dikenali dalam database"
-            
-            return {
-                "recognized": recognized,
-                "person": best_match['name'] if recognized else "Unknown",
-                "distance": best_match['distance'],
-                "message": message,
-                "all_distances": distances[:5],  # Top 5 hasil
-                "threshold_used": threshold
-            }
+                self.label_names = list(self.label_names) + [person_name]
+                label = len(self.label_names) - 1
+            if self.label_pixel_sums is not None:
+                # Copy (array hasil load bisa memory-map read-only), tambah baris untuk orang baru
+                sums = np.zeros((len(self.label_names), new_faces.shape[1]), dtype=np.float64)
+                sums[:len(self.label_pixel_sums)] = self.label_pixel_sums
+                sums[label] += new_faces.sum(axis=0, dtype=np.float64)
+                self.label_pixel_sums = sums
+            
+            self.mean_face = new_mean
+            self.projected_faces = np.vstack([old_projected, (new_faces - new_mean) @ self.eigenfaces])
+            self.projected_faces = self.projected_faces.astype(self.projected_dtype, copy=False)
+            self.face_labels = np.concatenate([self.face_labels, np.full(n_new, label)])
+            self._update_search_index(shift, n_added=n_new, rebuild=update_basis)
+            if self.calibration is not None:
+                self._auto_calibrate()
+            
+            print(f"Enroll selesai! Total gambar: {len(self.face_labels)}")
+            return True
             
         except Exception as e:
-            return {"status": "error", "message": f"Error during recognition: {str(e)}"}
+            print(f"Error during enroll: {str(e)}")
+            return False
+    
+    def unenroll(self, person_name):
+        """
+        Hapus semua wajah seseorang tanpa training ulang penuh
+        
+        Mean face dihitung ulang secara exact dari jumlah piksel per orang
+        (label_pixel_sums); proyeksi wajah yang tersisa cukup digeser sebesar
+        proyeksi perubahan mean.
+        Eigenfaces dipertahankan; baris orang tersebut dihapus dari search index
+        tanpa membangun ulang index.
+        
+        Args:
+            person_name (str): Nama orang yang dihapus
+        
+        Returns:
+            bool: True jika berhasil
+        """
+        if not self.is_trained:
+            print("Model belum di-training")
+            return False
+        
+        if person_name not in self.label_names:
+            print(f"Error: {person_name} tidak ada dalam model")
+            return False
+        
+        try:
+            self._check_full_index()
+        except ValueError as e:
+            print(f"Error: {e}")
+            return False
+        
+        label = self.label_names.index(person_name)
+        removed = self.face_labels == label
+        n_total = len(self.face_labels)
+        n_removed = int(removed.sum())
+        
+        if n_total - n_removed < 1 or len(self.label_names) <= 1:
+            print("Error: Model harus menyisakan minimal 1 orang")
+            return False
+        
+        if self.label_pixel_sums is not None:
+            # Exact: mean_baru = jumlah piksel orang yang tersisa / jumlah wajahnya
+            self.label_pixel_sums = np.delete(self.label_pixel_sums, label, axis=0)
+            new_mean = (self.label_pixel_sums.sum(axis=0) / (n_total - n_removed)).astype(self.dtype)
+            shift = (self.mean_face - new_mean) @ self.eigenfaces
+            self.mean_face = new_mean
+        else:
+            # Aproksimasi (model lama tanpa label_pixel_sums): hanya bagian mean wajah yang
+            # dihapus di dalam subspace eigenfaces yang dikoreksi, residual di luar subspace
+            # tertinggal di mean_face. Training ulang untuk mean yang exact.
+            # mean_baru ~ mean + delta, delta = -(m / (n - m)) * mean(P_hapus) E^T
+            print("Peringatan: model tanpa label_pixel_sums, mean_face dikoreksi secara aproksimasi")
+            removed_mean_projection = self.projected_faces[removed].mean(axis=0, dtype=self.dtype)
+            shift = n_removed / (n_total - n_removed) * removed_mean_projection
+            self.mean_face = self.mean_face - shift @ self.eigenfaces.T
+        
+        self.projected_faces = (self.projected_faces[~removed] + shift).astype(self.projected_dtype, copy=False)
+        
+        # Geser label setelah label yang dihapus
+        labels = self.face_labels[~removed]
+        self.face_labels = np.where(labels > label, labels - 1, labels)
+        self.label_names = [name for name in self.label_names if name != person_name]
+        self._update_search_index(shift, removed=removed)
+        if self.calibration is not None:
+            self._auto_calibrate()
+        
+        print(f"Unenroll {person_name} selesai! Total gambar: {len(self.face_labels)}")
+        return True
     
     def save_model(self, save_path):
+        """
+        Simpan model ke folder: header JSON + array mentah (.npy, aligned, dtype engine)
+        sehingga load_model bisa membukanya dengan memory-map tanpa copy
+        
+        Args:
+            save_path (str): Path folder model
+        """
         if not self.is_trained:
             print("Model belum di-training")
             return False
         
         try:
-            create_folder_if_not_exists(os.path.dirname(save_path))
-            
-            model_data = {
-                'mean_face': self.mean_face,
-                'eigenfaces': self.eigenfaces,
-                'eigenvalues': self.eigenvalues,
-                'projected_faces': self.projected_faces,
-                'face_labels': self.face_labels,
-                'label_names': self.label_names,
-                'target_size': self.target_size,
-                'n_components': self.n_components
+            create_folder_if_not_exists(save_path)
+            
+            arrays = {
+                'mean_face': np.ascontiguousarray(self.mean_face, dtype=self.dtype),
+                'eigenfaces': np.ascontiguousarray(self.eigenfaces, dtype=self.dtype),
+                'eigenvalues': np.ascontiguousarray(self.eigenvalues, dtype=self.dtype),
+                'projected_faces': np.ascontiguousarray(self.projected_faces, dtype=self.projected_dtype),
+                'face_labels': np.ascontiguousarray(self.face_labels, dtype=np.int32)
             }
+            if self.label_pixel_sums is not None:
+                arrays['label_pixel_sums'] = np.ascontiguousarray(self.label_pixel_sums, dtype=np.float64)
+            # Ditulis lewat file sementara: array engine bisa saja memory-map dari
+            # folder yang sama (load lalu save ke path yang sama) atau dibuka proses lain
+            for name, array in arrays.items():
+                save_npy_atomic(os.path.join(save_path, name + ".npy"), array)
+            
+            header = {
+                'format_version': MODEL_FORMAT_VERSION,
+                'target_size': list(self.target_size),
+                'n_components': self.n_components,
+                'align_faces': self.align_faces,
+                'calibration': self.calibration,
+                'match_mode': self.match_mode,
+                'n_prototypes': self.n_prototypes,
+                'label_names': list(self.label_names),
+                'arrays': {name: list(array.shape) for name, array in arrays.items()},
+                'index_type': self.search_index.INDEX_TYPE if self.search_index is not None else None,
+                'index_params': self.index_params if self.search_index is not None else None
+            }
+            
+            if self.search_index is not None:
+                save_params = {}
+                if self.match_mode == 'samples' and self.search_index.SHARES_GALLERY:
+                    # Vektor index = baris projected_faces.npy, tidak perlu disimpan dua kali
+                    save_params['store_vectors'] = False
+                self.search_index.save(os.path.join(save_path, MODEL_INDEX_FOLDER), **save_params)
+            
+            # Header ditulis terakhir: folder tanpa header dianggap belum lengkap
+            save_json_atomic(os.path.join(save_path, MODEL_HEADER_FILE), header)
             
-            joblib.dump(model_data, save_path)
             print(f"Model disimpan ke: {save_path}")
             return True
             
@@ -239,13 +1459,80 @@ class EigenfaceEngine:
             print(f"Error saving model: {str(e)}")
             return False
     
-    def load_model(self, model_path):
+    def _validate_model_header(self, header, expected_target_size=None):
+        """Cek versi format dan konsistensi shape sebelum array dibuka"""
+        version = header.get('format_version')
+        if version != MODEL_FORMAT_VERSION:
+            raise ValueError(f"Versi format model {version} tidak didukung "
+                             f"(didukung: {MODEL_FORMAT_VERSION})")
+        
+        target_size = tuple(header['target_size'])
+        if expected_target_size is not None and target_size != tuple(expected_target_size):
+            raise ValueError(f"target_size model {target_size} tidak sesuai "
+                             f"dengan yang diharapkan {tuple(expected_target_size)}")
+        
+        shapes = {name: tuple(shape) for name, shape in header['arrays'].items()}
+        n_pixels = target_size[0] * target_size[1]
+        n_faces, n_components = shapes['projected_faces']
+        expected = {
+            'mean_face': (n_pixels,),
+            'eigenfaces': (n_pixels, n_components),
+            'eigenvalues': (n_components,),
+            'face_labels': (n_faces,)
+        }
+        for name, shape in expected.items():
+            if shapes.get(name) != shape:
+                raise ValueError(f"Shape {name} {shapes.get(name)} tidak konsisten, seharusnya {shape}")
+    
+    def load_model(self, model_path, mmap=True, expected_target_size=None, shards=None):
+        """
+        Load model dari folder (format baru) atau file .pkl joblib (format lama)
+        
+        Args:
+            model_path (str): Path folder model atau file .pkl
+            mmap (bool): Buka array dengan memory-map read-only (berbagi halaman
+                         memori antar proses, startup hampir instan)
+            expected_target_size (tuple): Tolak model jika target_size berbeda
+            shards (list): Untuk index 'sharded': shard_id yang di-load (default: semua);
+                           recognition hanya mencari di shard tersebut
+        """
         try:
             if not os.path.exists(model_path):
                 print("File model tidak ditemukan")
                 return False
             
-            model_data = joblib.load(model_path)
+            if os.path.isdir(model_path):
+                with open(os.path.join(model_path, MODEL_HEADER_FILE), 'r') as f:
+                    header = json.load(f)
+                self._validate_model_header(header, expected_target_size)
+                
+                mmap_mode = 'r' if mmap else None
+                model_data = {name: np.load(os.path.join(model_path, name + ".npy"), mmap_mode=mmap_mode)
+                              for name in header['arrays']}
+                model_data['label_names'] = header['label_names']
+                model_data['target_size'] = tuple(header['target_size'])
+                model_data['n_components'] = header['n_components']
+                model_data['align_faces'] = header.get('align_faces', False)
+                model_data['calibration'] = header.get('calibration')
+                # Himpunan pencarian (dan index tersimpan) bergantung pada mode matching saat save
+                model_data['match_mode'] = header.get('match_mode')
+                model_data['n_prototypes'] = header.get('n_prototypes', self.n_prototypes)
+                model_data['index_params'] = header.get('index_params')
+                load_params = {}
+                if shards is not None:
+                    if header.get('index_type') != 'sharded':
+                        raise ValueError("Model tidak memakai index 'sharded', shards tidak bisa dipilih")
+                    load_params['shards'] = shards
+                if header.get('index_type'):
+                    model_data['search_index'] = load_search_index(
+                        os.path.join(model_path, MODEL_INDEX_FOLDER), mmap=mmap,
+                        gallery=model_data['projected_faces'], **load_params)
+            else:
+                model_data = joblib.load(model_path)
+                if (expected_target_size is not None
+                        and tuple(model_data['target_size']) != tuple(expected_target_size)):
+                    raise ValueError(f"target_size model {model_data['target_size']} tidak sesuai "
+                                     f"dengan yang diharapkan {tuple(expected_target_size)}")
             
             self.mean_face = model_data['mean_face']
             self.eigenfaces = model_data['eigenfaces']
@@ -255,6 +1542,53 @@ class EigenfaceEngine:
             self.label_names = model_data['label_names']
             self.target_size = model_data['target_size']
             self.n_components = model_data['n_components']
+            self.align_faces = model_data.get('align_faces', False)
+            self.calibration = model_data.get('calibration')
+            self.label_pixel_sums = model_data.get('label_pixel_sums')
+            mode_saved = model_data.get('match_mode') is not None
+            self.match_mode = model_data['match_mode'] if mode_saved else self.match_mode
+            self.n_prototypes = model_data.get('n_prototypes', self.n_prototypes)
+            self.dtype = np.dtype(self.eigenfaces.dtype)
+            self.projected_dtype = np.dtype(self.projected_faces.dtype)
+            self._search_vectors = self._search_labels = self._gallery_sq_norms = None
+            self.search_index = None
+            
+            # Pakai index yang tersimpan; jika tidak ada, bangun sesuai index_type engine
+            search_index = model_data.get('search_index')
+            if search_index is not None:
+                # Parameter index ikut dipulihkan agar rebuild (enroll/unenroll) memakai setting yang sama;
+                # model lama tanpa index_params: ambil dari index yang tersimpan
+                self.index_type = search_index.INDEX_TYPE
+                index_params = model_data.get('index_params')
+                self.index_params = dict(index_params) if index_params is not None else search_index.get_params()
+                if self.match_mode == 'samples':
+                    expected_rows = len(self.projected_faces)
+                elif mode_saved:
+                    expected_rows = search_index.n_rows
+                else:
+                    # Model format lama tanpa match_mode: ukuran prototype baru diketahui setelah dihitung
+                    self._build_search_cache()
+                    expected_rows = len(self._search_vectors)
+                
+                if search_index.n_rows != expected_rows:
+                    if getattr(search_index, 'is_partial', False):
+                        raise ValueError("Search index tersimpan tidak sesuai himpunan pencarian "
+                                         "dan tidak bisa dibangun ulang dari sebagian shard")
+                    print("Search index tersimpan tidak sesuai himpunan pencarian, dibangun ulang")
+                    self.search_index = None
+                elif search_index.EXACT:
+                    # Index exact melayani semua pencarian (termasuk exact=True): cache gallery penuh
+                    # tidak dibangun, sehingga load sebagian shard hanya membaca baris shard tersebut
+                    self.search_index = search_index
+                    self._search_labels = search_index.search_labels()
+                else:
+                    self.search_index = search_index
+            
+            if self._search_labels is None:
+                if self._search_vectors is None:
+                    self._build_search_cache()
+                if self.search_index is None:
+                    self._build_search_index()
             
             self.is_trained = True
             print(f"Model berhasil di-load dari: {model_path}")
@@ -293,7 +1627,10 @@ class EigenfaceEngine:
             "people_names": self.label_names,
             "total_images": len(self.face_labels),
             "image_size": f"{self.target_size[0]}x{self.target_size[1]}",
-            "num_eigenfaces": self.n_components,
+            "face_alignment": self.align_faces,
+            "calibration": ({'eer': self.calibration['eer'], 'operating_points': self.calibration['operating_points']}
+                            if self.calibration is not None else None),
+            "num_eigenfaces": self.eigenfaces.shape[1],
             "eigenvalues": self.eigenvalues.tolist() if hasattr(self, 'eigenvalues') else []
         }
     
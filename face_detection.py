@@ -0,0 +1,140 @@
+import os
+import threading
+import cv2
+import numpy as np
+
+# Margin di sekitar box wajah yang ikut dirotasi saat alignment (agar sudut tidak kosong)
+ALIGN_MARGIN = 0.25
+
+class FaceDetector:
+    """
+    Deteksi wajah dengan cascade classifier bawaan OpenCV (Haar/LBP, offline).
+    
+    File cascade dicari di cv2.data.haarcascades jika bukan path yang ada.
+    """
+    
+    def __init__(self, cascade="haarcascade_frontalface_default.xml", scale_factor=1.1, min_neighbors=5,
+                 min_size=(30, 30)):
+        self.cascade_path = cascade if os.path.exists(cascade) else os.path.join(cv2.data.haarcascades, cascade)
+        self.classifier = cv2.CascadeClassifier(self.cascade_path)
+        if self.classifier.empty():
+            raise ValueError(f"Cascade tidak bisa di-load: {self.cascade_path}")
+        
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = tuple(min_size)
+    
+    def detect(self, gray):
+        """
+        Deteksi semua wajah pada gambar grayscale
+        
+        Args:
+            gray (np.array): Gambar grayscale uint8 (h, w)
+        
+        Returns:
+            np.array: Bounding box (n, 4) berisi (x, y, w, h), wajah terbesar dulu
+        """
+        boxes = self.classifier.detectMultiScale(gray, scaleFactor=self.scale_factor,
+                                                 minNeighbors=self.min_neighbors, minSize=self.min_size)
+        if len(boxes) == 0:
+            return np.empty((0, 4), dtype=np.int32)
+        boxes = np.asarray(boxes, dtype=np.int32)
+        return boxes[np.argsort(-(boxes[:, 2] * boxes[:, 3]), kind='stable')]
+
+def crop_face(gray, box, target_size=(64, 64)):
+    """
+    Potong satu wajah dari gambar grayscale, resize dan normalize ke [0, 1]
+    
+    Args:
+        gray (np.array): Gambar grayscale uint8 (h, w)
+        box (tuple): Bounding box (x, y, w, h)
+        target_size (tuple): Ukuran target (width, height)
+    
+    Returns:
+        np.array: Wajah (h, w) float32
+    """
+    x, y, w, h = (int(v) for v in box)
+    face = gray[max(y, 0):y + h, max(x, 0):x + w]
+    return cv2.resize(face, tuple(target_size)).astype(np.float32) / 255.0
+
+class FaceAligner:
+    """
+    Deteksi wajah terbesar lalu luruskan berdasarkan posisi kedua mata.
+    
+    Mata dicari dengan cascade mata di separuh atas box wajah; jika dua mata
+    ditemukan, wajah dirotasi sehingga garis antar mata horizontal sebelum
+    di-crop. Jika mata tidak ditemukan, wajah hanya di-crop tanpa rotasi.
+    """
+    
+    def __init__(self, detector=None, eye_cascade="haarcascade_eye.xml", max_angle=30.0):
+        self.detector = detector if detector is not None else FaceDetector()
+        self.eye_detector = FaceDetector(eye_cascade, scale_factor=1.1, min_neighbors=5, min_size=(8, 8))
+        self.max_angle = max_angle
+    
+    def eye_angle(self, gray, box):
+        """
+        Sudut kemiringan garis antar mata (derajat), None jika dua mata tidak ditemukan
+        """
+        x, y, w, h = (int(v) for v in box)
+        upper = gray[max(y, 0):y + h // 2, max(x, 0):x + w]
+        eyes = self.eye_detector.detect(upper)
+        if len(eyes) < 2:
+            return None
+        
+        # Dua deteksi terbesar, diurutkan kiri -> kanan
+        centers = sorted((ex + ew / 2.0, ey + eh / 2.0) for ex, ey, ew, eh in eyes[:2])
+        (lx, ly), (rx, ry) = centers
+        if rx - lx < w * 0.2:
+            return None
+        angle = float(np.degrees(np.arctan2(ry - ly, rx - lx)))
+        return angle if abs(angle) <= self.max_angle else None
+    
+    def align(self, gray, box, target_size=(64, 64)):
+        """
+        Crop satu wajah yang sudah diluruskan, resize dan normalize ke [0, 1]
+        
+        Args:
+            gray (np.array): Gambar grayscale uint8 (h, w)
+            box (tuple): Bounding box wajah (x, y, w, h)
+            target_size (tuple): Ukuran target (width, height)
+        
+        Returns:
+            np.array: Wajah (h, w) float32
+        """
+        angle = self.eye_angle(gray, box)
+        if angle is None:
+            return crop_face(gray, box, target_size)
+        
+        # Rotasi hanya area di sekitar wajah (lebih murah daripada seluruh gambar)
+        x, y, w, h = (int(v) for v in box)
+        mx, my = int(w * ALIGN_MARGIN), int(h * ALIGN_MARGIN)
+        x0, y0 = max(x - mx, 0), max(y - my, 0)
+        region = gray[y0:y + h + my, x0:x + w + mx]
+        center = (x + w / 2.0 - x0, y + h / 2.0 - y0)
+        rotation = cv2.getRotationMatrix2D(center, angle, 1.0)
+        rotated = cv2.warpAffine(region, rotation, (region.shape[1], region.shape[0]),
+                                 flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+        return crop_face(rotated, (x - x0, y - y0, w, h), target_size)
+    
+    def extract(self, gray, target_size=(64, 64)):
+        """
+        Deteksi, luruskan dan crop wajah terbesar
+        
+        Returns:
+            np.array: Wajah (h, w) float32, None jika tidak ada wajah terdeteksi
+        """
+        boxes = self.detector.detect(gray)
+        if len(boxes) == 0:
+            return None
+        return self.align(gray, boxes[0], target_size)
+
+# CascadeClassifier tidak dijamin thread-safe: satu FaceAligner per thread decode
+_thread_local = threading.local()
+
+def get_face_aligner():
+    """FaceAligner milik thread saat ini (dibuat sekali per thread)"""
+    aligner = getattr(_thread_local, 'aligner', None)
+    if aligner is None:
+        aligner = FaceAligner()
+        _thread_local.aligner = aligner
+    return aligner
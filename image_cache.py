@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import numpy as np
+from utils import load_images_parallel, create_folder_if_not_exists, save_npy_atomic, save_json_atomic
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Compaction jika baris yatim (file berubah) melebihi fraksi ini, atau jumlah shard melebihi batas
+COMPACT_ORPHAN_RATIO = 0.5
+MAX_SHARDS = 32
+
+class _CacheLock:
+    """Lock eksklusif antar proses (file .lock) untuk cache_dir yang dipakai bersama"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+    
+    def __enter__(self):
+        self._file = open(self.path, 'a+')
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            # msvcrt.locking hanya mencoba ~10 detik, ulangi sampai dapat
+            while True:
+                try:
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.1)
+        return self
+    
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+class PreprocessedFaceCache:
+    """
+    Cache persisten hasil preprocess gambar (grayscale + resize + normalize).
+    
+    Wajah untuk satu target_size disimpan sebagai beberapa shard .npy (N, h, w)
+    float32 yang dibuka dengan memory-map: setiap batch cache miss ditulis
+    sebagai shard baru (file lama tidak pernah ditulis ulang), ditambah index
+    JSON path -> (shard, baris, mtime, ukuran file). Gambar yang tidak berubah
+    tidak pernah di-decode ulang; hanya file baru atau yang dimodifikasi
+    diproses. Baris yatim (file yang berubah) dan shard kecil digabung ulang
+    oleh compact. Penulisan dilindungi lock file sehingga beberapa proses
+    boleh memakai cache_dir yang sama.
+    """
+    VERSION = 2
+    
+    def __init__(self, cache_dir, target_size=(64, 64), align_faces=False):
+        self.cache_dir = cache_dir
+        self.target_size = tuple(target_size)
+        self.align_faces = align_faces
+        
+        # Wajah hasil alignment disimpan terpisah dari gambar penuh
+        self.name = f"faces_{self.target_size[0]}x{self.target_size[1]}" + ("_aligned" if align_faces else "")
+        self.index_path = os.path.join(cache_dir, self.name + "_index.json")
+        self.lock_path = os.path.join(cache_dir, self.name + ".lock")
+        # Format versi 1: satu matriks yang ditulis ulang setiap append
+        self.legacy_data_path = os.path.join(cache_dir, self.name + ".npy")
+        
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _file_signature(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+    
+    def _shard_path(self, shard):
+        return os.path.join(self.cache_dir, f"{self.name}_{shard:05d}.npy")
+    
+    def _read_index(self):
+        """Index cache: 'entries' (path -> [shard, baris, mtime, ukuran]) dan 'shards' (shard -> jumlah baris)"""
+        empty = {'entries': {}, 'shards': {}, 'next_shard': 0}
+        if not os.path.exists(self.index_path):
+            return empty
+        
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return empty
+        
+        # Index dari versi atau ukuran berbeda dianggap tidak valid
+        if index.get('version') != self.VERSION or tuple(index.get('target_size', ())) != self.target_size:
+            return empty
+        return index
+    
+    def _write_index(self, index):
+        index.update({'version': self.VERSION, 'target_size': list(self.target_size)})
+        save_json_atomic(self.index_path, index)
+    
+    def _orphan_rows(self, index):
+        live = len(index['entries'])
+        return sum(index['shards'].values()) - live
+    
+    def _append(self, index, new_images, keys, signatures):
+        """Tulis batch baru sebagai shard baru dan daftarkan di index (dipanggil di dalam lock)"""
+        shard = index['next_shard']
+        save_npy_atomic(self._shard_path(shard), np.ascontiguousarray(new_images, dtype=np.float32))
+        index['next_shard'] = shard + 1
+        index['shards'][str(shard)] = len(new_images)
+        for row, (key, signature) in enumerate(zip(keys, signatures)):
+            index['entries'][key] = [shard, row] + signature
+    
+    def _compact(self, index):
+        """Gabungkan semua baris yang masih dipakai ke satu shard baru, hapus shard lama (di dalam lock)"""
+        old_shards = [int(shard) for shard in index['shards']]
+        # Entry untuk file yang sudah dihapus ikut dibuang
+        index['entries'] = {key: entry for key, entry in index['entries'].items() if os.path.exists(key)}
+        keys = list(index['entries'])
+        if not keys:
+            index['shards'] = {}
+            self._write_index(index)
+            for old_shard in old_shards:
+                os.remove(self._shard_path(old_shard))
+            return
+        shape = (len(keys), self.target_size[1], self.target_size[0])
+        
+        shard = index['next_shard']
+        tmp_path = self._shard_path(shard)[:-len(".npy")] + ".tmp.npy"
+        out = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=shape)
+        data = {s: np.load(self._shard_path(s), mmap_mode='r') for s in old_shards}
+        for row, key in enumerate(keys):
+            old_shard, old_row = index['entries'][key][:2]
+            out[row] = data[old_shard][old_row]
+        out.flush()
+        del out, data
+        os.replace(tmp_path, self._shard_path(shard))
+        
+        for row, key in enumerate(keys):
+            index['entries'][key][:2] = [shard, row]
+        index['shards'] = {str(shard): len(keys)}
+        index['next_shard'] = shard + 1
+        # Index baru ditulis dulu, baru shard lama dihapus
+        self._write_index(index)
+        for old_shard in old_shards:
+            try:
+                os.remove(self._shard_path(old_shard))
+            except OSError:
+                pass
+    
+    def _needs_compaction(self, index):
+        total = sum(index['shards'].values())
+        return total > 0 and (self._orphan_rows(index) > COMPACT_ORPHAN_RATIO * total
+                              or len(index['shards']) > MAX_SHARDS)
+    
+    def compact(self):
+        """Buang baris yatim dan gabungkan shard menjadi satu file"""
+        create_folder_if_not_exists(self.cache_dir)
+        with _CacheLock(self.lock_path):
+            index = self._read_index()
+            if index['shards']:
+                self._compact(index)
+    
+    def _lookup(self, index, keys, signatures):
+        """Lokasi (shard, baris) setiap gambar yang valid di cache, (-1, -1) jika tidak ada/berubah"""
+        locations = np.full((len(keys), 2), -1, dtype=np.int64)
+        for i, (key, signature) in enumerate(zip(keys, signatures)):
+            entry = index['entries'].get(key)
+            if entry is not None and signature is not None and entry[2:] == signature:
+                locations[i] = entry[:2]
+        return locations
+    
+    def _gather(self, locations):
+        """Baca baris dari shard (dipanggil di dalam lock agar shard tidak dihapus compaction)"""
+        loaded = locations[:, 0] >= 0
+        shape = (len(locations), self.target_size[1], self.target_size[0])
+        if not loaded.any():
+            return np.empty(shape, dtype=np.float32), loaded
+        shards = np.unique(locations[loaded, 0])
+        
+        # Satu shard dengan baris berurutan -> kembalikan view memory-map tanpa copy
+        if loaded.all() and len(shards) == 1 and np.all(np.diff(locations[:, 1]) == 1):
+            data = np.load(self._shard_path(int(shards[0])), mmap_mode='r')
+            return data[locations[0, 1]:locations[-1, 1] + 1], loaded
+        
+        images = np.empty(shape, dtype=np.float32)
+        for shard in shards:
+            data = np.load(self._shard_path(int(shard)), mmap_mode='r')
+            mask = locations[:, 0] == shard
+            images[mask] = data[locations[mask, 1]]
+        return images, loaded
+    
+    def load(self, image_paths, num_workers=None):
+        """
+        Load gambar lewat cache, decode hanya yang belum ada atau sudah berubah
+        
+        Args:
+            image_paths (list): List path gambar
+            num_workers (int): Jumlah thread decode untuk cache miss
+        
+        Returns:
+            images (np.array): Array gambar (N, h, w) float32, urutan sama dengan image_paths
+            loaded (np.array): Mask boolean gambar yang berhasil di-load
+        """
+        create_folder_if_not_exists(self.cache_dir)
+        
+        keys = [os.path.abspath(path) for path in image_paths]
+        signatures = [self._file_signature(path) for path in image_paths]
+        with _CacheLock(self.lock_path):
+            locations = self._lookup(self._read_index(), keys, signatures)
+        
+        missing = np.flatnonzero(locations[:, 0] < 0)
+        self.hits += len(image_paths) - len(missing)
+        self.misses += len(missing)
+        
+        # Decode di luar lock (bagian paling lama), lalu tulis shard baru di dalam lock
+        new_images = None
+        if len(missing):
+            new_images, new_loaded = load_images_parallel([image_paths[i] for i in missing],
+                                                          self.target_size, num_workers, self.align_faces)
+            missing = missing[new_loaded]
+            new_images = new_images[new_loaded]
+        
+        with _CacheLock(self.lock_path):
+            if len(missing):
+                # Index dibaca ulang: proses lain mungkin sudah menambah shard sejak lookup
+                index = self._read_index()
+                if not index['shards'] and os.path.exists(self.legacy_data_path):
+                    os.remove(self.legacy_data_path)
+                self._append(index, new_images, [keys[i] for i in missing], [signatures[i] for i in missing])
+                if self._needs_compaction(index):
+                    self._compact(index)
+                else:
+                    self._write_index(index)
+                locations = self._lookup(index, keys, signatures)
+            
+            return self._gather(locations)
+    
+    def clear(self):
+        """Hapus file cache"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        with _CacheLock(self.lock_path):
+            index = self._read_index()
+            paths = [self._shard_path(int(shard)) for shard in index['shards']]
+            for path in paths + [self.index_path, self.legacy_data_path]:
+                if os.path.exists(path):
+                    os.remove(path)
+    
+    def get_stats(self):
+        return {"hits": self.hits, "misses": self.misses}
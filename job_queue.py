@@ -0,0 +1,143 @@
+import queue
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class JobCancelled(Exception):
+    """Dilempar di dalam job yang dibatalkan (lewat Job.check_cancelled)"""
+
+class Job:
+    """
+    Satu pekerjaan di JobQueue. Fungsi job menerima objek ini sebagai argumen
+    pertama untuk mengirim progress dan mengecek pembatalan.
+    """
+    
+    def __init__(self, job_id, name, events, callbacks):
+        self.job_id = job_id
+        self.name = name
+        self.status = 'pending'     # pending | running | done | error | cancelled
+        self.callbacks = callbacks
+        self._events = events
+        self._cancel_event = threading.Event()
+    
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+    
+    def cancel(self):
+        self._cancel_event.set()
+    
+    def check_cancelled(self):
+        """Lempar JobCancelled jika job sudah dibatalkan (dipanggil di titik aman)"""
+        if self._cancel_event.is_set():
+            raise JobCancelled(f"Job '{self.name}' dibatalkan")
+    
+    def report(self, message, fraction=None):
+        """Kirim progress (pesan dan fraksi 0..1 opsional) ke thread UI"""
+        self._events.put(('progress', self, (message, fraction)))
+
+class JobQueue:
+    """
+    Menjalankan pekerjaan berat (training, recognition) di thread pool.
+    
+    Hasil, error dan progress tidak pernah diproses di worker thread: semuanya
+    masuk ke satu queue dan callback-nya dipanggil oleh poll() di thread yang
+    memanggil poll (thread UI lewat root.after), sehingga callback aman
+    mengubah widget Tk.
+    """
+    
+    def __init__(self, max_workers=2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="eigenface-job")
+        self._events = queue.Queue()
+        self._ids = itertools.count(1)
+        self._after_id = None
+        self.jobs = {}
+    
+    def submit(self, name, fn, *args, on_done=None, on_error=None, on_cancel=None, on_progress=None):
+        """
+        Jadwalkan fn(job, *args) di worker thread
+        
+        Args:
+            name (str): Nama job (untuk log)
+            fn (callable): Fungsi job, argumen pertama adalah objek Job
+            on_done (callable): Dipanggil dengan hasil fn
+            on_error (callable): Dipanggil dengan exception
+            on_cancel (callable): Dipanggil tanpa argumen jika job dibatalkan
+            on_progress (callable): Dipanggil dengan (job, message, fraction)
+        
+        Returns:
+            Job: Objek job (untuk cancel atau cek status)
+        """
+        callbacks = {'done': on_done, 'error': on_error, 'cancelled': on_cancel, 'progress': on_progress}
+        job = Job(next(self._ids), name, self._events, callbacks)
+        self.jobs[job.job_id] = job
+        self._executor.submit(self._run, job, fn, args)
+        return job
+    
+    def _run(self, job, fn, args):
+        if job.cancelled:
+            self._events.put(('cancelled', job, None))
+            return
+        
+        job.status = 'running'
+        try:
+            result = fn(job, *args)
+        except JobCancelled:
+            self._events.put(('cancelled', job, None))
+        except Exception as e:
+            self._events.put(('error', job, e))
+        else:
+            self._events.put(('cancelled', job, None) if job.cancelled else ('done', job, result))
+    
+    def call_soon(self, fn, *args):
+        """Jalankan fn(*args) di thread UI pada poll berikutnya (aman dari thread mana pun)"""
+        self._events.put(('call', None, (fn, args)))
+    
+    def cancel(self, job):
+        job.cancel()
+    
+    def cancel_all(self):
+        for job in list(self.jobs.values()):
+            job.cancel()
+    
+    def active_jobs(self):
+        return [job for job in self.jobs.values() if job.status in ('pending', 'running')]
+    
+    def poll(self, max_events=100):
+        """Proses event yang menunggu dan panggil callback-nya (di thread pemanggil)"""
+        for _ in range(max_events):
+            try:
+                kind, job, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            
+            try:
+                if kind == 'call':
+                    fn, args = payload
+                    fn(*args)
+                elif kind == 'progress':
+                    if job.callbacks['progress'] is not None:
+                        job.callbacks['progress'](job, *payload)
+                else:
+                    job.status = kind
+                    self.jobs.pop(job.job_id, None)
+                    callback = job.callbacks[kind]
+                    if callback is not None:
+                        callback() if kind == 'cancelled' else callback(payload)
+            except Exception as e:
+                print(f"Error pada callback job: {str(e)}")
+    
+    def start_polling(self, root, interval_ms=50):
+        """Poll queue secara berkala lewat root.after (Tk event loop)"""
+        def tick():
+            self.poll()
+            self._after_id = root.after(interval_ms, tick)
+        tick()
+    
+    def shutdown(self, root=None):
+        """Batalkan semua job dan hentikan polling; worker yang sedang jalan tidak ditunggu"""
+        self.cancel_all()
+        if root is not None and self._after_id is not None:
+            root.after_cancel(self._after_id)
+            self._after_id = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,217 @@
+import io
+import sys
+import time
+import socket
+import threading
+import contextlib
+import http.client
+import multiprocessing
+from urllib.parse import urlparse
+import numpy as np
+from server import serve
+
+def _read_files(image_paths):
+    payloads = []
+    for path in image_paths:
+        with open(path, 'rb') as f:
+            payloads.append(f.read())
+    return payloads
+
+def run_load_test(url, image_paths, n_requests=500, concurrency=16, threshold=0.8):
+    """
+    Kirim n_requests POST /recognize dengan `concurrency` koneksi keep-alive paralel
+    
+    Args:
+        url (str): Alamat server, mis. http://127.0.0.1:8000
+        image_paths (list): Gambar yang dikirim bergiliran
+        n_requests (int): Total request
+        concurrency (int): Jumlah client (thread) bersamaan
+        threshold (float): Threshold recognition
+    
+    Returns:
+        dict: Jumlah request/error, durasi, throughput (request/detik) dan
+              persentil latency (ms)
+    """
+    address = urlparse(url)
+    payloads = _read_files(image_paths)
+    latencies = []
+    errors = [0]
+    next_request = iter(range(n_requests))
+    lock = threading.Lock()
+    
+    def client():
+        connection = http.client.HTTPConnection(address.hostname, address.port, timeout=60)
+        while True:
+            with lock:
+                i = next(next_request, None)
+            if i is None:
+                break
+            
+            t0 = time.perf_counter()
+            try:
+                connection.request("POST", f"/recognize?threshold={threshold}", body=payloads[i % len(payloads)],
+                                   headers={"Content-Type": "application/octet-stream"})
+                response = connection.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                ok = False
+                connection.close()
+                connection = http.client.HTTPConnection(address.hostname, address.port, timeout=60)
+            elapsed = time.perf_counter() - t0
+            
+            with lock:
+                latencies.append(elapsed)
+                if not ok:
+                    errors[0] += 1
+        connection.close()
+    
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - start
+    
+    latency_ms = np.array(latencies) * 1000
+    return {
+        'requests': n_requests,
+        'errors': errors[0],
+        'concurrency': concurrency,
+        'duration': duration,
+        'throughput_rps': n_requests / duration if duration > 0 else 0.0,
+        'latency_ms': {
+            'mean': float(latency_ms.mean()) if len(latency_ms) else 0.0,
+            'p50': float(np.percentile(latency_ms, 50)) if len(latency_ms) else 0.0,
+            'p95': float(np.percentile(latency_ms, 95)) if len(latency_ms) else 0.0,
+            'p99': float(np.percentile(latency_ms, 99)) if len(latency_ms) else 0.0
+        }
+    }
+
+def _free_port(host):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+def _wait_until_ready(host, port, timeout=60.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=1)
+            connection.request("GET", "/health")
+            if connection.getresponse().status == 200:
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+def _serve_quietly(model_path, host, port, window_ms, max_batch, workers=1):
+    with contextlib.redirect_stdout(io.StringIO()):
+        serve(model_path, host, port, window_ms, max_batch, workers=workers)
+
+def _start_server_process(model_path, host, window_ms, max_batch, workers=1):
+    """Jalankan server di proses terpisah (agar client tidak berebut GIL dengan server)"""
+    port = _free_port(host)
+    context = multiprocessing.get_context('spawn')
+    process = context.Process(target=_serve_quietly, args=(model_path, host, port, window_ms, max_batch, workers),
+                              daemon=True)
+    process.start()
+    if not _wait_until_ready(host, port):
+        process.terminate()
+        process.join()
+        raise RuntimeError(f"Server tidak siap (window {window_ms} ms, {workers} worker)")
+    return process, port
+
+def _process_tree(pid):
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", 'r') as f:
+            for child in f.read().split():
+                pids.extend(_process_tree(int(child)))
+    except OSError:
+        pass
+    return pids
+
+def process_tree_memory(pid):
+    """
+    Total RSS dan PSS (MB) proses beserta semua anaknya (Linux, /proc/<pid>/smaps_rollup)
+    
+    PSS membagi halaman bersama (mis. array model memory-map) rata ke semua proses
+    yang memakainya, sehingga total PSS adalah memori fisik sebenarnya; total RSS
+    menghitung halaman bersama berulang kali.
+    
+    Returns:
+        dict: 'processes', 'rss_mb', 'pss_mb'; None jika /proc tidak tersedia
+    """
+    totals = {'Rss:': 0, 'Pss:': 0}
+    pids = _process_tree(pid)
+    try:
+        for p in pids:
+            with open(f"/proc/{p}/smaps_rollup", 'r') as f:
+                for line in f:
+                    fields = line.split()
+                    if fields and fields[0] in totals:
+                        totals[fields[0]] += int(fields[1])
+    except OSError:
+        return None
+    return {'processes': len(pids), 'rss_mb': totals['Rss:'] / 1024, 'pss_mb': totals['Pss:'] / 1024}
+
+def _report(result, label):
+    print(f"{label} throughput={result['throughput_rps']:.1f} req/s "
+          f"p50={result['latency_ms']['p50']:.2f}ms p99={result['latency_ms']['p99']:.2f}ms "
+          f"errors={result['errors']}", file=sys.stderr)
+
+def sweep_batch_windows(model_path, image_paths, windows_ms=(0, 1, 2, 5, 10), n_requests=500, concurrency=16,
+                        max_batch=64, host="127.0.0.1"):
+    """
+    Ukur throughput vs ukuran batch window: untuk setiap window, server dijalankan
+    di proses terpisah lalu di-load test
+    
+    Returns:
+        list: Hasil run_load_test per window, ditambah 'window_ms'
+    """
+    results = []
+    
+    for window_ms in windows_ms:
+        process, port = _start_server_process(model_path, host, window_ms, max_batch)
+        try:
+            result = run_load_test(f"http://{host}:{port}", image_paths, n_requests, concurrency)
+        finally:
+            process.terminate()
+            process.join()
+        
+        result['window_ms'] = window_ms
+        results.append(result)
+        _report(result, f"window={window_ms}ms")
+    
+    return results
+
+def sweep_workers(model_path, image_paths, workers_list=(1, 2, 4), window_ms=5.0, n_requests=500, concurrency=16,
+                  max_batch=64, host="127.0.0.1"):
+    """
+    Ukur throughput dan memori vs jumlah worker pre-fork
+    
+    Returns:
+        list: Hasil run_load_test per jumlah worker, ditambah 'workers' dan
+              'memory' (lihat process_tree_memory, diukur setelah load test)
+    """
+    results = []
+    
+    for workers in workers_list:
+        process, port = _start_server_process(model_path, host, window_ms, max_batch, workers)
+        try:
+            result = run_load_test(f"http://{host}:{port}", image_paths, n_requests, concurrency)
+            result['memory'] = process_tree_memory(process.pid)
+        finally:
+            process.terminate()
+            process.join()
+        
+        result['workers'] = workers
+        results.append(result)
+        label = f"workers={workers}"
+        if result['memory'] is not None:
+            label += f" rss={result['memory']['rss_mb']:.1f}MB pss={result['memory']['pss_mb']:.1f}MB"
+        _report(result, label)
+    
+    return results
@@ -3,11 +3,12 @@ from tkinter import ttk, filedialog, messagebox, scrolledtext
 from PIL import Image, ImageTk
 import numpy as np
 import os
-import threading
 import random
 import math
 from eigenface_engine import EigenfaceEngine
-from utils import load_and_validate_dataset
+from utils import load_and_validate_dataset, load_thumbnail
+from memory_cache import image_memory_cache
+from job_queue import JobQueue
 
 class FaceRecognitionGUI:
     def __init__(self, root):
@@ -20,9 +21,16 @@ class FaceRecognitionGUI:
         self.dataset_folder = None
         self.test_image_path = None
         self.engine = EigenfaceEngine()
+        self.engine.metrics.add_callback(self.on_engine_metric)
         self.is_trained = False
         self.dataset_images = []
         
+        # Training/recognition berjalan di worker thread; hasil & progress
+        # diproses di thread UI lewat polling root.after
+        self.jobs = JobQueue()
+        self.jobs.start_polling(self.root)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         self.create_widgets()
         
     def create_widgets(self):
@@ -71,12 +79,18 @@ class FaceRecognitionGUI:
                                      wraplength=180)
         self.dataset_label.pack(pady=5)
         
+        # Crop + luruskan wajah (cascade Haar) sebelum training dan recognition
+        self.align_faces_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(dataset_section, text="Deteksi & align wajah",
+                      variable=self.align_faces_var,
+                      font=('Arial', 9), bg='#f8f9fa', fg='#2c3e50').pack(anchor='w')
+        
         # Buttons row
         buttons_frame = tk.Frame(dataset_section, bg='#f8f9fa')
         buttons_frame.pack(fill='x', pady=5)
         
         self.train_btn = tk.Button(buttons_frame, text="🧠 Train", 
-                                  command=self.train_model_threaded,
+                                  command=self.train_model,
                                   bg='#e74c3c', fg='white', font=('Arial', 9, 'bold'),
                                   relief='flat', state='disabled')
         self.train_btn.pack(side='left', fill='x', expand=True, padx=(0, 2))
@@ -93,6 +107,16 @@ class FaceRecognitionGUI:
                                     relief='flat', state='disabled')
         self.gallery_btn.pack(fill='x', pady=(5, 0))
         
+        # Progress & pembatalan job yang sedang berjalan
+        self.job_progress = ttk.Progressbar(dataset_section, mode='indeterminate')
+        self.job_progress.pack(fill='x', pady=(5, 0))
+        
+        self.cancel_btn = tk.Button(dataset_section, text="⛔ Cancel Job", 
+                                   command=self.cancel_jobs,
+                                   bg='#7f8c8d', fg='white', font=('Arial', 9, 'bold'),
+                                   relief='flat', state='disabled')
+        self.cancel_btn.pack(fill='x', pady=(5, 0))
+        
         # Test section
         test_section = tk.LabelFrame(left_frame, text="🔍 2. Test Image", 
                                     font=('Arial', 10, 'bold'),
@@ -141,6 +165,12 @@ class FaceRecognitionGUI:
                                       relief='flat', padx=20, pady=12, state='disabled')
         self.recognize_btn.pack(pady=5, fill='x')
         
+        self.batch_btn = tk.Button(recognition_section, text="📁 Recognize Folder", 
+                                  command=self.recognize_folder,
+                                  bg='#2ecc71', fg='white', font=('Arial', 10, 'bold'),
+                                  relief='flat', padx=20, pady=6, state='disabled')
+        self.batch_btn.pack(pady=(0, 5), fill='x')
+        
         # Model info section
         info_section = tk.LabelFrame(left_frame, text="💾 5. Model Management", 
                                     font=('Arial', 10, 'bold'),
@@ -294,61 +324,129 @@ class FaceRecognitionGUI:
             if self.is_trained:
                 self.recognize_btn.config(state='normal')
                 
-    def train_model_threaded(self):
-        threading.Thread(target=self.train_model, daemon=True).start()
+    def submit_job(self, name, fn, *args, on_done=None, on_error=None, on_cancel=None):
+        """Jalankan fn di worker thread; progress bar & tombol cancel aktif selama ada job"""
+        def finished(callback):
+            def wrapper(*result):
+                self.update_job_controls()
+                if callback is not None:
+                    callback(*result)
+            return wrapper
+        
+        job = self.jobs.submit(name, fn, *args,
+                               on_done=finished(on_done), on_error=finished(on_error),
+                               on_cancel=finished(on_cancel), on_progress=self.on_job_progress)
+        self.update_job_controls()
+        return job
+        
+    def update_job_controls(self):
+        if self.jobs.active_jobs():
+            self.job_progress.start(10)
+            self.cancel_btn.config(state='normal')
+        else:
+            self.job_progress.stop()
+            self.cancel_btn.config(state='disabled')
+            
+    def on_job_progress(self, job, message, fraction):
+        if fraction is not None:
+            message = f"{message} ({fraction:.0%})"
+        self.log_message(f"⏳ [{job.name}] {message}")
+        
+    def cancel_jobs(self):
+        self.jobs.cancel_all()
+        self.log_message("⛔ Membatalkan job yang sedang berjalan...")
+        
+    def on_close(self):
+        self.jobs.shutdown(self.root)
+        self.root.destroy()
         
     def train_model(self):
         if not self.dataset_folder:
             messagebox.showerror("Error", "Pilih folder dataset terlebih dahulu!")
             return
             
-        try:
-            self.train_btn.config(state='disabled', text='🔄 Training...')
-            self.log_message("🧠 Memulai training model...")
-            
-            # Train model
-            success = self.engine.train(self.dataset_folder)
-            
-            if success:
-                self.is_trained = True
-                self.log_message("✅ Training berhasil!")
-                
-                # Show model info
-                info = self.engine.get_model_info()
-                self.log_message(f"📊 Model Info:")
-                self.log_message(f"   👥 Jumlah orang: {info['num_people']}")
-                self.log_message(f"   📸 Total gambar: {info['total_images']}")
-                self.log_message(f"   📐 Ukuran gambar: {info['image_size']}")
-                self.log_message(f"   👻 Jumlah eigenfaces: {info['num_eigenfaces']}")
-                
-                # Enable buttons
-                self.train_btn.config(state='normal', text='🧠 Train')
-                self.reset_btn.config(state='normal')
-                if self.test_image_path:
-                    self.recognize_btn.config(state='normal')
-                    
-                # Update displays
-                self.update_eigenfaces_display()
-                self.update_meanface_display()
-                
-            else:
-                self.log_message("❌ Training gagal!")
-                self.train_btn.config(state='normal', text='🧠 Train')
-                
-        except Exception as e:
-            self.log_message(f"❌ Training error: {str(e)}")
-            self.train_btn.config(state='normal', text='🧠 Train')
-            messagebox.showerror("Error", f"Training gagal:\n{str(e)}")
+        self.train_btn.config(state='disabled', text='🔄 Training...')
+        self.log_message("🧠 Memulai training model...")
+        self.submit_job("train", self.train_job, self.dataset_folder, self.align_faces_var.get(),
+                        on_done=self.on_train_done, on_error=self.on_train_error,
+                        on_cancel=self.on_train_cancelled)
+        
+    def train_job(self, job, dataset_folder, align_faces=False):
+        # Worker thread: jangan menyentuh widget Tk di sini. Model baru dilatih
+        # di engine terpisah sehingga recognition dengan model lama tetap bisa jalan.
+        engine = EigenfaceEngine(align_faces=align_faces, calibration_holdout=0.2)
+        engine.metrics.add_callback(self.on_engine_metric)
+        engine.cancel_check = job.check_cancelled
+        job.report("Training di background...")
+        
+        success = engine.train(dataset_folder)
+        job.check_cancelled()
+        engine.cancel_check = None
+        return engine if success else None
+        
+    def on_train_done(self, engine):
+        self.train_btn.config(state='normal', text='🧠 Train')
+        if engine is None:
+            self.log_message("❌ Training gagal!")
+            return
             
+        self.engine = engine
+        self.is_trained = True
+        self.log_message("✅ Training berhasil!")
+        
+        # Show model info
+        info = self.engine.get_model_info()
+        self.log_message(f"📊 Model Info:")
+        self.log_message(f"   👥 Jumlah orang: {info['num_people']}")
+        self.log_message(f"   📸 Total gambar: {info['total_images']}")
+        self.log_message(f"   📐 Ukuran gambar: {info['image_size']}")
+        self.log_message(f"   👻 Jumlah eigenfaces: {info['num_eigenfaces']}")
+        if info['calibration'] is not None:
+            # Threshold hasil kalibrasi sebagai acuan slider
+            self.log_message(f"   📏 Kalibrasi (EER {info['calibration']['eer']:.1%}):")
+            for point in info['calibration']['operating_points']:
+                self.log_message(f"      FAR {point['far']:g} -> threshold {point['threshold']:.3f} "
+                                 f"(TAR {point['tar']:.1%})")
+        
+        # Enable buttons
+        self.reset_btn.config(state='normal')
+        self.batch_btn.config(state='normal')
+        if self.test_image_path:
+            self.recognize_btn.config(state='normal')
+            
+        # Update displays
+        self.update_eigenfaces_display()
+        self.update_meanface_display()
+        
+    def on_train_error(self, error):
+        self.log_message(f"❌ Training error: {str(error)}")
+        self.train_btn.config(state='normal', text='🧠 Train')
+        messagebox.showerror("Error", f"Training gagal:\n{str(error)}")
+        
+    def on_train_cancelled(self):
+        self.log_message("⛔ Training dibatalkan, model lama tetap dipakai")
+        self.train_btn.config(state='normal', text='🧠 Train')
+            
+    def engine_busy(self, action):
+        """True (dan tampilkan info) jika masih ada job yang memakai engine saat ini"""
+        if self.jobs.active_jobs():
+            messagebox.showinfo("Info", f"Tunggu job selesai atau cancel job sebelum {action}.")
+            return True
+        return False
+        
     def reset_model(self):
+        if self.engine_busy("reset model"):
+            return
         if messagebox.askyesno("Konfirmasi", "Reset model training?\nAnda perlu train ulang."):
             self.engine = EigenfaceEngine()
+            self.engine.metrics.add_callback(self.on_engine_metric)
             self.is_trained = False
             self.log_message("🔄 Model di-reset")
             
             # Reset buttons
             self.reset_btn.config(state='disabled')
             self.recognize_btn.config(state='disabled')
+            self.batch_btn.config(state='disabled')
             
             # Clear displays
             for widget in self.eigenfaces_frame.winfo_children():
@@ -423,9 +521,8 @@ class FaceRecognitionGUI:
             images_frame.pack(fill='x', padx=20, pady=5)
             
             for i, img_path in enumerate(images[:12]):  # Show max 12 per person
-                try:
-                    img = Image.open(img_path)
-                    img = img.resize((80, 80), Image.Resampling.LANCZOS)
+                img = load_thumbnail(img_path, (80, 80))
+                if img is not None:
                     photo = ImageTk.PhotoImage(img)
                     
                     col = i % 6
@@ -436,9 +533,6 @@ class FaceRecognitionGUI:
                     img_label = tk.Label(row_frame, image=photo, bg='white', relief='solid', bd=1)
                     img_label.image = photo  # Keep reference
                     img_label.pack(side='left', padx=2)
-                    
-                except Exception as e:
-                    print(f"Error loading {img_path}: {e}")
             
             if len(images) > 12:
                 tk.Label(images_frame, text=f"... dan {len(images)-12} gambar lainnya", 
@@ -447,6 +541,9 @@ class FaceRecognitionGUI:
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
         
+        stats = image_memory_cache.get_stats()
+        self.log_message(f"🗃️ Image cache: {stats['hits']} hit, {stats['misses']} miss, {stats['items']} item")
+        
     def recognize_face(self):
         if not self.is_trained:
             messagebox.showerror("Error", "Train model terlebih dahulu!")
@@ -456,27 +553,88 @@ class FaceRecognitionGUI:
             messagebox.showerror("Error", "Pilih gambar test terlebih dahulu!")
             return
             
-        try:
-            self.recognize_btn.config(state='disabled', text='🔄 Recognizing...')
+        self.recognize_btn.config(state='disabled', text='🔄 Recognizing...')
+        self.submit_job("recognize", self.recognize_job, self.engine, self.test_image_path,
+                        self.threshold_var.get(),
+                        on_done=self.on_recognize_done, on_error=self.on_recognize_error,
+                        on_cancel=self.on_recognize_cancelled)
+        
+    def recognize_job(self, job, engine, image_path, threshold):
+        return engine.recognize(image_path, threshold)
+        
+    def on_recognize_done(self, result):
+        self.recognize_btn.config(state='normal', text='🚀 Recognize Face')
+        if result.get('status') == 'error':
+            self.on_recognize_error(result['message'])
+            return
+            
+        # Update interactive display
+        self.update_recognition_display(result)
+        
+        # Log result
+        if result['recognized']:
+            self.log_message(f"✅ Recognized: {result['person']} (distance: {result['distance']:.4f})")
+        else:
+            self.log_message(f"❌ Not recognized (distance: {result['distance']:.4f})")
+            
+    def on_recognize_error(self, error):
+        self.log_message(f"❌ Recognition error: {str(error)}")
+        self.recognize_btn.config(state='normal', text='🚀 Recognize Face')
+        messagebox.showerror("Error", f"Recognition gagal:\n{str(error)}")
+        
+    def on_recognize_cancelled(self):
+        self.recognize_btn.config(state='normal', text='🚀 Recognize Face')
+        
+    def recognize_folder(self):
+        if not self.is_trained:
+            messagebox.showerror("Error", "Train model terlebih dahulu!")
+            return
             
-            # Recognize
-            result = self.engine.recognize(self.test_image_path, self.threshold_var.get())
+        folder = filedialog.askdirectory(title="Pilih Folder Gambar Test")
+        if not folder:
+            return
             
-            # Update interactive display
-            self.update_recognition_display(result)
+        self.batch_btn.config(state='disabled', text='🔄 Recognizing...')
+        self.log_message(f"📁 Batch recognition: {os.path.basename(folder)}")
+        self.submit_job("batch", self.batch_job, self.engine, folder, self.threshold_var.get(),
+                        on_done=self.on_batch_done, on_error=self.on_batch_error,
+                        on_cancel=self.on_batch_cancelled)
+        
+    def batch_job(self, job, engine, folder, threshold):
+        engine.cancel_check = job.check_cancelled
+        try:
+            return engine.recognize_many(folder, threshold=threshold)
+        finally:
+            engine.cancel_check = None
+        
+    def on_batch_done(self, batch):
+        self.batch_btn.config(state='normal', text='📁 Recognize Folder')
+        if batch.get('status') == 'error':
+            self.on_batch_error(batch['message'])
+            return
             
-            # Log result
-            if result['recognized']:
-                self.log_message(f"✅ Recognized: {result['person']} (distance: {result['distance']:.4f})")
+        recognized = 0
+        for result in batch['results']:
+            filename = os.path.basename(result['image_path'])
+            if result.get('status') == 'error':
+                self.log_message(f"   ⚠️ {filename}: {result['message']}")
+            elif result['recognized']:
+                recognized += 1
+                self.log_message(f"   ✅ {filename}: {result['person']} ({result['distance']:.4f})")
             else:
-                self.log_message(f"❌ Not recognized (distance: {result['distance']:.4f})")
+                self.log_message(f"   ❌ {filename}: Unknown ({result['distance']:.4f})")
                 
-            self.recognize_btn.config(state='normal', text='🚀 Recognize Face')
-            
-        except Exception as e:
-            self.log_message(f"❌ Recognition error: {str(e)}")
-            self.recognize_btn.config(state='normal', text='🚀 Recognize Face')
-            messagebox.showerror("Error", f"Recognition gagal:\n{str(e)}")
+        self.log_message(f"📁 Batch selesai: {recognized}/{batch['num_images']} dikenali, "
+                         f"{batch['timing']['per_image_ms']:.2f} ms/gambar")
+        
+    def on_batch_error(self, error):
+        self.log_message(f"❌ Batch recognition error: {str(error)}")
+        self.batch_btn.config(state='normal', text='📁 Recognize Folder')
+        messagebox.showerror("Error", f"Batch recognition gagal:\n{str(error)}")
+        
+    def on_batch_cancelled(self):
+        self.log_message("⛔ Batch recognition dibatalkan")
+        self.batch_btn.config(state='normal', text='📁 Recognize Folder')
             
     def update_recognition_display(self, result):
         # Clear previous results
@@ -496,8 +654,7 @@ class FaceRecognitionGUI:
         
         # Load and display test image
         try:
-            test_img = Image.open(self.test_image_path)
-            test_img = test_img.resize((150, 150), Image.Resampling.LANCZOS)
+            test_img = load_thumbnail(self.test_image_path, (150, 150))
             test_photo = ImageTk.PhotoImage(test_img)
             
             test_label = tk.Label(test_section, image=test_photo, bg='#f8f9fa')
@@ -551,8 +708,7 @@ class FaceRecognitionGUI:
             
             for i, img_path in enumerate(samples):
                 try:
-                    img = Image.open(img_path)
-                    img = img.resize((100, 100), Image.Resampling.LANCZOS)
+                    img = load_thumbnail(img_path, (100, 100))
                     photo = ImageTk.PhotoImage(img)
                     
                     img_label = tk.Label(images_frame, image=photo, bg='white', 
@@ -600,6 +756,7 @@ class FaceRecognitionGUI:
 👥 Number of People: {info['num_people']}
 📸 Total Images: {info['total_images']}
 📐 Image Size: {info['image_size']}
+🎯 Face Alignment: {'Ya' if info['face_alignment'] else 'Tidak'}
 👻 Number of Eigenfaces: {info['num_eigenfaces']}
 
 🧮 Top 10 Eigenvalues:
@@ -607,6 +764,15 @@ class FaceRecognitionGUI:
         for i, val in enumerate(info['eigenvalues'][:10], 1):
             info_text += f"   {i:2d}. {val:.2f}\n"
             
+        if info['calibration'] is not None:
+            info_text += f"\n📏 Kalibrasi threshold (EER {info['calibration']['eer']:.1%}):\n"
+            for point in info['calibration']['operating_points']:
+                info_text += f"   FAR {point['far']:g}: {point['threshold']:.3f} (TAR {point['tar']:.1%})\n"
+            
+        stats = image_memory_cache.get_stats()
+        info_text += (f"\n🗃️ Image Cache: {stats['hits']} hit / {stats['misses']} miss "
+                      f"({stats['hit_rate']:.0%}), {stats['items']} item, {stats['bytes'] / 2**20:.1f} MB\n")
+            
         messagebox.showinfo("Model Info", info_text)
         
     def save_model(self):
@@ -615,26 +781,38 @@ class FaceRecognitionGUI:
             return
             
         try:
-            self.engine.save_model("face_recognition_model.pkl")
-            self.log_message("💾 Model saved: face_recognition_model.pkl")
+            if not self.engine.save_model("face_recognition_model"):
+                raise RuntimeError("Model tidak bisa disimpan")
+            self.log_message("💾 Model saved: face_recognition_model")
             messagebox.showinfo("Success", "Model berhasil disimpan!")
         except Exception as e:
             self.log_message(f"❌ Save error: {str(e)}")
             messagebox.showerror("Error", f"Gagal menyimpan model:\n{str(e)}")
             
     def load_model(self):
+        if self.engine_busy("load model"):
+            return
+        # Model folder: pilih model.json di dalamnya; format lama: file .pkl
         file_path = filedialog.askopenfilename(
             title="Load Model",
-            filetypes=[("Pickle files", "*.pkl")]
+            filetypes=[("Model folder (model.json)", "model.json"), ("Pickle files (format lama)", "*.pkl")]
         )
         if file_path:
+            if os.path.basename(file_path) == "model.json":
+                file_path = os.path.dirname(file_path)
             try:
-                self.engine.load_model(file_path)
+                # Load ke engine baru, engine lama hanya diganti jika load berhasil
+                engine = EigenfaceEngine()
+                if not engine.load_model(file_path):
+                    raise RuntimeError("Format model tidak valid atau tidak kompatibel")
+                engine.metrics.add_callback(self.on_engine_metric)
+                self.engine = engine
                 self.is_trained = True
                 self.log_message(f"📂 Model loaded: {os.path.basename(file_path)}")
                 
                 # Enable buttons
                 self.reset_btn.config(state='normal')
+                self.batch_btn.config(state='normal')
                 if self.test_image_path:
                     self.recognize_btn.config(state='normal')
                     
@@ -738,6 +916,12 @@ class FaceRecognitionGUI:
             tk.Label(self.meanface_frame, text=f"❌ Error: {str(e)}", 
                     font=('Arial', 12), bg='white', fg='#e74c3c').pack(expand=True)
             
+    def on_engine_metric(self, kind, name, value):
+        # Tampilkan durasi setiap tahap engine di Training Log. Callback ini bisa
+        # dipanggil dari worker thread, jadi update widget diteruskan ke thread UI.
+        if kind == 'timing':
+            self.jobs.call_soon(self.log_message, f"⏱️ {name}: {value:.3f}s")
+            
     def log_message(self, message):
         self.log_text.insert(tk.END, f"{message}\n")
         self.log_text.see(tk.END)
@@ -0,0 +1,96 @@
+import os
+import threading
+from collections import OrderedDict
+
+class LRUCache:
+    """
+    Cache in-memory LRU yang thread-safe, dibatasi jumlah item dan total byte.
+    
+    Dipakai untuk hasil decode gambar (wajah hasil preprocess dan thumbnail GUI)
+    agar file yang sama tidak di-decode ulang. Item yang paling lama tidak
+    dipakai dibuang lebih dulu saat batas terlampaui.
+    """
+    
+    def __init__(self, max_items=4096, max_bytes=128 * 2**20):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        
+        self._items = OrderedDict()    # key -> (value, nbytes)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key):
+        """Ambil value dan tandai sebagai baru dipakai; None jika tidak ada"""
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, key, value, nbytes):
+        """Simpan value (nbytes = perkiraan ukuran di memori)"""
+        if nbytes > self.max_bytes or self.max_items <= 0:
+            return
+        
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._items[key] = (value, nbytes)
+            self.current_bytes += nbytes
+            self._evict()
+    
+    def _evict(self):
+        # Dipanggil dengan lock dipegang
+        while self._items and (len(self._items) > self.max_items or self.current_bytes > self.max_bytes):
+            _, (_, evicted_bytes) = self._items.popitem(last=False)
+            self.current_bytes -= evicted_bytes
+            self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.current_bytes = 0
+    
+    def configure(self, max_items=None, max_bytes=None):
+        """Ubah batas cache; item berlebih langsung dibuang"""
+        with self._lock:
+            if max_items is not None:
+                self.max_items = max_items
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._evict()
+    
+    def get_stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+                "items": len(self._items),
+                "bytes": self.current_bytes
+            }
+
+def file_cache_key(kind, path, size):
+    """
+    Key cache untuk hasil decode file: (kind, path absolut, size, mtime, ukuran file)
+    
+    mtime dan ukuran file ikut di key sehingga file yang diubah otomatis
+    dianggap miss. Return None jika file tidak bisa di-stat.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (kind, os.path.abspath(path), tuple(size), stat.st_mtime_ns, stat.st_size)
+
+# Cache bersama untuk preprocess (utils) dan thumbnail GUI
+image_memory_cache = LRUCache()
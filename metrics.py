@@ -0,0 +1,96 @@
+import os
+import time
+from contextlib import contextmanager
+
+class EngineMetrics:
+    """
+    Registry metrics EigenfaceEngine: durasi per tahap, counter, dan nilai
+    (gauge atau list per komponen, mis. iterasi/residual per eigenpair).
+    
+    Callback yang didaftarkan dipanggil setiap ada update dengan argumen
+    (kind, name, value), kind = 'timing' | 'counter' | 'value'.
+    """
+    
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+        self.values = {}
+        self._callbacks = []
+    
+    def add_callback(self, callback):
+        self._callbacks.append(callback)
+    
+    def remove_callback(self, callback):
+        if callback in self._callbacks:
+            self._callbacks.remove(callback)
+    
+    def _emit(self, kind, name, value):
+        for callback in list(self._callbacks):
+            try:
+                callback(kind, name, value)
+            except Exception as e:
+                print(f"Error pada metrics callback: {str(e)}")
+    
+    @contextmanager
+    def timer(self, stage):
+        """Ukur durasi blok kode sebagai tahap `stage` (detik)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_timing(stage, time.perf_counter() - start)
+    
+    def record_timing(self, stage, seconds):
+        self.timings[stage] = seconds
+        self._emit('timing', stage, seconds)
+    
+    def increment(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+        self._emit('counter', name, self.counters[name])
+    
+    def set_value(self, name, value):
+        self.values[name] = value
+        self._emit('value', name, value)
+    
+    def reset_timings(self):
+        self.timings = {}
+    
+    def reset(self):
+        self.timings = {}
+        self.counters = {}
+        self.values = {}
+    
+    def snapshot(self):
+        return {
+            'timings': dict(self.timings),
+            'counters': dict(self.counters),
+            'values': {name: list(value) if isinstance(value, (list, tuple)) else value
+                       for name, value in self.values.items()}
+        }
+    
+    def to_prometheus(self, prefix="eigenface"):
+        """Format metrics sebagai Prometheus text exposition format"""
+        lines = [f"# TYPE {prefix}_stage_seconds gauge"]
+        for stage, seconds in sorted(self.timings.items()):
+            lines.append(f'{prefix}_stage_seconds{{stage="{stage}"}} {seconds:.9f}')
+        
+        for name, count in sorted(self.counters.items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {count}")
+        
+        for name, value in sorted(self.values.items()):
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            if isinstance(value, (list, tuple)):
+                for i, item in enumerate(value, 1):
+                    lines.append(f'{prefix}_{name}{{component="{i}"}} {float(item)}')
+            else:
+                lines.append(f"{prefix}_{name} {float(value)}")
+        
+        return "\n".join(lines) + "\n"
+    
+    def write_prometheus(self, file_path, prefix="eigenface"):
+        """Tulis metrics ke file (mis. untuk textfile collector node_exporter) secara atomik"""
+        tmp_path = file_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus(prefix))
+        os.replace(tmp_path, file_path)
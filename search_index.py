@@ -0,0 +1,508 @@
+import os
+import json
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from utils import (squared_euclidean_distances, top_k_smallest, create_folder_if_not_exists,
+                   save_npy_atomic, save_json_atomic, kmeans, assign_to_nearest)
+
+# Index dibangun ulang (enroll/unenroll) setelah baris yang ditambah/dihapus secara
+# incremental melebihi fraksi ini dari jumlah baris saat build terakhir
+REBUILD_CHANGE_RATIO = 0.5
+
+def accumulate_dtype(dtype):
+    """Presisi perhitungan jarak: minimal float32 meskipun vektor disimpan float16"""
+    return np.result_type(dtype, np.float32)
+
+def sq_norms(vectors):
+    """||v||^2 per baris, diakumulasi dengan presisi accumulate_dtype"""
+    return np.einsum('ij,ij->i', vectors, vectors, dtype=accumulate_dtype(vectors.dtype))
+
+class IVFIndex:
+    """
+    Index approximate nearest neighbour IVF (inverted file) untuk projected_faces.
+    
+    Gallery dikelompokkan dengan k-means (coarse quantizer) menjadi n_lists
+    cluster. Query hanya dibandingkan dengan vektor di n_probe cluster dengan
+    centroid terdekat, sehingga biaya per query ~ O((n_lists + M * n_probe / n_lists) * k)
+    alih-alih O(M * k). n_probe adalah knob recall vs latency; n_probe >= n_lists
+    sama dengan pencarian exact.
+    """
+    INDEX_TYPE = 'ivf'
+    EXACT = False               # hasil bisa kurang dari k / tidak exact, engine menyediakan fallback
+    SHARES_GALLERY = False      # list_vectors selalu disimpan sendiri (urutan per cluster)
+    
+    def __init__(self, n_lists=None, n_probe=8, n_iter=20, max_train_points=64):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.max_train_points = max_train_points
+        
+        self.centroids = None
+        self.order = None           # indeks baris gallery, diurutkan per cluster
+        self.offsets = None         # batas cluster di dalam order (n_lists + 1)
+        self.list_vectors = None    # vektor gallery dengan urutan order (contiguous per cluster)
+        self.list_sq_norms = None
+        
+        # Jumlah baris saat build dan baris yang ditambah/dihapus sejak itu (kebijakan rebuild)
+        self.n_built = 0
+        self.n_changed = 0
+    
+    def build(self, vectors, labels=None):
+        """
+        Bangun index dari matriks gallery
+        
+        Args:
+            vectors (np.array): Matriks gallery (M x k)
+            labels (np.array): Label per baris (tidak dipakai IVF)
+        """
+        vectors = np.asarray(vectors)
+        n_lists = self.n_lists or max(1, int(4 * np.sqrt(len(vectors))))
+        n_lists = min(n_lists, len(vectors))
+        
+        self.centroids = kmeans(vectors, n_lists, n_iter=self.n_iter,
+                                max_train_points=n_lists * self.max_train_points)
+        self.n_lists = n_lists
+        self._set_lists(assign_to_nearest(vectors, self.centroids), np.arange(len(vectors)), vectors)
+        self.n_built = len(vectors)
+        self.n_changed = 0
+        return self
+    
+    @property
+    def n_rows(self):
+        """Jumlah baris gallery yang di-index"""
+        return len(self.order)
+    
+    def get_params(self):
+        """Parameter konstruktor (untuk membangun ulang index dengan setting yang sama)"""
+        return {'n_lists': self.n_lists, 'n_probe': self.n_probe, 'n_iter': self.n_iter,
+                'max_train_points': self.max_train_points}
+    
+    def needs_rebuild(self, max_change=REBUILD_CHANGE_RATIO):
+        """True jika perubahan incremental sudah cukup banyak sehingga centroid k-means perlu dihitung ulang"""
+        return self.n_changed > max_change * max(self.n_built, 1)
+    
+    def _set_lists(self, assignment, order, vectors):
+        """Susun ulang list dari cluster per posisi, indeks baris dan vektor (urutan sama)"""
+        position_order = np.argsort(assignment, kind='stable')
+        self.order = order[position_order]
+        self.offsets = np.searchsorted(assignment[position_order], np.arange(self.n_lists + 1))
+        self.list_vectors = np.ascontiguousarray(vectors[position_order])
+        self.list_sq_norms = sq_norms(self.list_vectors)
+    
+    def translate(self, shift):
+        """
+        Geser semua vektor (dan centroid) sebesar shift, mis. setelah mean_face berubah;
+        jarak antar vektor dan pembagian cluster tidak berubah
+        """
+        self.centroids = (self.centroids + shift).astype(self.centroids.dtype, copy=False)
+        self.list_vectors = (self.list_vectors + shift).astype(self.list_vectors.dtype, copy=False)
+        self.list_sq_norms = sq_norms(self.list_vectors)
+    
+    def add(self, vectors, labels=None):
+        """
+        Tambah baris baru (indeks baris melanjutkan n_rows) ke list centroid terdekat, tanpa k-means ulang
+        
+        Args:
+            vectors (np.array): Vektor baru (m x k)
+            labels (np.array): Label baris baru (tidak dipakai IVF)
+        """
+        vectors = np.asarray(vectors, dtype=self.list_vectors.dtype)
+        list_of_position = np.repeat(np.arange(self.n_lists), np.diff(self.offsets))
+        new_rows = np.arange(self.n_rows, self.n_rows + len(vectors))
+        self._set_lists(np.concatenate([list_of_position, assign_to_nearest(vectors, self.centroids)]),
+                        np.concatenate([self.order, new_rows]), np.concatenate([self.list_vectors, vectors]))
+        self.n_changed += len(vectors)
+    
+    def remove(self, removed, labels=None):
+        """
+        Hapus baris dari list; baris sisanya dinomori ulang berurutan
+        
+        Args:
+            removed (np.array): Mask boolean baris yang dihapus (panjang n_rows)
+            labels (np.array): Label baris yang tersisa (tidak dipakai IVF)
+        """
+        keep = ~removed[self.order]
+        new_row = np.cumsum(~removed) - 1
+        list_of_position = np.repeat(np.arange(self.n_lists), np.diff(self.offsets))
+        self._set_lists(list_of_position[keep], new_row[self.order[keep]], self.list_vectors[keep])
+        self.n_changed += int(removed.sum())
+    
+    def search(self, queries, k=5, n_probe=None):
+        """
+        Cari k tetangga terdekat (approximate)
+        
+        Args:
+            queries (np.array): Matriks query (Q x k)
+            k (int): Jumlah tetangga terdekat
+            n_probe (int): Jumlah cluster yang diperiksa (default: self.n_probe)
+        
+        Returns:
+            indices (np.array): Indeks baris gallery (Q x k), terdekat dulu; -1 jika kurang
+            sq_distances (np.array): Squared euclidean distance (Q x k)
+        """
+        # Jarak dihitung dan diurutkan minimal float32 walaupun list_vectors float16
+        dtype = accumulate_dtype(np.result_type(queries.dtype, self.list_vectors.dtype))
+        queries = np.atleast_2d(queries).astype(dtype, copy=False)
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        sq_distances = np.full((len(queries), k), np.inf, dtype=dtype)
+        
+        probe_lists = top_k_smallest(squared_euclidean_distances(queries, self.centroids.astype(dtype, copy=False)),
+                                     n_probe)
+        for q, lists in enumerate(probe_lists):
+            rows = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in lists])
+            if len(rows) == 0:
+                continue
+            
+            candidates = self.list_vectors[rows].astype(dtype, copy=False)
+            candidate_sq = squared_euclidean_distances(queries[q], candidates,
+                                                       self.list_sq_norms[rows].astype(dtype, copy=False))
+            best = top_k_smallest(candidate_sq, k)[0]
+            indices[q, :len(best)] = self.order[rows[best]]
+            sq_distances[q, :len(best)] = candidate_sq[0, best]
+        
+        return indices, sq_distances
+    
+    def save(self, folder_path):
+        create_folder_if_not_exists(folder_path)
+        for name in ('centroids', 'order', 'offsets', 'list_vectors', 'list_sq_norms'):
+            save_npy_atomic(os.path.join(folder_path, name + ".npy"), getattr(self, name))
+        save_json_atomic(os.path.join(folder_path, "index.json"),
+                         {'index_type': self.INDEX_TYPE, 'n_lists': self.n_lists,
+                          'n_probe': self.n_probe, 'n_iter': self.n_iter,
+                          'n_built': self.n_built, 'n_changed': self.n_changed})
+    
+    @classmethod
+    def load(cls, folder_path, mmap=True):
+        with open(os.path.join(folder_path, "index.json"), 'r') as f:
+            params = json.load(f)
+        index = cls(n_lists=params['n_lists'], n_probe=params['n_probe'], n_iter=params['n_iter'])
+        mmap_mode = 'r' if mmap else None
+        for name in ('centroids', 'order', 'offsets', 'list_vectors', 'list_sq_norms'):
+            setattr(index, name, np.load(os.path.join(folder_path, name + ".npy"), mmap_mode=mmap_mode))
+        index.n_built = params.get('n_built', index.n_rows)
+        index.n_changed = params.get('n_changed', 0)
+        return index
+
+class ShardedIndex:
+    """
+    Gallery yang dipecah menjadi beberapa shard dengan pencarian scatter-gather exact.
+    
+    Setiap shard menyimpan vektor contiguous (view gallery jika barisnya
+    berurutan, selain itu salinan), ||g||^2 dan indeks baris globalnya. Query
+    dicari di semua shard secara paralel (thread pool; GEMM dan argpartition
+    NumPy melepas GIL), top-k per shard lalu digabung menjadi top-k global. Shard dibagi per identitas (semua wajah satu orang di shard
+    yang sama, jumlah baris diseimbangkan) atau per rentang baris, dan disimpan
+    di folder terpisah sehingga bisa di-load sebagian (mis. hanya orang yang
+    relevan untuk satu lokasi).
+    """
+    INDEX_TYPE = 'sharded'
+    PARTITIONS = ('identity', 'rows')
+    EXACT = True                # scatter-gather exact: bisa melayani pencarian exact engine
+    SHARES_GALLERY = True       # vektor shard bisa diambil dari gallery model (tidak disimpan dua kali)
+    
+    def __init__(self, n_shards=None, partition='identity', num_workers=None):
+        if partition not in self.PARTITIONS:
+            raise ValueError(f"partition harus salah satu dari {self.PARTITIONS}")
+        self.n_shards = n_shards
+        self.partition = partition
+        self.num_workers = num_workers
+        
+        self.shard_ids = []
+        self.shards = []            # list dict: 'vectors', 'sq_norms', 'rows', 'labels'
+        self.n_rows = 0             # jumlah baris gallery seluruh shard (termasuk yang tidak di-load)
+        self.n_built = 0            # jumlah baris saat build (kebijakan rebuild)
+        self.n_changed = 0          # baris yang ditambah/dihapus sejak build
+        self._executor = None
+        self._executor_pid = None
+    
+    @staticmethod
+    def _take_rows(gallery, rows):
+        """Baris gallery untuk satu shard: view (tanpa copy, tetap memory-map) jika rows berurutan"""
+        if len(rows) and rows[-1] - rows[0] + 1 == len(rows):
+            return gallery[rows[0]:rows[-1] + 1]
+        return np.ascontiguousarray(gallery[rows])
+    
+    def _partition_rows(self, n_rows, labels):
+        """Indeks baris (terurut) untuk setiap shard"""
+        if self.partition == 'rows' or labels is None:
+            return np.array_split(np.arange(n_rows), self.n_shards)
+        
+        # Orang dengan wajah terbanyak dulu, selalu ke shard yang paling sedikit barisnya
+        labels = np.asarray(labels)
+        counts = np.bincount(labels)
+        shard_of_label = np.zeros(len(counts), dtype=np.int64)
+        shard_rows = np.zeros(self.n_shards, dtype=np.int64)
+        for label in np.argsort(-counts, kind='stable'):
+            target = int(np.argmin(shard_rows))
+            shard_of_label[label] = target
+            shard_rows[target] += counts[label]
+        
+        assignment = shard_of_label[labels]
+        return [np.flatnonzero(assignment == shard) for shard in range(self.n_shards)]
+    
+    def build(self, vectors, labels=None):
+        """
+        Bangun shard dari matriks gallery
+        
+        Args:
+            vectors (np.array): Matriks gallery (M x k)
+            labels (np.array): Label per baris (dipakai partition='identity')
+        """
+        vectors = np.asarray(vectors)
+        self.n_shards = max(1, min(self.n_shards or os.cpu_count() or 1, len(vectors)))
+        
+        self.shard_ids = []
+        self.shards = []
+        for shard_id, rows in enumerate(self._partition_rows(len(vectors), labels)):
+            if len(rows) == 0:
+                continue
+            shard_vectors = self._take_rows(vectors, rows)
+            self.shard_ids.append(shard_id)
+            self.shards.append({
+                'vectors': shard_vectors,
+                'sq_norms': sq_norms(shard_vectors),
+                'rows': rows.astype(np.int64),
+                'labels': np.asarray(labels)[rows] if labels is not None else None
+            })
+        self.n_rows = len(vectors)
+        self.n_built = len(vectors)
+        self.n_changed = 0
+        return self
+    
+    def needs_rebuild(self, max_change=REBUILD_CHANGE_RATIO):
+        """True jika perubahan incremental sudah cukup banyak sehingga pembagian shard perlu diseimbangkan ulang"""
+        return self.n_changed > max_change * max(self.n_built, 1)
+    
+    def _set_shard_vectors(self, shard, vectors):
+        shard['vectors'] = np.ascontiguousarray(vectors)
+        shard['sq_norms'] = sq_norms(shard['vectors'])
+    
+    def translate(self, shift):
+        """Geser semua vektor sebesar shift (mis. setelah mean_face berubah)"""
+        for shard in self.shards:
+            self._set_shard_vectors(shard, (shard['vectors'] + shift).astype(shard['vectors'].dtype, copy=False))
+    
+    def add(self, vectors, labels=None):
+        """
+        Tambah baris baru (indeks baris melanjutkan n_rows) tanpa membagi ulang shard
+        
+        partition='identity': baris orang yang sudah ada masuk ke shard orang tersebut,
+        orang baru ke shard dengan baris paling sedikit. partition='rows': shard terakhir.
+        
+        Args:
+            vectors (np.array): Vektor baru (m x k)
+            labels (np.array): Label baris baru
+        """
+        new_rows = np.arange(self.n_rows, self.n_rows + len(vectors))
+        if self.partition == 'rows' or labels is None or self.shards[0]['labels'] is None:
+            target = np.full(len(vectors), len(self.shards) - 1)
+        else:
+            labels = np.asarray(labels)
+            shard_of_label = {}
+            for position, shard in enumerate(self.shards):
+                shard_of_label.update((int(label), position) for label in np.unique(shard['labels']))
+            shard_rows = [len(shard['rows']) for shard in self.shards]
+            target = np.empty(len(vectors), dtype=np.int64)
+            for label in np.unique(labels):
+                if int(label) not in shard_of_label:
+                    shard_of_label[int(label)] = int(np.argmin(shard_rows))
+                position = shard_of_label[int(label)]
+                target[labels == label] = position
+                shard_rows[position] += int(np.sum(labels == label))
+        
+        for position in np.unique(target):
+            shard = self.shards[position]
+            mask = target == position
+            shard['rows'] = np.concatenate([shard['rows'], new_rows[mask]])
+            if shard['labels'] is not None:
+                shard['labels'] = np.concatenate([shard['labels'], labels[mask]])
+            self._set_shard_vectors(shard, np.concatenate([shard['vectors'],
+                                                           np.asarray(vectors[mask], dtype=shard['vectors'].dtype)]))
+        self.n_rows += len(vectors)
+        self.n_changed += len(vectors)
+    
+    def remove(self, removed, labels=None):
+        """
+        Hapus baris dari shard; baris sisanya dinomori ulang berurutan, shard yang kosong dibuang
+        
+        Args:
+            removed (np.array): Mask boolean baris yang dihapus (panjang n_rows)
+            labels (np.array): Label baris yang tersisa (setelah dinomori ulang)
+        """
+        new_row = np.cumsum(~removed) - 1
+        shard_ids, shards = [], []
+        for shard_id, shard in zip(self.shard_ids, self.shards):
+            keep = ~removed[shard['rows']]
+            if not keep.any():
+                continue
+            shard['rows'] = new_row[shard['rows'][keep]]
+            if shard['labels'] is not None:
+                shard['labels'] = labels[shard['rows']] if labels is not None else shard['labels'][keep]
+            if not keep.all():
+                self._set_shard_vectors(shard, shard['vectors'][keep])
+            shard_ids.append(shard_id)
+            shards.append(shard)
+        self.shard_ids, self.shards = shard_ids, shards
+        self.n_rows -= int(removed.sum())
+        self.n_changed += int(removed.sum())
+    
+    def get_params(self):
+        """Parameter konstruktor (untuk membangun ulang index dengan setting yang sama)"""
+        return {'n_shards': self.n_shards, 'partition': self.partition, 'num_workers': self.num_workers}
+    
+    @property
+    def is_partial(self):
+        """True jika hanya sebagian shard yang di-load"""
+        return sum(len(shard['rows']) for shard in self.shards) < self.n_rows
+    
+    def search_labels(self):
+        """Label per baris gallery global dari shard yang di-load (-1 untuk baris di shard lain)"""
+        labels = np.full(self.n_rows, -1, dtype=np.int64)
+        for shard in self.shards:
+            labels[shard['rows']] = shard['labels']
+        return labels
+    
+    def _pool(self):
+        # Thread pool tidak selamat dari fork (server pre-fork): buat ulang per proses
+        if self._executor is None or self._executor_pid != os.getpid():
+            workers = self.num_workers or min(len(self.shards), os.cpu_count() or 1)
+            self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="shard-search")
+            self._executor_pid = os.getpid()
+        return self._executor
+    
+    @staticmethod
+    def _search_shard(shard, queries, k):
+        # Vektor float16 di-upcast agar jarak dihitung dan diurutkan minimal float32
+        dtype = queries.dtype
+        sq_distances = squared_euclidean_distances(queries, shard['vectors'].astype(dtype, copy=False),
+                                                   shard['sq_norms'].astype(dtype, copy=False))
+        best = top_k_smallest(sq_distances, k)
+        return shard['rows'][best], np.take_along_axis(sq_distances, best, axis=1)
+    
+    def search(self, queries, k=5):
+        """
+        Cari k tetangga terdekat (exact) di semua shard yang di-load
+        
+        Args:
+            queries (np.array): Matriks query (Q x k)
+            k (int): Jumlah tetangga terdekat
+        
+        Returns:
+            indices (np.array): Indeks baris gallery global (Q x k), terdekat dulu; -1 jika kurang
+            sq_distances (np.array): Squared euclidean distance (Q x k)
+        """
+        queries = np.atleast_2d(queries)
+        queries = queries.astype(accumulate_dtype(queries.dtype), copy=False)
+        # Jika hanya sebagian shard di-load, hasil dibatasi ke baris yang ada
+        k = min(k, sum(len(shard['rows']) for shard in self.shards))
+        
+        # Scatter: top-k per shard (paralel jika lebih dari satu shard)
+        if len(self.shards) > 1:
+            partials = list(self._pool().map(lambda shard: self._search_shard(shard, queries, k), self.shards))
+        else:
+            partials = [self._search_shard(shard, queries, k) for shard in self.shards]
+        
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        sq_distances = np.full((len(queries), k), np.inf, dtype=np.result_type(queries.dtype, np.float32))
+        if not partials:
+            return indices, sq_distances
+        
+        # Gather: gabungkan kandidat semua shard (Q x n_shards*k) lalu ambil top-k global
+        candidate_rows = np.concatenate([rows for rows, _ in partials], axis=1)
+        candidate_sq = np.concatenate([sq for _, sq in partials], axis=1)
+        best = top_k_smallest(candidate_sq, k)
+        indices[:, :best.shape[1]] = np.take_along_axis(candidate_rows, best, axis=1)
+        sq_distances[:, :best.shape[1]] = np.take_along_axis(candidate_sq, best, axis=1)
+        return indices, sq_distances
+    
+    def save(self, folder_path, store_vectors=True):
+        """
+        Simpan setiap shard di subfolder shard_XXX ditambah manifest index.json
+        
+        Args:
+            store_vectors (bool): Simpan vektor shard; False jika gallery sudah
+                disimpan di model (vektor diambil dari gallery saat load)
+        """
+        create_folder_if_not_exists(folder_path)
+        manifest = []
+        for shard_id, shard in zip(self.shard_ids, self.shards):
+            shard_folder = os.path.join(folder_path, f"shard_{shard_id:03d}")
+            create_folder_if_not_exists(shard_folder)
+            for name in ('sq_norms', 'rows'):
+                save_npy_atomic(os.path.join(shard_folder, name + ".npy"), shard[name])
+            vectors_path = os.path.join(shard_folder, "vectors.npy")
+            if store_vectors:
+                save_npy_atomic(vectors_path, shard['vectors'])
+            elif os.path.exists(vectors_path):
+                os.remove(vectors_path)
+            if shard['labels'] is not None:
+                save_npy_atomic(os.path.join(shard_folder, "labels.npy"), shard['labels'])
+            manifest.append({
+                'shard_id': shard_id,
+                'rows': len(shard['rows']),
+                'labels': sorted(int(l) for l in np.unique(shard['labels'])) if shard['labels'] is not None else None
+            })
+        save_json_atomic(os.path.join(folder_path, "index.json"),
+                         {'index_type': self.INDEX_TYPE, 'n_shards': self.n_shards, 'partition': self.partition,
+                          'n_built': self.n_built, 'n_changed': self.n_changed,
+                          'vectors_stored': store_vectors, 'shards': manifest})
+    
+    @classmethod
+    def load(cls, folder_path, mmap=True, shards=None, gallery=None):
+        """
+        Load index dari folder
+        
+        Args:
+            shards (list): shard_id yang di-load (default: semua)
+            gallery (np.array): Gallery model (boleh memory-map), sumber vektor shard
+                jika vektor tidak disimpan di index; hanya baris shard yang di-load yang dibaca
+        """
+        with open(os.path.join(folder_path, "index.json"), 'r') as f:
+            params = json.load(f)
+        index = cls(n_shards=params['n_shards'], partition=params['partition'])
+        index.n_rows = sum(entry['rows'] for entry in params['shards'])
+        index.n_built = params.get('n_built', index.n_rows)
+        index.n_changed = params.get('n_changed', 0)
+        vectors_stored = params.get('vectors_stored', True)
+        if not vectors_stored and (gallery is None or len(gallery) != index.n_rows):
+            raise ValueError("Vektor shard tidak disimpan di index, gallery model dibutuhkan")
+        mmap_mode = 'r' if mmap else None
+        
+        wanted = None if shards is None else set(shards)
+        for entry in params['shards']:
+            if wanted is not None and entry['shard_id'] not in wanted:
+                continue
+            shard_folder = os.path.join(folder_path, f"shard_{entry['shard_id']:03d}")
+            shard = {name: np.load(os.path.join(shard_folder, name + ".npy"), mmap_mode=mmap_mode)
+                     for name in ('sq_norms', 'rows')}
+            if vectors_stored:
+                shard['vectors'] = np.load(os.path.join(shard_folder, "vectors.npy"), mmap_mode=mmap_mode)
+            else:
+                shard['vectors'] = cls._take_rows(gallery, shard['rows'])
+            labels_path = os.path.join(shard_folder, "labels.npy")
+            shard['labels'] = np.load(labels_path, mmap_mode=mmap_mode) if os.path.exists(labels_path) else None
+            index.shard_ids.append(entry['shard_id'])
+            index.shards.append(shard)
+        return index
+
+
+# Index yang tersedia untuk EigenfaceEngine(index_type=...)
+SEARCH_INDEXES = {
+    IVFIndex.INDEX_TYPE: IVFIndex,
+    ShardedIndex.INDEX_TYPE: ShardedIndex
+}
+
+def create_search_index(index_type, **params):
+    if index_type not in SEARCH_INDEXES:
+        raise ValueError(f"index_type harus salah satu dari {tuple(SEARCH_INDEXES)}")
+    return SEARCH_INDEXES[index_type](**params)
+
+def load_search_index(folder_path, mmap=True, gallery=None, **load_params):
+    with open(os.path.join(folder_path, "index.json"), 'r') as f:
+        index_type = json.load(f)['index_type']
+    index_class = SEARCH_INDEXES[index_type]
+    if index_class.SHARES_GALLERY:
+        load_params['gallery'] = gallery
+    return index_class.load(folder_path, mmap=mmap, **load_params)
@@ -0,0 +1,315 @@
+import os
+import json
+import time
+import signal
+import socket
+import queue
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+from eigenface_engine import EigenfaceEngine
+from utils import preprocess_image_bytes
+
+# Batas ukuran upload (byte) agar request besar tidak menghabiskan memori
+MAX_UPLOAD_BYTES = 16 * 2**20
+
+def to_json(data):
+    # Nilai numpy (label, distance) tidak bisa langsung di-serialize JSON
+    return json.dumps(data, default=lambda v: v.item() if hasattr(v, 'item') else str(v))
+
+class MicroBatcher:
+    """
+    Gabungkan request recognition yang datang bersamaan menjadi satu batch.
+    
+    Request pertama membuka window selama window_ms; semua request yang masuk
+    dalam window tersebut (maksimal max_batch) diproyeksikan dan dicari dengan
+    satu GEMM lewat EigenfaceEngine.recognize_vectors. Hanya thread batcher yang
+    memanggil engine, sehingga engine tidak perlu thread-safe. window_ms=0
+    berarti tanpa batching (satu request per batch).
+    """
+    
+    def __init__(self, engine, window_ms=5.0, max_batch=64, k=5):
+        self.engine = engine
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.k = k
+        
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name="eigenface-batcher", daemon=True)
+        self._thread.start()
+    
+    def submit(self, face, threshold=0.8):
+        """
+        Antrekan satu wajah (sudah dipreprocess, flattened)
+        
+        Returns:
+            Future: Hasil berupa dict dengan skema sama seperti recognize
+        """
+        future = Future()
+        self._queue.put((face, threshold, future))
+        return future
+    
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Sinyal berhenti: kembalikan ke queue agar loop keluar setelah batch ini
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+    
+    def _loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            
+            batch = self._collect(item)
+            faces = np.stack([face for face, _, _ in batch])
+            thresholds = [threshold for _, threshold, _ in batch]
+            
+            try:
+                with self.engine.metrics.timer('server_batch'):
+                    results = self.engine.recognize_vectors(faces, thresholds, k=self.k)
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            
+            self.engine.metrics.increment('server_batches')
+            self.engine.metrics.set_value('server_batch_size', len(batch))
+            for (_, _, future), result in zip(batch, results):
+                future.set_result(result)
+    
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+class RecognitionRequestHandler(BaseHTTPRequestHandler):
+    """
+    Endpoint:
+        POST /recognize?threshold=0.8  body: isi file gambar -> dict hasil recognize
+        POST /recognize?target_far=0.01 -> threshold dari kalibrasi model untuk FAR tersebut
+        GET  /health                   -> status dan info model
+        GET  /metrics                  -> metrics engine (format Prometheus)
+    """
+    server_version = "EigenfaceServer/1.0"
+    protocol_version = "HTTP/1.1"
+    
+    def _send(self, status, body, content_type="application/json", close=False):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        if close:
+            # send_header ikut menyetel self.close_connection
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def _send_error(self, status, message, close=False):
+        """
+        Kirim error JSON. close=True untuk error sebelum body dibaca: sisa body
+        di socket tidak boleh diparse sebagai request keep-alive berikutnya.
+        """
+        self._send(status, to_json({"status": "error", "message": message}), close=close)
+    
+    def do_GET(self):
+        path = urlparse(self.path).path
+        engine = self.server.engine
+        
+        if path == "/health":
+            info = engine.get_model_info() or {}
+            self._send(200, to_json({
+                "status": "ok",
+                "num_people": info.get('num_people'),
+                "total_images": info.get('total_images'),
+                "num_eigenfaces": info.get('num_eigenfaces'),
+                "batch_window_ms": self.server.batcher.window * 1000,
+                "worker_pid": os.getpid()
+            }))
+        elif path == "/metrics":
+            self._send(200, engine.metrics.to_prometheus(), content_type="text/plain; version=0.0.4")
+        else:
+            self._send_error(404, f"Endpoint tidak ditemukan: {path}")
+    
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/recognize":
+            self._send_error(404, f"Endpoint tidak ditemukan: {url.path}", close=True)
+            return
+        
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            self._send_error(400, "Content-Length tidak valid", close=True)
+            return
+        if length <= 0 or length > MAX_UPLOAD_BYTES:
+            self._send_error(400 if length <= 0 else 413, "Body harus berisi file gambar", close=True)
+            return
+        data = self.rfile.read(length)
+        
+        query = parse_qs(url.query)
+        try:
+            threshold = float(query.get('threshold', [0.8])[0])
+            if 'target_far' in query:
+                threshold = self.server.engine.threshold_for_far(float(query['target_far'][0]))
+        except ValueError as e:
+            self._send_error(400, f"Threshold/target_far tidak valid: {e}")
+            return
+        
+        # Decode + preprocess di thread request (paralel), proyeksi & pencarian di batcher
+        face = preprocess_image_bytes(data, self.server.engine.target_size, self.server.engine.align_faces)
+        if face is None:
+            self.server.engine.metrics.increment('query_failures')
+            self._send_error(400, "Gagal memproses gambar test")
+            return
+        
+        try:
+            result = self.server.batcher.submit(face, threshold).result(timeout=self.server.request_timeout)
+        except Exception as e:
+            self._send_error(500, f"Error during recognition: {str(e)}")
+            return
+        self._send(200, to_json(result))
+    
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class RecognitionServer(ThreadingHTTPServer):
+    """HTTP server lokal di sekitar satu EigenfaceEngine yang sudah di-training/di-load"""
+    daemon_threads = True
+    # Backlog listen default (5) membuat client bersamaan ditolak/menunggu SYN retry
+    request_queue_size = 128
+    
+    def __init__(self, engine, host="127.0.0.1", port=8000, window_ms=5.0, max_batch=64,
+                 request_timeout=30.0, verbose=False, listen_socket=None):
+        if not engine.is_trained:
+            raise ValueError("Engine belum di-training atau model belum di-load")
+        self.engine = engine
+        self.batcher = MicroBatcher(engine, window_ms, max_batch)
+        self.request_timeout = request_timeout
+        self.verbose = verbose
+        
+        if listen_socket is None:
+            super().__init__((host, port), RecognitionRequestHandler)
+        else:
+            # Mode pre-fork: semua worker accept() dari socket listen yang sama
+            super().__init__((host, port), RecognitionRequestHandler, bind_and_activate=False)
+            self.socket.close()
+            self.socket = listen_socket
+            self.server_address = listen_socket.getsockname()
+    
+    def server_close(self):
+        super().server_close()
+        self.batcher.close()
+
+def _run_worker(engine, listen_socket, window_ms, max_batch, verbose):
+    """Loop satu worker pre-fork (di proses anak), tidak pernah return"""
+    # SIGINT ditangani proses induk; worker berhenti lewat SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    try:
+        server = RecognitionServer(engine, window_ms=window_ms, max_batch=max_batch, verbose=verbose,
+                                   listen_socket=listen_socket)
+        server.serve_forever()
+    finally:
+        os._exit(0)
+
+def serve_prefork(engine, host="127.0.0.1", port=8000, workers=2, window_ms=5.0, max_batch=64, verbose=False):
+    """
+    Layani recognition dengan N proses worker (pre-fork, POSIX)
+    
+    Proses induk membuka socket listen lalu fork worker; setiap worker punya
+    GIL, thread request dan batcher sendiri sehingga decode/resize dan
+    penyusunan hasil berjalan paralel di beberapa core. Array model yang
+    di-load dengan memory-map (mean_face, eigenfaces, projected_faces, index)
+    dan cache turunan yang dibangun sebelum fork dibagi lewat page cache /
+    copy-on-write, jadi RSS tidak berlipat sebanyak jumlah worker. Worker yang
+    mati dijalankan ulang.
+    
+    Args:
+        engine (EigenfaceEngine): Engine yang sudah di-load (sebaiknya mmap=True)
+        workers (int): Jumlah proses worker
+    """
+    listen_socket = socket.create_server((host, port), backlog=RecognitionServer.request_queue_size)
+    children = set()
+    
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(engine, listen_socket, window_ms, max_batch, verbose)
+        children.add(pid)
+    
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    
+    signal.signal(signal.SIGTERM, stop)
+    print(f"Server recognition berjalan di http://{host}:{listen_socket.getsockname()[1]} "
+          f"({workers} worker, batch window {window_ms} ms, max batch {max_batch})")
+    try:
+        for _ in range(workers):
+            spawn()
+        while True:
+            pid, status = os.wait()
+            children.discard(pid)
+            print(f"Worker {pid} berhenti (status {status}), menjalankan ulang...")
+            spawn()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        listen_socket.close()
+
+def serve(model_path, host="127.0.0.1", port=8000, window_ms=5.0, max_batch=64, verbose=False, workers=1,
+          shards=None):
+    """
+    Load model dan layani recognition lewat HTTP sampai dihentikan (Ctrl+C)
+    
+    Args:
+        workers (int): Jumlah proses worker; > 1 memakai mode pre-fork
+        shards (list): Index 'sharded': shard_id yang di-load (default: semua)
+    
+    Returns:
+        bool: False jika model gagal di-load
+    """
+    engine = EigenfaceEngine()
+    if not engine.load_model(model_path, mmap=True, shards=shards):
+        return False
+    
+    if workers > 1:
+        if hasattr(os, 'fork'):
+            serve_prefork(engine, host, port, workers, window_ms, max_batch, verbose)
+            return True
+        print("Mode multi-worker butuh os.fork (POSIX), menjalankan satu proses")
+    
+    server = RecognitionServer(engine, host, port, window_ms, max_batch, verbose=verbose)
+    print(f"Server recognition berjalan di http://{host}:{server.server_address[1]} "
+          f"(batch window {window_ms} ms, max batch {max_batch})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return True
@@ -0,0 +1,171 @@
+import io
+import os
+import sys
+import time
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from eigenface_engine import EigenfaceEngine
+from calibration import stratified_folds
+from utils import load_images_from_folder, squared_euclidean_distances, top_k_smallest
+
+def _prefix_accuracy(engine, test_faces, test_labels, components_list):
+    """
+    Akurasi nearest neighbour untuk setiap prefix eigenfaces dari satu model
+    
+    Proyeksi test dihitung sekali pada jumlah komponen maksimum; prefix c
+    cukup memakai c kolom pertama proyeksi test dan gallery.
+    """
+    test_projections = (test_faces - engine.mean_face) @ engine.eigenfaces
+    gallery = np.asarray(engine.projected_faces, dtype=engine.dtype)
+    
+    accuracy = {}
+    for n_components in components_list:
+        if n_components > engine.eigenfaces.shape[1]:
+            continue
+        nearest = top_k_smallest(squared_euclidean_distances(test_projections[:, :n_components],
+                                                             gallery[:, :n_components]), 1)[:, 0]
+        accuracy[n_components] = float(np.mean(engine.face_labels[nearest] == test_labels))
+    return accuracy
+
+def _evaluate_fold(images, labels, label_names, folds, fold, target_size, components_list, engine_kwargs):
+    """Training satu fold pada komponen maksimum lalu evaluasi semua prefix"""
+    train_mask = folds != fold
+    engine = EigenfaceEngine(target_size=target_size, n_components=max(components_list), **engine_kwargs)
+    
+    # images[mask] sudah berupa copy milik fold ini, jadi boleh di-mean-center langsung
+    start = time.perf_counter()
+    if not engine.fit(images[train_mask], labels[train_mask], label_names, overwrite_input=True):
+        raise RuntimeError(f"Training fold {fold} gagal")
+    train_time = time.perf_counter() - start
+    
+    test_faces = images[~train_mask].reshape(int((~train_mask).sum()), -1).astype(engine.dtype)
+    test_labels = labels[~train_mask]
+    accuracy = _prefix_accuracy(engine, test_faces, test_labels, components_list)
+    return {'train_time': train_time, 'accuracy': accuracy}, engine, test_faces
+
+def _query_latency(engine, test_faces, n_components, repeat=3):
+    """
+    Latency query (ms per gambar) untuk model dengan n_components: proyeksi +
+    pencarian nearest neighbour di gallery yang dipotong contiguous
+    """
+    eigenfaces = np.ascontiguousarray(engine.eigenfaces[:, :n_components])
+    gallery = np.ascontiguousarray(np.asarray(engine.projected_faces, dtype=engine.dtype)[:, :n_components])
+    gallery_sq_norms = np.einsum('ij,ij->i', gallery, gallery)
+    
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        projections = (test_faces - engine.mean_face) @ eigenfaces
+        top_k_smallest(squared_euclidean_distances(projections, gallery, gallery_sq_norms), 1)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000 / max(len(test_faces), 1)
+
+def run_sweep(dataset_folder, target_sizes=((32, 32), (48, 48), (64, 64)), components_list=(10, 20, 50, 100),
+              n_folds=5, seed=0, n_jobs=None, engine_kwargs=None, num_workers=None):
+    """
+    Sweep hyperparameter target_size x n_components dengan k-fold cross-validation
+    
+    Untuk setiap target_size dataset di-decode sekali. Setiap fold di-training
+    sekali pada n_components maksimum (fold berjalan paralel di thread pool;
+    GEMM/eigensolver NumPy melepas GIL), lalu setiap n_components yang lebih
+    kecil dievaluasi dengan memotong prefix eigenfaces, tanpa dekomposisi
+    ulang. Latency query diukur terpisah (berurutan) pada model fold dengan
+    komponen terbanyak agar tidak terganggu fold lain yang berjalan bersamaan.
+    
+    Fold dengan komponen lebih sedikit dari n_components (data training
+    terlalu kecil) dilewati untuk baris tersebut; jumlah fold yang dipakai
+    dilaporkan di 'n_folds_used'. Evaluasi prefix adalah nearest neighbour
+    per sampel, sehingga hanya match_mode 'samples' yang didukung.
+    
+    Args:
+        dataset_folder (str): Folder dataset (subfolder per orang)
+        target_sizes (list): Ukuran gambar (width, height) yang dibandingkan
+        components_list (list): Jumlah eigenfaces yang dibandingkan
+        n_folds (int): Jumlah fold cross-validation
+        seed (int): Seed pembagian fold
+        n_jobs (int): Jumlah fold paralel (default: min(n_folds, jumlah CPU))
+        engine_kwargs (dict): Opsi tambahan EigenfaceEngine (solver, dtype, ...); match_mode harus 'samples'
+        num_workers (int): Jumlah thread decode
+    
+    Returns:
+        dict: 'config' dan 'results' (per target_size x n_components: akurasi
+              rata-rata/std dan per fold, jumlah fold, latency query, waktu decode dan training)
+    """
+    match_mode = (engine_kwargs or {}).get('match_mode', 'samples')
+    if match_mode != 'samples':
+        raise ValueError(f"Sweep hanya mengevaluasi match_mode 'samples', bukan '{match_mode}'")
+    components_list = sorted(set(components_list))
+    # Search index dan kalibrasi tidak dipakai evaluasi sweep
+    engine_kwargs = dict(engine_kwargs or {}, index_type=None, calibration_holdout=None)
+    n_jobs = n_jobs or min(n_folds, os.cpu_count() or 1)
+    results = []
+    
+    for target_size in target_sizes:
+        target_size = tuple(target_size)
+        start = time.perf_counter()
+        images, labels, label_names = load_images_from_folder(dataset_folder, target_size, num_workers,
+                                                              align_faces=engine_kwargs.get('align_faces', False))
+        decode_time = time.perf_counter() - start
+        folds = stratified_folds(labels, n_folds, seed)
+        
+        # Output training engine tidak dicetak (log beberapa fold akan bercampur)
+        with contextlib.redirect_stdout(io.StringIO()):
+            with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+                futures = [executor.submit(_evaluate_fold, images, labels, label_names, folds, fold,
+                                           target_size, components_list, engine_kwargs)
+                           for fold in range(n_folds)]
+                outcomes = [future.result() for future in futures]
+        
+        fold_results = [result for result, _, _ in outcomes]
+        # Model dengan komponen terbanyak: latency setiap baris diukur pada jumlah komponen yang sebenarnya
+        _, latency_engine, latency_faces = max(outcomes, key=lambda outcome: outcome[1].eigenfaces.shape[1])
+        del outcomes
+        
+        for n_components in components_list:
+            accuracies = [r['accuracy'][n_components] for r in fold_results if n_components in r['accuracy']]
+            if not accuracies:
+                continue
+            result = {
+                'target_size': list(target_size),
+                'n_components': n_components,
+                'accuracy_mean': float(np.mean(accuracies)),
+                'accuracy_std': float(np.std(accuracies)),
+                'fold_accuracy': accuracies,
+                'n_folds_used': len(accuracies),
+                'query_ms_per_image': _query_latency(latency_engine, latency_faces, n_components),
+                'decode_time': decode_time,
+                'train_time_per_fold': float(np.mean([r['train_time'] for r in fold_results]))
+            }
+            results.append(result)
+            print(f"size={target_size[0]}x{target_size[1]} components={n_components} "
+                  f"accuracy={result['accuracy_mean']:.3f}±{result['accuracy_std']:.3f} "
+                  f"query={result['query_ms_per_image']:.4f}ms/img folds={len(accuracies)}/{n_folds}", file=sys.stderr)
+    
+    return {
+        'config': {
+            'dataset': dataset_folder,
+            'target_sizes': [list(size) for size in target_sizes],
+            'components': components_list,
+            'n_folds': n_folds,
+            'seed': seed,
+            'n_jobs': n_jobs,
+            'engine_kwargs': {k: str(v) for k, v in engine_kwargs.items()}
+        },
+        'results': results
+    }
+
+def best_setting(sweep_result, max_accuracy_drop=0.01):
+    """
+    Setting termurah (query latency terkecil) yang akurasinya paling banyak
+    max_accuracy_drop di bawah akurasi terbaik
+    
+    Returns:
+        dict: Baris hasil sweep yang dipilih, None jika sweep kosong
+    """
+    results = sweep_result['results']
+    if not results:
+        return None
+    best_accuracy = max(r['accuracy_mean'] for r in results)
+    candidates = [r for r in results if r['accuracy_mean'] >= best_accuracy - max_accuracy_drop]
+    return min(candidates, key=lambda r: r['query_ms_per_image'])
@@ -0,0 +1,37 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from eigenface_engine import EigenfaceEngine
+from test_model_roundtrip import TARGET_SIZE, make_faces
+
+def test_threshold_for_far_requires_matching_mode():
+    images, labels, label_names = make_faces()
+    engine = EigenfaceEngine(target_size=TARGET_SIZE, n_components=8, calibration_holdout=0.25)
+    assert engine.fit(images, labels, label_names)
+    assert engine.calibration['match_mode'] == 'samples'
+    engine.threshold_for_far(0.01)
+    
+    engine.match_mode = 'centroid'
+    with pytest.raises(ValueError):
+        engine.threshold_for_far(0.01)
+    
+    # set_match_mode ikut mengkalibrasi ulang
+    engine.match_mode = 'samples'
+    engine.set_match_mode('centroid')
+    assert engine.calibration['match_mode'] == 'centroid'
+    engine.threshold_for_far(0.01)
+
+def test_recognize_apis_return_error_when_not_calibrated(tmp_path):
+    images, labels, label_names = make_faces()
+    engine = EigenfaceEngine(target_size=TARGET_SIZE, n_components=8)
+    assert engine.fit(images, labels, label_names)
+    
+    # Ketiga entry point: error dict yang sama, bukan exception
+    single = engine.recognize(str(tmp_path / "missing.png"), target_far=0.01)
+    batch = engine.recognize_many([str(tmp_path / "missing.png")], target_far=0.01)
+    vectors = engine.recognize_vectors(images[:2], target_far=0.01)
+    assert single['status'] == batch['status'] == "error"
+    assert single['message'] == batch['message']
+    assert vectors == [single, single]
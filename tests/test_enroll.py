@@ -0,0 +1,107 @@
+import os
+import sys
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from eigenface_engine import EigenfaceEngine
+from test_model_roundtrip import TARGET_SIZE, make_faces, make_probes
+
+INDEX_PARAMS = {
+    # n_probe = n_lists: IVF memeriksa semua list sehingga hasilnya bisa dibandingkan dengan brute-force
+    'ivf': {'n_lists': 4, 'n_probe': 4},
+    'sharded': {'n_shards': 3}
+}
+
+def write_images(folder, images):
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i, image in enumerate(images):
+        path = os.path.join(folder, f"{i}.png")
+        cv2.imwrite(path, np.clip(image * 255, 0, 255).astype(np.uint8))
+        paths.append(path)
+    return paths
+
+def assert_index_matches_brute_force(engine, probes):
+    indexed = engine.recognize_vectors(probes, threshold=np.inf, k=3)
+    index, engine.search_index = engine.search_index, None
+    brute_force = engine.recognize_vectors(probes, threshold=np.inf, k=3)
+    engine.search_index = index
+    assert [r['person'] for r in indexed] == [r['person'] for r in brute_force]
+    # Vektor index digeser incremental: beda pembulatan float32 saja
+    np.testing.assert_allclose([r['distance'] for r in indexed], [r['distance'] for r in brute_force], atol=1e-3)
+
+@pytest.mark.parametrize("index_type", ['ivf', 'sharded'])
+def test_enroll_unenroll_update_index_incrementally(tmp_path, capsys, index_type):
+    images, labels, label_names = make_faces(n_people=7)
+    train = labels < 6
+    engine = EigenfaceEngine(target_size=TARGET_SIZE, n_components=8, index_type=index_type,
+                             index_params=INDEX_PARAMS[index_type])
+    assert engine.fit(images[train], labels[train], label_names[:6])
+    capsys.readouterr()
+    
+    new_paths = write_images(str(tmp_path / "person_6"), images[labels == 6])
+    assert engine.enroll("person_6", new_paths, update_basis=False)
+    assert engine.unenroll("person_2")
+    # Tidak ada k-means / pembagian shard ulang
+    assert "Membangun search index" not in capsys.readouterr().out
+    assert engine.search_index.n_rows == len(engine.face_labels)
+    
+    probes = make_probes(images)
+    assert_index_matches_brute_force(engine, probes)
+    results = engine.recognize_vectors(probes, threshold=np.inf, k=1)
+    assert [r['person'] for r in results][-12:] == ["person_6"] * 12
+    assert "person_2" not in {r['person'] for r in results}
+    
+    engine.rebuild_search_index()
+    assert engine.search_index.n_changed == 0
+    assert_index_matches_brute_force(engine, probes)
+
+def test_enroll_rebuilds_index_after_large_change(tmp_path, capsys):
+    images, labels, label_names = make_faces(n_people=3)
+    train = labels < 1
+    engine = EigenfaceEngine(target_size=TARGET_SIZE, n_components=8, index_type='ivf',
+                             index_params=INDEX_PARAMS['ivf'])
+    assert engine.fit(images[train], labels[train], label_names[:1])
+    capsys.readouterr()
+    
+    # 12 baris baru untuk index 12 baris: melewati REBUILD_CHANGE_RATIO
+    assert engine.enroll("person_1", write_images(str(tmp_path / "person_1"), images[labels == 1]),
+                         update_basis=False)
+    assert "Membangun search index" in capsys.readouterr().out
+    assert engine.search_index.n_changed == 0
+
+def test_unenroll_mean_matches_retraining(tmp_path):
+    images, labels, label_names = make_faces(n_people=7)
+    train = labels < 6
+    engine = EigenfaceEngine(target_size=TARGET_SIZE, n_components=4)
+    assert engine.fit(images[train], labels[train], label_names[:6])
+    assert engine.save_model(str(tmp_path / "model"))
+    
+    # Model hasil load (array memory-map), beberapa siklus enroll/unenroll
+    loaded = EigenfaceEngine()
+    assert loaded.load_model(str(tmp_path / "model"))
+    new_paths = write_images(str(tmp_path / "person_6"), images[labels == 6])
+    for _ in range(3):
+        assert loaded.enroll("person_6", new_paths, update_basis=False)
+        assert loaded.unenroll("person_6")
+    assert loaded.unenroll("person_2")
+    
+    # Gambar enroll melewati PNG 8-bit: bandingkan dengan mean gambar yang tersisa
+    kept = train & (labels != 2)
+    expected = images[kept].reshape(int(kept.sum()), -1).mean(axis=0)
+    np.testing.assert_allclose(loaded.mean_face, expected, atol=1e-5)
+    
+    centered = images[kept].reshape(int(kept.sum()), -1) - loaded.mean_face
+    np.testing.assert_allclose(loaded.projected_faces, centered @ loaded.eigenfaces, atol=1e-4)
+
+@pytest.mark.parametrize("index_type", ['ivf', 'sharded'])
+def test_float16_gallery_index_ranks_in_float32(index_type):
+    images, labels, label_names = make_faces()
+    engine = EigenfaceEngine(target_size=TARGET_SIZE, n_components=8, projected_dtype=np.float16,
+                             index_type=index_type, index_params=INDEX_PARAMS[index_type])
+    assert engine.fit(images, labels, label_names)
+    indices, sq_distances = engine.search_index.search(engine.projected_faces[:5].astype(np.float32), k=3)
+    assert sq_distances.dtype == np.float32
+    assert_index_matches_brute_force(engine, make_probes(images))
@@ -0,0 +1,58 @@
+import os
+import sys
+import glob
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from image_cache import PreprocessedFaceCache
+from utils import load_images_parallel
+from test_enroll import write_images
+from test_model_roundtrip import TARGET_SIZE, make_faces
+
+def shard_files(cache_dir):
+    return sorted(glob.glob(os.path.join(cache_dir, "faces_*_0*.npy")))
+
+def test_cache_appends_shards_and_compacts(tmp_path):
+    paths = write_images(str(tmp_path / "images"), make_faces(n_people=2)[0])
+    cache_dir = str(tmp_path / "cache")
+    expected, _ = load_images_parallel(paths, TARGET_SIZE)
+    
+    cache = PreprocessedFaceCache(cache_dir, TARGET_SIZE)
+    images, loaded = cache.load(paths[:10])
+    assert loaded.all() and cache.misses == 10
+    images, loaded = cache.load(paths)
+    assert cache.misses == 24 and cache.hits == 10
+    np.testing.assert_array_equal(images, expected)
+    # Batch kedua ditulis sebagai shard baru, shard pertama tidak ditulis ulang
+    assert len(shard_files(cache_dir)) == 2
+    
+    # File berubah: baris lamanya menjadi yatim sampai compaction
+    write_images(str(tmp_path / "images"), make_faces(n_people=2, seed=5)[0][:1])
+    os.utime(paths[0], ns=(0, 0))
+    expected, _ = load_images_parallel(paths, TARGET_SIZE)
+    images, _ = cache.load(paths)
+    np.testing.assert_array_equal(images, expected)
+    assert len(shard_files(cache_dir)) == 3
+    
+    cache.compact()
+    assert len(shard_files(cache_dir)) == 1
+    images, loaded = PreprocessedFaceCache(cache_dir, TARGET_SIZE).load(paths)
+    assert isinstance(images, np.memmap)
+    np.testing.assert_array_equal(images, expected)
+
+def _load_in_process(cache_dir, paths):
+    images, loaded = PreprocessedFaceCache(cache_dir, TARGET_SIZE).load(paths)
+    return int(loaded.sum())
+
+def test_cache_shared_between_processes(tmp_path):
+    paths = write_images(str(tmp_path / "images"), make_faces(n_people=4)[0])
+    cache_dir = str(tmp_path / "cache")
+    halves = [paths[::2], paths[1::2]]
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        assert sum(executor.map(_load_in_process, [cache_dir] * 2, halves)) == len(paths)
+    
+    cache = PreprocessedFaceCache(cache_dir, TARGET_SIZE)
+    images, loaded = cache.load(paths)
+    assert loaded.all() and cache.misses == 0
+    np.testing.assert_array_equal(images, load_images_parallel(paths, TARGET_SIZE)[0])
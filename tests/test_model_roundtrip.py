@@ -0,0 +1,89 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from eigenface_engine import EigenfaceEngine
+
+TARGET_SIZE = (16, 16)
+
+def make_faces(n_people=6, per_person=12, seed=0):
+    """Wajah sintetis: pola dasar per orang + noise"""
+    rng = np.random.default_rng(seed)
+    bases = rng.uniform(0, 1, size=(n_people, TARGET_SIZE[1], TARGET_SIZE[0]))
+    images = np.concatenate([base + 0.05 * rng.standard_normal((per_person,) + base.shape) for base in bases])
+    labels = np.repeat(np.arange(n_people), per_person)
+    return images.astype(np.float32), labels, [f"person_{i}" for i in range(n_people)]
+
+def make_probes(images, seed=1):
+    """Foto lain dari orang yang sama: gambar training + noise baru"""
+    rng = np.random.default_rng(seed)
+    return (images + 0.05 * rng.standard_normal(images.shape)).astype(np.float32)
+
+def predictions(engine, faces):
+    return [(result['person'], round(result['distance'], 4))
+            for result in engine.recognize_vectors(faces, threshold=np.inf, k=3)]
+
+@pytest.mark.parametrize("index_type", ['ivf', 'sharded'])
+@pytest.mark.parametrize("match_mode", EigenfaceEngine.MATCH_MODES)
+def test_save_load_keeps_match_mode_and_index(tmp_path, match_mode, index_type):
+    images, labels, label_names = make_faces()
+    engine = EigenfaceEngine(target_size=TARGET_SIZE, n_components=8, index_type=index_type,
+                             match_mode=match_mode, n_prototypes=3)
+    assert engine.fit(images, labels, label_names)
+    assert engine.save_model(str(tmp_path / "model"))
+    
+    # Engine baru dengan opsi default: mode dan index harus diambil dari model
+    loaded = EigenfaceEngine()
+    assert loaded.load_model(str(tmp_path / "model"))
+    assert loaded.match_mode == match_mode
+    assert loaded.n_prototypes == 3
+    assert loaded.search_index.INDEX_TYPE == index_type
+    assert loaded.index_params == engine.index_params
+    assert loaded.search_index.n_rows == len(loaded._search_labels)
+    
+    probes = make_probes(images)
+    assert predictions(loaded, probes) == predictions(engine, probes)
+
+def test_set_match_mode_rebuilds_index(tmp_path):
+    images, labels, label_names = make_faces()
+    engine = EigenfaceEngine(target_size=TARGET_SIZE, n_components=8, index_type='ivf', match_mode='centroid',
+                             index_params={'n_lists': 3, 'n_probe': 2})
+    assert engine.fit(images, labels, label_names)
+    assert engine.save_model(str(tmp_path / "model"))
+    
+    loaded = EigenfaceEngine()
+    assert loaded.load_model(str(tmp_path / "model"))
+    loaded.set_match_mode('samples')
+    assert loaded.search_index.n_rows == len(images)
+    # Rebuild memakai parameter index yang tersimpan di model, bukan default
+    assert (loaded.search_index.n_lists, loaded.search_index.n_probe) == (3, 2)
+    
+    probes = make_probes(images)
+    results = loaded.recognize_vectors(probes, threshold=np.inf, k=1)
+    assert [r['person'] for r in results] == [label_names[l] for l in labels]
+
+def test_partial_shard_load_uses_only_loaded_shards(tmp_path):
+    images, labels, label_names = make_faces()
+    engine = EigenfaceEngine(target_size=TARGET_SIZE, n_components=8, index_type='sharded',
+                             index_params={'n_shards': 3})
+    assert engine.fit(images, labels, label_names)
+    assert engine.save_model(str(tmp_path / "model"))
+    # Mode 'samples': vektor shard diambil dari projected_faces.npy, tidak disimpan dua kali
+    assert not os.path.exists(tmp_path / "model" / "index" / "shard_000" / "vectors.npy")
+    
+    loaded = EigenfaceEngine()
+    assert loaded.load_model(str(tmp_path / "model"), shards=[0])
+    assert loaded._search_vectors is None
+    shard_people = {label_names[l] for l in np.unique(loaded.search_index.shards[0]['labels'])}
+    
+    probes = make_probes(images)
+    approximate = loaded.recognize_vectors(probes, threshold=np.inf, k=3)
+    exact = loaded.recognize_vectors(probes, threshold=np.inf, k=3, exact=True)
+    assert {r['person'] for r in approximate} <= shard_people
+    assert [r['all_distances'] for r in approximate] == [r['all_distances'] for r in exact]
+    
+    with pytest.raises(ValueError):
+        loaded.set_match_mode('centroid')
+    assert not loaded.enroll("person_new", [])
@@ -0,0 +1,26 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from eigenface_engine import EigenfaceEngine
+from test_model_roundtrip import TARGET_SIZE, make_faces
+
+def trained_engine():
+    images, labels, label_names = make_faces()
+    engine = EigenfaceEngine(target_size=TARGET_SIZE, n_components=8)
+    assert engine.fit(images, labels, label_names)
+    return engine
+
+def test_recognize_many_empty_folder(tmp_path):
+    engine = trained_engine()
+    batch = engine.recognize_many(str(tmp_path))
+    assert batch['results'] == []
+    assert batch['num_images'] == 0
+    assert batch['num_failed'] == 0
+    assert engine.recognize_many([])['num_images'] == 0
+
+def test_recognize_vectors_empty_batch():
+    engine = trained_engine()
+    assert engine.recognize_vectors(np.empty((0, TARGET_SIZE[0] * TARGET_SIZE[1]), dtype=np.float32)) == []
+    assert engine.recognize_vectors([]) == []
@@ -0,0 +1,49 @@
+import os
+import sys
+import json
+import socket
+import threading
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from eigenface_engine import EigenfaceEngine
+from server import RecognitionServer
+from test_model_roundtrip import TARGET_SIZE, make_faces
+
+@pytest.fixture
+def server():
+    images, labels, label_names = make_faces()
+    engine = EigenfaceEngine(target_size=TARGET_SIZE, n_components=8)
+    assert engine.fit(images, labels, label_names)
+    server = RecognitionServer(engine, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def send_raw(server, request):
+    """Kirim request mentah, baca semua respons sampai server menutup koneksi"""
+    with socket.create_connection(server.server_address, timeout=5) as sock:
+        sock.sendall(request)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+def test_unread_body_is_not_parsed_as_next_request(server):
+    # Body request 404 berisi request lain: tidak boleh dijalankan sebagai request keep-alive berikutnya
+    smuggled = b"GET /health HTTP/1.1\r\nHost: x\r\n\r\n"
+    response = send_raw(server, b"POST /unknown HTTP/1.1\r\nHost: x\r\nContent-Length: %d\r\n\r\n%s"
+                        % (len(smuggled), smuggled))
+    assert response.count(b"HTTP/1.1 ") == 1
+    assert response.startswith(b"HTTP/1.1 404")
+
+def test_invalid_content_length_returns_json_400(server):
+    response = send_raw(server, b"POST /recognize HTTP/1.1\r\nHost: x\r\nContent-Length: abc\r\n\r\n")
+    head, body = response.split(b"\r\n\r\n", 1)
+    assert head.startswith(b"HTTP/1.1 400")
+    assert json.loads(body)['status'] == "error"
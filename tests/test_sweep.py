@@ -0,0 +1,27 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sweep import run_sweep
+from test_model_roundtrip import TARGET_SIZE, make_faces
+from test_enroll import write_images
+
+def test_sweep_reports_folds_used_per_row(tmp_path):
+    images, labels, label_names = make_faces(n_people=3, per_person=5)
+    for label, name in enumerate(label_names):
+        write_images(str(tmp_path / name), images[labels == label])
+    
+    # 15 gambar, 2 fold: model fold berisi 7-8 gambar training, 7 komponen hanya didukung satu fold
+    # dan 20 komponen tidak didukung fold manapun
+    result = run_sweep(str(tmp_path), [TARGET_SIZE], [2, 7, 20], n_folds=2)
+    rows = {row['n_components']: row for row in result['results']}
+    assert set(rows) == {2, 7}
+    assert (rows[2]['n_folds_used'], rows[7]['n_folds_used']) == (2, 1)
+    for row in rows.values():
+        assert row['n_folds_used'] == len(row['fold_accuracy'])
+        assert row['query_ms_per_image'] > 0
+
+def test_sweep_rejects_other_match_modes(tmp_path):
+    with pytest.raises(ValueError):
+        run_sweep(str(tmp_path), [TARGET_SIZE], [2], engine_kwargs={'match_mode': 'centroid'})
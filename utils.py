@@ -1,95 +1,305 @@
 import os
+import json
 import cv2
 import numpy as np
 from PIL import Image
 import matplotlib.pyplot as plt
+from concurrent.futures import ThreadPoolExecutor
+from memory_cache import image_memory_cache, file_cache_key
+from face_detection import get_face_aligner
 
-def load_images_from_folder(folder_path, target_size=(64, 64)):
+def list_dataset_images(folder_path):
     """
-    Load semua gambar dari folder dan subfolder
+    Daftar path gambar dan label dari folder dataset (subfolder per orang)
+    
+    Subfolder dan file diurutkan sehingga label selalu deterministik.
     
     Args:
         folder_path (str): Path ke folder dataset
-        target_size (tuple): Ukuran target gambar (width, height)
     
     Returns:
-        images (list): List array gambar
-        labels (list): List label untuk setiap gambar
+        image_paths (list): List path gambar
+        labels (np.array): Label untuk setiap gambar
         label_names (list): List nama unik labels
     """
-    images = []
-    labels = []
     label_names = []
+    image_paths = []
+    path_labels = []
     
     # Dapatkan semua subfolder
-    subfolders = [f for f in os.listdir(folder_path) 
-                  if os.path.isdir(os.path.join(folder_path, f))]
+    subfolders = sorted(f for f in os.listdir(folder_path) 
+                        if os.path.isdir(os.path.join(folder_path, f)))
     
     for i, subfolder in enumerate(subfolders):
         label_names.append(subfolder)
         subfolder_path = os.path.join(folder_path, subfolder)
         
-        # Load gambar dari setiap subfolder
-        for filename in os.listdir(subfolder_path):
+        for filename in sorted(os.listdir(subfolder_path)):
             if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tiff')):
-                img_path = os.path.join(subfolder_path, filename)
-                
-                # Load dan preprocess gambar
-                img = preprocess_image(img_path, target_size)
-                if img is not None:
-                    images.append(img)
-                    labels.append(i)
-    
-    return np.array(images), np.array(labels), label_names
+                image_paths.append(os.path.join(subfolder_path, filename))
+                path_labels.append(i)
+    
+    return image_paths, np.array(path_labels, dtype=np.int64), label_names
 
-def preprocess_image(image_path, target_size=(64, 64)):
+def load_images_from_folder(folder_path, target_size=(64, 64), num_workers=None, cache=None, stats=None,
+                            align_faces=False):
     """
-    Preprocess gambar: grayscale, resize, normalize
+    Load semua gambar dari folder dan subfolder secara paralel
+    
+    Decode dan resize dikerjakan thread pool (OpenCV melepas GIL), hasilnya
+    ditulis langsung ke satu array (N, h, w) float32 yang sudah dialokasikan.
+    Urutan subfolder dan file diurutkan sehingga label selalu deterministik.
+    
+    Args:
+        folder_path (str): Path ke folder dataset
+        target_size (tuple): Ukuran target gambar (width, height)
+        num_workers (int): Jumlah thread decode (default: jumlah CPU)
+        cache (PreprocessedFaceCache): Cache hasil preprocess di disk (opsional)
+        stats (dict): Jika diberikan, diisi jumlah gambar 'loaded' dan 'failed'
+        align_faces (bool): Deteksi dan luruskan wajah sebelum resize (lihat preprocess_image);
+            diabaikan jika cache diberikan (cache menentukan preprocess sendiri)
+    
+    Returns:
+        images (np.array): Array gambar (N, h, w) float32
+        labels (np.array): Label untuk setiap gambar
+        label_names (list): List nama unik labels
+    """
+    image_paths, labels, label_names = list_dataset_images(folder_path)
+    
+    if cache is not None:
+        images, loaded = cache.load(image_paths, num_workers)
+    else:
+        images, loaded = load_images_parallel(image_paths, target_size, num_workers, align_faces)
+    
+    if stats is not None:
+        stats['loaded'] = int(loaded.sum())
+        stats['failed'] = int(len(loaded) - loaded.sum())
+    
+    # Buang gambar yang gagal di-decode
+    if not loaded.all():
+        images = images[loaded]
+        labels = labels[loaded]
+    
+    return images, labels, label_names
+
+def iter_image_batches(image_paths, labels, batch_size=512, target_size=(64, 64), num_workers=None,
+                       align_faces=False):
+    """
+    Generator batch gambar untuk training streaming (memori dibatasi batch_size)
+    
+    Args:
+        image_paths (list): List path gambar
+        labels (np.array): Label untuk setiap gambar
+        batch_size (int): Jumlah gambar per batch
+        target_size (tuple): Ukuran target gambar (width, height)
+        num_workers (int): Jumlah thread decode
+        align_faces (bool): Deteksi dan luruskan wajah sebelum resize
+    
+    Yields:
+        images (np.array): Batch gambar (b, h, w) float32 yang berhasil di-load
+        labels (np.array): Label batch tersebut
+    """
+    labels = np.asarray(labels)
+    for start in range(0, len(image_paths), batch_size):
+        images, loaded = load_images_parallel(image_paths[start:start + batch_size], target_size, num_workers,
+                                              align_faces)
+        yield images[loaded], labels[start:start + batch_size][loaded]
+
+def load_images_parallel(image_paths, target_size=(64, 64), num_workers=None, align_faces=False, use_cache=False):
+    """
+    Decode dan preprocess banyak gambar secara paralel ke array yang dialokasikan di awal
+    
+    Hasil decode massal (training, streaming, enroll, fill cache disk) secara
+    default tidak dimasukkan ke cache in-memory: gambar dibaca sekali dan hanya
+    akan menaikkan peak memori serta mengusir thumbnail/query yang sering dipakai.
+    
+    Args:
+        image_paths (list): List path gambar
+        target_size (tuple): Ukuran target gambar (width, height)
+        num_workers (int): Jumlah thread decode (default: jumlah CPU)
+        align_faces (bool): Deteksi dan luruskan wajah sebelum resize
+        use_cache (bool): Pakai cache in-memory preprocess_image
+    
+    Returns:
+        images (np.array): Array gambar (N, h, w) float32, urutan sama dengan image_paths
+        loaded (np.array): Mask boolean gambar yang berhasil di-load
+    """
+    images = np.empty((len(image_paths), target_size[1], target_size[0]), dtype=np.float32)
+    loaded = np.zeros(len(image_paths), dtype=bool)
+    
+    def _load(index):
+        img = preprocess_image(image_paths[index], target_size, use_cache=use_cache, align_faces=align_faces)
+        if img is not None:
+            images[index] = img
+            loaded[index] = True
+    
+    num_workers = num_workers or os.cpu_count() or 1
+    if num_workers <= 1 or len(image_paths) <= 1:
+        for index in range(len(image_paths)):
+            _load(index)
+    else:
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            list(executor.map(_load, range(len(image_paths))))
+    
+    return images, loaded
+
+def preprocess_image(image_path, target_size=(64, 64), use_cache=True, align_faces=False):
+    """
+    Preprocess gambar: grayscale, (deteksi + alignment wajah), resize, normalize
+    
+    Hasil disimpan di cache LRU in-memory (image_memory_cache) dengan key path,
+    ukuran dan mtime file, sehingga file yang sama tidak di-decode (dan
+    dideteksi) ulang.
     
     Args:
         image_path (str): Path ke file gambar
         target_size (tuple): Ukuran target gambar
+        use_cache (bool): Pakai cache in-memory
+        align_faces (bool): Crop wajah terbesar dan luruskan berdasarkan posisi mata
     
     Returns:
-        np.array: Array gambar yang sudah dipreprocess
+        np.array: Array gambar yang sudah dipreprocess (read-only jika dari cache)
     """
     try:
+        kind = 'face_aligned' if align_faces else 'face'
+        key = file_cache_key(kind, image_path, target_size) if use_cache else None
+        if key is not None:
+            cached = image_memory_cache.get(key)
+            if cached is not None:
+                return cached
+        
         # Baca gambar
         img = cv2.imread(image_path)
         if img is None:
             return None
         
-        # Convert ke grayscale
-        img_gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
-        # Resize gambar
-        img_resized = cv2.resize(img_gray, target_size)
-        
-        # Normalize ke range [0, 1]
-        img_normalized = img_resized.astype(np.float32) / 255.0
-        
+        img_normalized = preprocess_decoded_image(img, target_size, align_faces)
+        if key is not None:
+            # Array dipakai bersama pemanggil lain, jadi tidak boleh diubah in-place
+            img_normalized.setflags(write=False)
+            image_memory_cache.put(key, img_normalized, img_normalized.nbytes)
         return img_normalized
         
     except Exception as e:
         print(f"Error processing {image_path}: {str(e)}")
         return None
 
-def preprocess_single_image(image_path, target_size=(64, 64)):
+def preprocess_decoded_image(img, target_size=(64, 64), align_faces=False):
+    """
+    Preprocess gambar BGR yang sudah di-decode: grayscale, resize, normalize
+    
+    Dengan align_faces, wajah terbesar dideteksi (cascade Haar OpenCV),
+    diluruskan berdasarkan posisi mata lalu di-crop; jika tidak ada wajah
+    terdeteksi, seluruh gambar dipakai seperti tanpa alignment.
+    
+    Args:
+        img (np.array): Gambar BGR (h, w, 3) hasil cv2.imread/cv2.imdecode
+        target_size (tuple): Ukuran target gambar
+        align_faces (bool): Crop wajah terbesar dan luruskan berdasarkan posisi mata
+    
+    Returns:
+        np.array: Array gambar (h, w) float32 range [0, 1]
+    """
+    # Convert ke grayscale
+    img_gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    
+    if align_faces:
+        face = get_face_aligner().extract(img_gray, target_size)
+        if face is not None:
+            return face
+    
+    # Resize gambar
+    img_resized = cv2.resize(img_gray, target_size)
+    
+    # Normalize ke range [0, 1]
+    img_normalized = img_resized.astype(np.float32) / 255.0
+    
+    return img_normalized
+
+def preprocess_image_bytes(data, target_size=(64, 64), align_faces=False):
+    """
+    Preprocess gambar dari bytes file (mis. upload HTTP) tanpa menulis ke disk
+    
+    Args:
+        data (bytes): Isi file gambar (jpg/png/...)
+        target_size (tuple): Ukuran target gambar
+        align_faces (bool): Crop wajah terbesar dan luruskan berdasarkan posisi mata
+    
+    Returns:
+        np.array: Array gambar yang sudah dipreprocess dan flattened, None jika gagal
+    """
+    try:
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            return None
+        return preprocess_decoded_image(img, target_size, align_faces).flatten()
+    except Exception as e:
+        print(f"Error processing uploaded image: {str(e)}")
+        return None
+
+def preprocess_single_image(image_path, target_size=(64, 64), align_faces=False):
     """
     Preprocess single gambar untuk testing
     
     Args:
         image_path (str): Path ke file gambar
         target_size (tuple): Ukuran target gambar
+        align_faces (bool): Crop wajah terbesar dan luruskan (harus sama dengan saat training)
     
     Returns:
         np.array: Array gambar yang sudah dipreprocess dan flattened
     """
-    img = preprocess_image(image_path, target_size)
+    img = preprocess_image(image_path, target_size, align_faces=align_faces)
     if img is not None:
         return img.flatten()
     return None
 
+def load_thumbnail(image_path, size=(80, 80)):
+    """
+    Load gambar sebagai thumbnail PIL (untuk GUI), lewat cache LRU in-memory
+    
+    Args:
+        image_path (str): Path ke file gambar
+        size (tuple): Ukuran thumbnail (width, height)
+    
+    Returns:
+        PIL.Image: Thumbnail (jangan diubah in-place), None jika gagal
+    """
+    key = file_cache_key('thumbnail', image_path, size)
+    if key is not None:
+        cached = image_memory_cache.get(key)
+        if cached is not None:
+            return cached
+    
+    try:
+        with Image.open(image_path) as img:
+            thumbnail = img.resize(tuple(size), Image.Resampling.LANCZOS)
+    except Exception as e:
+        print(f"Error loading {image_path}: {e}")
+        return None
+    
+    if key is not None:
+        image_memory_cache.put(key, thumbnail, thumbnail.width * thumbnail.height * len(thumbnail.getbands()))
+    return thumbnail
+
+def list_image_files(folder_path):
+    """
+    Kumpulkan semua path file gambar di folder (termasuk subfolder), terurut
+    
+    Args:
+        folder_path (str): Path folder
+    
+    Returns:
+        list: List path file gambar
+    """
+    image_paths = []
+    for root, dirs, files in os.walk(folder_path):
+        dirs.sort()
+        for filename in sorted(files):
+            if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tiff')):
+                image_paths.append(os.path.join(root, filename))
+    return image_paths
+
 def create_folder_if_not_exists(folder_path):
     """
     Buat folder jika belum ada
@@ -100,6 +310,30 @@ def create_folder_if_not_exists(folder_path):
     if not os.path.exists(folder_path):
         os.makedirs(folder_path)
 
+def save_npy_atomic(file_path, array):
+    """
+    Simpan array .npy lewat file sementara + os.replace
+    
+    File lama tidak pernah ditimpa di tempat (inode baru), sehingga proses
+    yang masih membuka file lama dengan memory-map (termasuk array sumber
+    yang sedang disimpan) tidak membaca file terpotong atau mati karena SIGBUS.
+    
+    Args:
+        file_path (str): Path tujuan (.npy)
+        array (np.array): Array yang disimpan
+    """
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, file_path)
+
+def save_json_atomic(file_path, data):
+    """Simpan JSON lewat file sementara + os.replace (lihat save_npy_atomic)"""
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, file_path)
+
 def save_eigenfaces_visualization(eigenfaces, save_path, n_components=10, img_shape=(64, 64)):
     """
     Simpan visualisasi eigenfaces
@@ -207,6 +441,110 @@ def euclidean_distance(vec1, vec2):
     """
     return np.linalg.norm(vec1 - vec2)
 
+def squared_euclidean_distances(queries, gallery, gallery_sq_norms=None):
+    """
+    Hitung squared euclidean distance antara banyak query dan semua vektor gallery
+    sekaligus: ||q - g||^2 = ||q||^2 - 2 q.g + ||g||^2
+    
+    Args:
+        queries (np.array): Matriks query (Q x k) atau satu vektor (k,)
+        gallery (np.array): Matriks gallery (M x k)
+        gallery_sq_norms (np.array): Cache ||g||^2 per baris gallery (opsional)
+    
+    Returns:
+        np.array: Matriks squared distance (Q x M)
+    """
+    queries = np.atleast_2d(queries)
+    if gallery_sq_norms is None:
+        gallery_sq_norms = np.einsum('ij,ij->i', gallery, gallery)
+    
+    query_sq_norms = np.einsum('ij,ij->i', queries, queries)
+    sq_distances = query_sq_norms[:, None] - 2.0 * (queries @ gallery.T) + gallery_sq_norms[None, :]
+    
+    # Error pembulatan bisa menghasilkan nilai negatif kecil
+    np.maximum(sq_distances, 0, out=sq_distances)
+    return sq_distances
+
+def top_k_smallest(values, k):
+    """
+    Ambil indeks k nilai terkecil per baris dengan partial selection (argpartition)
+    
+    Args:
+        values (np.array): Matriks nilai (Q x M)
+        k (int): Jumlah hasil per baris
+    
+    Returns:
+        np.array: Indeks (Q x k) terurut dari nilai terkecil
+    """
+    values = np.atleast_2d(values)
+    k = min(k, values.shape[1])
+    if k < values.shape[1]:
+        candidates = np.argpartition(values, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.tile(np.arange(values.shape[1]), (values.shape[0], 1))
+    
+    order = np.argsort(np.take_along_axis(values, candidates, axis=1), axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
+
+def assign_to_nearest(vectors, centroids, batch_size=65536):
+    """
+    Tentukan centroid terdekat untuk setiap vektor (per batch agar hemat memori)
+    
+    Args:
+        vectors (np.array): Matriks vektor (M x k)
+        centroids (np.array): Matriks centroid (C x k)
+        batch_size (int): Jumlah vektor per batch
+    
+    Returns:
+        np.array: Indeks centroid terdekat untuk setiap vektor (M,)
+    """
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    centroid_sq_norms = np.einsum('ij,ij->i', centroids, centroids)
+    for b in range(0, len(vectors), batch_size):
+        sq_distances = squared_euclidean_distances(vectors[b:b + batch_size], centroids, centroid_sq_norms)
+        assignment[b:b + batch_size] = np.argmin(sq_distances, axis=1)
+    return assignment
+
+def kmeans(vectors, n_clusters, n_iter=20, max_train_points=None, seed=0):
+    """
+    K-means (Lloyd) manual
+    
+    Args:
+        vectors (np.array): Matriks vektor (M x k)
+        n_clusters (int): Jumlah cluster
+        n_iter (int): Jumlah iterasi Lloyd
+        max_train_points (int): Batas jumlah sampel untuk training (opsional)
+        seed (int): Seed random agar hasil deterministik
+    
+    Returns:
+        np.array: Matriks centroid (n_clusters x k)
+    """
+    rng = np.random.default_rng(seed)
+    n_train = min(len(vectors), max_train_points or len(vectors))
+    if n_train < len(vectors):
+        sample = vectors[np.sort(rng.choice(len(vectors), n_train, replace=False))]
+    else:
+        sample = vectors
+    n_clusters = min(n_clusters, n_train)
+    
+    centroids = np.array(sample[rng.choice(n_train, n_clusters, replace=False)])
+    for _ in range(n_iter):
+        assignment = assign_to_nearest(sample, centroids)
+        
+        # Jumlah per cluster lewat sort + reduceat (jauh lebih cepat dari np.add.at)
+        counts = np.bincount(assignment, minlength=n_clusters)
+        order = np.argsort(assignment, kind='stable')
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        empty = counts == 0
+        sums = np.add.reduceat(sample[order], starts[~empty], axis=0)
+        
+        # Cluster kosong diisi ulang dengan titik acak
+        centroids[~empty] = sums / counts[~empty, None]
+        if empty.any():
+            centroids[empty] = sample[rng.choice(n_train, int(empty.sum()), replace=False)]
+    
+    return centroids
+
 def load_and_validate_dataset(folder_path):
     """
     Load dan validasi dataset
@@ -0,0 +1,306 @@
+import time
+import queue
+import threading
+from collections import deque, Counter
+import cv2
+import numpy as np
+from face_detection import FaceAligner, crop_face
+
+# Penanda akhir stream antar tahap pipeline
+_END = object()
+
+def box_iou(a, b):
+    """Intersection over union dua bounding box (x, y, w, h)"""
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    intersection = max(0, x2 - x1) * max(0, y2 - y1)
+    union = a[2] * a[3] + b[2] * b[3] - intersection
+    return intersection / union if union > 0 else 0.0
+
+class FaceTrack:
+    """
+    Satu wajah yang diikuti antar frame (asosiasi IoU bounding box).
+    
+    Identitas track adalah voting mayoritas dari smoothing_window hasil match
+    terakhir, sehingga satu salah match tidak langsung mengganti identitas.
+    """
+    
+    def __init__(self, track_id, box, frame_number, smoothing_window=5):
+        self.track_id = track_id
+        self.box = box
+        self.last_seen = frame_number
+        self.last_scheduled = None
+        self.votes = deque(maxlen=smoothing_window)
+    
+    def add_vote(self, result):
+        self.votes.append((result['person'], result['distance']))
+    
+    def identity(self):
+        """
+        Returns:
+            person (str): Identitas hasil voting ("Unknown" jika belum ada match)
+            distance (float): Rata-rata distance vote untuk identitas tersebut
+        """
+        if not self.votes:
+            return "Unknown", None
+        # Urutan terbalik: jika seri, vote terbaru yang menang
+        person = Counter(name for name, _ in reversed(self.votes)).most_common(1)[0][0]
+        distance = float(np.mean([d for name, d in self.votes if name == person]))
+        return person, distance
+
+class VideoRecognitionPipeline:
+    """
+    Recognition wajah pada file video dengan tiga tahap paralel:
+        
+        decode (VideoCapture) -> detect + crop -> match (batch GEMM)
+    
+    Antar tahap dipakai queue berukuran terbatas (backpressure, memori tetap).
+    Hanya setiap frame_stride frame yang di-decode penuh (frame lain hanya
+    grab). Wajah diikuti antar frame sebagai track; track baru langsung
+    di-match, track lama hanya di-match ulang setiap rematch_interval frame
+    yang diproses. Crop dari beberapa frame dikumpulkan dan diproyeksikan
+    sekaligus lewat EigenfaceEngine.recognize_vectors.
+    """
+    
+    def __init__(self, engine, detector=None, frame_stride=5, threshold=0.8, batch_size=64, queue_size=32,
+                 smoothing_window=5, rematch_interval=3, iou_threshold=0.3, max_track_age=5):
+        """
+        Args:
+            engine (EigenfaceEngine): Engine yang sudah di-training/di-load
+            detector (FaceDetector): Detektor wajah; None = seluruh frame dianggap satu wajah
+                (video yang sudah di-crop)
+            frame_stride (int): Proses 1 dari setiap frame_stride frame
+            threshold (float): Threshold recognition
+            batch_size (int): Jumlah crop maksimal per batch proyeksi
+            queue_size (int): Ukuran maksimal queue antar tahap
+            smoothing_window (int): Jumlah hasil match terakhir untuk voting identitas
+            rematch_interval (int): Match ulang track setiap sekian frame yang diproses
+            iou_threshold (float): IoU minimal untuk menganggap deteksi sebagai track yang sama
+            max_track_age (int): Track dibuang jika tidak terlihat sekian frame yang diproses
+        """
+        if not engine.is_trained:
+            raise ValueError("Engine belum di-training atau model belum di-load")
+        
+        self.engine = engine
+        self.detector = detector
+        self.frame_stride = max(1, int(frame_stride))
+        self.threshold = threshold
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.smoothing_window = smoothing_window
+        self.rematch_interval = rematch_interval
+        self.iou_threshold = iou_threshold
+        self.max_track_age = max_track_age
+        
+        self._stop = threading.Event()
+        self.stats = {}
+    
+    def _put(self, q, item):
+        # put dengan timeout agar tahap tidak macet selamanya jika pipeline dihentikan
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def _decode_stage(self, video_path, out_queue):
+        capture = cv2.VideoCapture(video_path)
+        try:
+            if not capture.isOpened():
+                raise ValueError(f"Video tidak bisa dibuka: {video_path}")
+            self.stats['video_fps'] = capture.get(cv2.CAP_PROP_FPS) or 0.0
+            
+            frame_index = 0
+            while not self._stop.is_set():
+                # Frame yang dilewati cukup di-grab (tanpa decode ke BGR)
+                if not capture.grab():
+                    break
+                if frame_index % self.frame_stride == 0:
+                    ok, frame = capture.retrieve()
+                    if not ok:
+                        break
+                    timestamp_ms = capture.get(cv2.CAP_PROP_POS_MSEC)
+                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                    if not self._put(out_queue, (frame_index, timestamp_ms, gray)):
+                        break
+                frame_index += 1
+            self.stats['frames_read'] = frame_index
+            self._put(out_queue, _END)
+        except Exception as e:
+            self._put(out_queue, e)
+        finally:
+            capture.release()
+    
+    def _detect_stage(self, in_queue, out_queue):
+        target_size = self.engine.target_size
+        # Model yang dilatih dengan alignment butuh crop yang diluruskan juga
+        aligner = FaceAligner(self.detector) if self.detector is not None and self.engine.align_faces else None
+        try:
+            while not self._stop.is_set():
+                try:
+                    item = in_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is _END or isinstance(item, Exception):
+                    self._put(out_queue, item)
+                    return
+                
+                frame_index, timestamp_ms, gray = item
+                if self.detector is None:
+                    boxes = np.array([[0, 0, gray.shape[1], gray.shape[0]]], dtype=np.int32)
+                else:
+                    boxes = self.detector.detect(gray)
+                if aligner is not None:
+                    crops = [aligner.align(gray, box, target_size) for box in boxes]
+                else:
+                    crops = [crop_face(gray, box, target_size) for box in boxes]
+                if not self._put(out_queue, (frame_index, timestamp_ms, boxes, crops)):
+                    return
+        except Exception as e:
+            self._put(out_queue, e)
+    
+    def _associate(self, tracks, boxes, frame_number):
+        """Pasangkan deteksi ke track (greedy IoU terbesar), buat track baru untuk sisanya"""
+        assigned = []
+        free_tracks = dict(tracks)
+        for box in boxes:
+            best_id, best_iou = None, self.iou_threshold
+            for track_id, track in free_tracks.items():
+                iou = box_iou(box, track.box)
+                if iou >= best_iou:
+                    best_id, best_iou = track_id, iou
+            if best_id is None:
+                best_id = self._next_track_id
+                self._next_track_id += 1
+                tracks[best_id] = FaceTrack(best_id, box, frame_number, self.smoothing_window)
+            else:
+                del free_tracks[best_id]
+            tracks[best_id].box = box
+            tracks[best_id].last_seen = frame_number
+            assigned.append(tracks[best_id])
+        
+        # Buang track yang sudah lama tidak terlihat
+        for track_id in [t for t, track in tracks.items() if frame_number - track.last_seen > self.max_track_age]:
+            del tracks[track_id]
+        return assigned
+    
+    def _flush(self, pending, crops):
+        """Match semua crop yang menunggu dalam satu batch, lalu susun hasil per frame"""
+        if crops:
+            results = self.engine.recognize_vectors(np.stack(crops), self.threshold, k=1)
+            self.stats['matches'] += len(crops)
+        else:
+            results = []
+        
+        outputs = []
+        for frame_index, timestamp_ms, detections in pending:
+            faces = []
+            for box, track, match_slot in detections:
+                if match_slot is not None:
+                    track.add_vote(results[match_slot])
+                person, distance = track.identity()
+                faces.append({
+                    "box": [int(v) for v in box],
+                    "track_id": track.track_id,
+                    "person": person,
+                    "distance": distance,
+                    "recognized": person != "Unknown",
+                    "matched": match_slot is not None
+                })
+            outputs.append({"frame_index": frame_index, "timestamp_ms": timestamp_ms, "faces": faces})
+        return outputs
+    
+    def process(self, video_path):
+        """
+        Proses video dan hasilkan identitas per frame yang diproses (generator)
+        
+        Args:
+            video_path (str): Path file video lokal
+        
+        Yields:
+            dict: 'frame_index', 'timestamp_ms', 'faces' (list dict berisi 'box',
+                  'track_id', 'person', 'distance', 'recognized', 'matched')
+        """
+        self._stop.clear()
+        self._next_track_id = 1
+        self.stats = {'frames_read': 0, 'frames_processed': 0, 'faces': 0, 'matches': 0, 'video_fps': 0.0}
+        
+        decoded = queue.Queue(maxsize=self.queue_size)
+        detected = queue.Queue(maxsize=self.queue_size)
+        stages = [
+            threading.Thread(target=self._decode_stage, args=(video_path, decoded), daemon=True),
+            threading.Thread(target=self._detect_stage, args=(decoded, detected), daemon=True)
+        ]
+        for stage in stages:
+            stage.start()
+        
+        tracks = {}
+        pending, crops = [], []
+        start = time.perf_counter()
+        try:
+            while True:
+                # Poll dengan timeout: setelah stop() tahap lain berhenti tanpa mengirim _END
+                try:
+                    item = detected.get(timeout=0.1)
+                except queue.Empty:
+                    if self._stop.is_set():
+                        break
+                    continue
+                if item is _END or self._stop.is_set():
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                
+                frame_index, timestamp_ms, boxes, frame_crops = item
+                frame_number = self.stats['frames_processed']
+                self.stats['frames_processed'] += 1
+                self.stats['faces'] += len(boxes)
+                
+                detections = []
+                for box, crop, track in zip(boxes, frame_crops, self._associate(tracks, boxes, frame_number)):
+                    # Track baru atau sudah lama tidak di-match -> masuk batch
+                    match_slot = None
+                    if track.last_scheduled is None or frame_number - track.last_scheduled >= self.rematch_interval:
+                        track.last_scheduled = frame_number
+                        match_slot = len(crops)
+                        crops.append(crop)
+                    detections.append((box, track, match_slot))
+                pending.append((frame_index, timestamp_ms, detections))
+                
+                if len(crops) >= self.batch_size or len(pending) >= self.queue_size:
+                    yield from self._flush(pending, crops)
+                    pending, crops = [], []
+            
+            yield from self._flush(pending, crops)
+        finally:
+            self._stop.set()
+            for stage in stages:
+                stage.join()
+            
+            elapsed = time.perf_counter() - start
+            self.stats['elapsed'] = elapsed
+            self.stats['processing_fps'] = self.stats['frames_read'] / elapsed if elapsed > 0 else 0.0
+            video_duration = self.stats['frames_read'] / self.stats['video_fps'] if self.stats['video_fps'] else 0.0
+            self.stats['realtime_factor'] = video_duration / elapsed if elapsed > 0 else 0.0
+            
+            self.engine.metrics.increment('video_frames', self.stats['frames_processed'])
+            self.engine.metrics.increment('video_faces', self.stats['faces'])
+            self.engine.metrics.increment('video_matches', self.stats['matches'])
+            self.engine.metrics.record_timing('video_total', elapsed)
+    
+    def run(self, video_path):
+        """
+        Proses seluruh video
+        
+        Returns:
+            dict: 'frames' (list hasil per frame) dan 'stats' (jumlah frame/wajah/match,
+                  processing_fps, realtime_factor = durasi video / waktu proses)
+        """
+        frames = list(self.process(video_path))
+        return {"frames": frames, "stats": dict(self.stats)}
+    
+    def stop(self):
+        """Hentikan pipeline dari thread lain"""
+        self._stop.set()